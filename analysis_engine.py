@@ -0,0 +1,512 @@
+import numpy as np
+import pandas as pd
+
+from connectivity import get_connectivity_monitor, is_offline
+from data_providers import LocalFileProvider, YFinanceProvider
+from history_cache import PERIOD_ORDER, HistoryCache, period_start
+from info_cache import InfoCache
+from pivot_levels import find_pivot_levels
+
+LEVEL_METHODS = ["extrema", "pivot"] # extrema: จุดต่ำสุด/สูงสุด 3 จุด, pivot: โซนจากจุดกลับตัว (pivot_levels)
+
+
+class SymbolDataError(Exception):
+    """
+    ข้อผิดพลาดเมื่อไม่พบข้อมูลหุ้นที่ใช้คำนวณได้
+    """
+
+
+def _finalize_support_levels(final_supports, min_price, last_price):
+    """
+    เติมแนวรับให้ครบ 3 ระดับ (กรณีพบจุดต่ำสุดในท้องถิ่นไม่พอ) และปัดเศษ 2 ตำแหน่ง
+    """
+    # หากมีแนวรับไม่ถึง 3 ระดับ ให้เพิ่มระดับโดยใช้ค่าต่ำสุดรวม หรือคำนวณจากราคาปัจจุบัน
+    if len(final_supports) < 3:
+        min_overall = min_price
+
+        # เพิ่มค่าต่ำสุดรวมหากยังไม่มีอยู่ในแนวรับที่พบ
+        if not any(abs(lvl - min_overall) < 0.01 for lvl in final_supports):
+            final_supports.append(min_overall)
+
+        final_supports = sorted(list(set([round(x, 2) for x in final_supports])))
+
+        while len(final_supports) < 3:
+            if final_supports:
+                last_known_support = sorted(final_supports)[0] # ใช้แนวรับที่ต่ำที่สุดที่พบ
+                new_lower_support = last_known_support * 0.95 # ลดลง 5% จากแนวรับนั้น
+
+                # ตรวจสอบไม่ให้ค่าแนวรับที่สร้างขึ้นต่ำกว่า 90% ของค่าต่ำสุดในประวัติ
+                if new_lower_support < min_price * 0.9:
+                    new_lower_support = min_price * 0.9
+
+                # เพิ่มเข้าไปถ้ายังไม่มีค่าใกล้เคียง
+                if not any(abs(lvl - new_lower_support) < 0.01 for lvl in final_supports):
+                    final_supports.append(new_lower_support)
+                else: # ถ้าค่าที่คำนวณซ้ำกัน ให้หยุด
+                    break
+            else: # กรณีไม่พบแนวรับเลย (ข้อมูลน้อยมาก)
+                final_supports.extend([last_price * 0.98, last_price * 0.95, last_price * 0.92])
+                final_supports = sorted(list(set([round(x, 2) for x in final_supports])))[:3]
+                break
+
+    return sorted(list(set([round(x, 2) for x in final_supports])))[:3]
+
+
+def _finalize_resistance_levels(final_resistances, max_price, last_price):
+    """
+    เติมแนวต้านให้ครบ 3 ระดับ (กรณีพบจุดสูงสุดในท้องถิ่นไม่พอ) และปัดเศษ 2 ตำแหน่ง
+    """
+    # หากมีแนวต้านไม่ถึง 3 ระดับ ให้เพิ่มระดับโดยใช้ค่าสูงสุดรวม หรือคำนวณจากราคาปัจจุบัน
+    if len(final_resistances) < 3:
+        max_overall = max_price
+        if not any(abs(lvl - max_overall) < 0.01 for lvl in final_resistances):
+            final_resistances.append(max_overall)
+
+        final_resistances = sorted(list(set([round(x, 2) for x in final_resistances])))
+
+        while len(final_resistances) < 3:
+            if final_resistances:
+                last_known_resistance = sorted(final_resistances, reverse=True)[0] # ใช้แนวต้านที่สูงสุดที่พบ
+                new_higher_resistance = last_known_resistance * 1.05 # เพิ่มขึ้น 5% จากแนวต้านนั้น
+
+                # ตรวจสอบไม่ให้ค่าแนวต้านที่สร้างขึ้นสูงกว่า 110% ของค่าสูงสุดในประวัติ
+                if new_higher_resistance > max_price * 1.1:
+                    new_higher_resistance = max_price * 1.1
+
+                # เพิ่มเข้าไปถ้ายังไม่มีค่าใกล้เคียง
+                if not any(abs(lvl - new_higher_resistance) < 0.01 for lvl in final_resistances):
+                    final_resistances.append(new_higher_resistance)
+                else: # ถ้าค่าที่คำนวณซ้ำกัน ให้หยุด
+                    break
+            else: # กรณีไม่พบแนวต้านเลย (ข้อมูลน้อยมาก)
+                final_resistances.extend([last_price * 1.02, last_price * 1.05, last_price * 1.08])
+                final_resistances = sorted(list(set([round(x, 2) for x in final_resistances])))[-3:]
+                break
+
+    return sorted(list(set([round(x, 2) for x in final_resistances])))[-3:]
+
+
+def find_support_levels(hist):
+    """
+    คำนวณระดับแนวรับ 3 ระดับ
+    """
+    close_prices = hist['Close']
+
+    if close_prices.empty:
+        return []
+
+    # หาจุดต่ำสุดในท้องถิ่น (local minima)
+    local_minima = close_prices[(close_prices.shift(1) > close_prices) & (close_prices.shift(-1) > close_prices)]
+
+    # เลือก 3 จุดต่ำสุดที่เล็กที่สุด (แนวรับที่แข็งแกร่งที่สุด)
+    support_levels = local_minima.nsmallest(3).sort_values(ascending=True)
+
+    return _finalize_support_levels(support_levels.tolist(), close_prices.min(), close_prices.iloc[-1])
+
+
+def find_resistance_levels(hist):
+    """
+    คำนวณระดับแนวต้าน 3 ระดับ
+    """
+    close_prices = hist['Close']
+
+    if close_prices.empty:
+        return []
+
+    # หาจุดสูงสุดในท้องถิ่น (local maxima)
+    local_maxima = close_prices[(close_prices.shift(1) < close_prices) & (close_prices.shift(-1) < close_prices)]
+
+    # เลือก 3 จุดสูงสุดที่ใหญ่ที่สุด (แนวต้านที่แข็งแกร่งที่สุด)
+    resistance_levels = local_maxima.nlargest(3).sort_values(ascending=True)
+
+    return _finalize_resistance_levels(resistance_levels.tolist(), close_prices.max(), close_prices.iloc[-1])
+
+
+def find_levels(hist, method="extrema", **options):
+    """
+    คำนวณแนวรับและแนวต้านด้วยวิธีที่เลือก (ดู LEVEL_METHODS) คืนค่า (supports, resistances)
+    options ส่งต่อให้ find_pivot_levels เช่น order, tolerance, bins
+    """
+    if method == "extrema":
+        return find_support_levels(hist), find_resistance_levels(hist)
+    if method != "pivot":
+        raise ValueError(f"ไม่รู้จักวิธีคำนวณแนวรับ/แนวต้าน: {method}")
+
+    close_prices = hist['Close']
+    if close_prices.empty:
+        return [], []
+    supports, resistances = find_pivot_levels(hist, **options)
+    last_price = close_prices.iloc[-1]
+    return (_finalize_support_levels(supports, close_prices.min(), last_price),
+            _finalize_resistance_levels(resistances, close_prices.max(), last_price))
+
+
+def _neighbour_values(prices, valid):
+    """
+    คืนราคาของแท่งที่มีข้อมูลก่อนหน้าและถัดไปของทุกตำแหน่ง (ข้ามแท่งที่เป็น NaN)
+    """
+    n_symbols, n_dates = prices.shape
+    positions = np.arange(n_dates)
+
+    # ตำแหน่งแท่งที่มีข้อมูลล่าสุดก่อนหน้า (-1 = ไม่มี)
+    last_seen = np.maximum.accumulate(np.where(valid, positions, -1), axis=1)
+    prev_idx = np.concatenate([np.full((n_symbols, 1), -1), last_seen[:, :-1]], axis=1)
+
+    # ตำแหน่งแท่งที่มีข้อมูลถัดไป (n_dates = ไม่มี)
+    next_seen = np.minimum.accumulate(np.where(valid, positions, n_dates)[:, ::-1], axis=1)[:, ::-1]
+    next_idx = np.concatenate([next_seen[:, 1:], np.full((n_symbols, 1), n_dates)], axis=1)
+
+    prev_values = np.where(prev_idx >= 0, np.take_along_axis(prices, np.clip(prev_idx, 0, n_dates - 1), axis=1), np.nan)
+    next_values = np.where(next_idx < n_dates, np.take_along_axis(prices, np.clip(next_idx, 0, n_dates - 1), axis=1), np.nan)
+    return prev_values, next_values
+
+
+def _smallest_three(values):
+    """
+    คืนค่าที่น้อยที่สุด 3 ค่าของแต่ละแถวเรียงจากน้อยไปมาก (เติม inf หากมีไม่ถึง)
+    """
+    if values.shape[1] < 3:
+        values = np.concatenate([values, np.full((values.shape[0], 3 - values.shape[1]), np.inf)], axis=1)
+    return np.sort(np.partition(values, 2, axis=1)[:, :3], axis=1)
+
+
+def find_levels_matrix(prices):
+    """
+    คำนวณแนวรับและแนวต้าน 3 ระดับของหุ้นหลายตัวพร้อมกัน
+    prices: array ขนาด (จำนวนหุ้น x จำนวนวัน) ของราคาปิด ใช้ NaN แทนวันที่ไม่มีข้อมูล
+    คืนค่า (supports, resistances) เป็น array ขนาด (จำนวนหุ้น x 3) เติม NaN หากได้ไม่ครบ 3 ระดับ
+    ผลลัพธ์ตรงกับ find_support_levels/find_resistance_levels ของหุ้นแต่ละตัว
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[np.newaxis, :]
+    n_symbols, n_dates = prices.shape
+    supports = np.full((n_symbols, 3), np.nan)
+    resistances = np.full((n_symbols, 3), np.nan)
+    if n_dates == 0:
+        return supports, resistances
+
+    valid = ~np.isnan(prices)
+    prev_values, next_values = _neighbour_values(prices, valid)
+
+    # หาจุดต่ำสุด/สูงสุดในท้องถิ่นของทุกหุ้นในครั้งเดียว (NaN เปรียบเทียบได้ False เสมอ)
+    with np.errstate(invalid="ignore"):
+        is_minimum = (prev_values > prices) & (next_values > prices)
+        is_maximum = (prev_values < prices) & (next_values < prices)
+
+    lowest = _smallest_three(np.where(is_minimum, prices, np.inf))
+    highest = -_smallest_three(np.where(is_maximum, -prices, np.inf))[:, ::-1]
+    minimum_count = np.minimum(is_minimum.sum(axis=1), 3)
+    maximum_count = np.minimum(is_maximum.sum(axis=1), 3)
+
+    has_data = valid.any(axis=1)
+    min_prices = np.where(valid, prices, np.inf).min(axis=1)
+    max_prices = np.where(valid, prices, -np.inf).max(axis=1)
+    last_idx = n_dates - 1 - np.argmax(valid[:, ::-1], axis=1)
+    last_prices = prices[np.arange(n_symbols), last_idx]
+
+    # ส่วนเติมระดับ/ปัดเศษทำทีละแถว (มีแค่ 3 ค่าต่อหุ้น) เพื่อให้ได้ผลตรงกับฟังก์ชันเดิมทุกกรณี
+    for row in np.flatnonzero(has_data):
+        row_supports = _finalize_support_levels(
+            lowest[row, :minimum_count[row]].tolist(), min_prices[row], last_prices[row])
+        row_resistances = _finalize_resistance_levels(
+            highest[row, 3 - maximum_count[row]:].tolist(), max_prices[row], last_prices[row])
+        supports[row, :len(row_supports)] = row_supports
+        resistances[row, :len(row_resistances)] = row_resistances
+
+    return supports, resistances
+
+
+def calculate_rsi(series, window=14):
+    """
+    คำนวณค่า Relative Strength Index (RSI)
+    """
+    delta = series.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+
+    avg_gain = gain.ewm(com=window-1, adjust=False).mean()
+    avg_loss = loss.ewm(com=window-1, adjust=False).mean()
+
+    rs = avg_gain / avg_loss.replace(0, 1e-10) # ป้องกันหารด้วยศูนย์
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def period_starts(hist, periods=PERIOD_ORDER):
+    """
+    คืนตำแหน่งแท่งแรกของแต่ละช่วงเวลาในประวัติราคาชุดเดียว {period: ตำแหน่ง}
+    hist.iloc[ตำแหน่ง:] ให้ข้อมูลเดียวกับการดึงช่วงเวลานั้นแยก (ไม่คัดลอกข้อมูล)
+    """
+    if hist.empty:
+        return {period: 0 for period in periods}
+    last_date = hist.index[-1]
+    starts = {}
+    for period in periods:
+        first = period_start(period, last_date)
+        starts[period] = 0 if first is None else int(hist.index.searchsorted(first, side="left"))
+    return starts
+
+
+def calculate_rsi_matrix(prices, window=14):
+    """
+    คำนวณ RSI ล่าสุดของหุ้นหลายตัวพร้อมกัน
+    prices: array ขนาด (จำนวนหุ้น x จำนวนวัน) ชิดขวา ใช้ NaN เติมด้านหน้าของหุ้นที่มีข้อมูลสั้นกว่า
+    ผลลัพธ์ตรงกับ calculate_rsi(close).iloc[-1] ของหุ้นแต่ละตัว
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[np.newaxis, :]
+    delta = np.diff(prices, axis=1, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = -np.where(delta < 0, delta, 0.0)
+    # ช่วงที่เติมด้านหน้าไม่นับ เพื่อให้ ewm เริ่มที่แท่งแรกที่มีข้อมูลเหมือนการคำนวณทีละตัว
+    padding = np.isnan(prices)
+    gain[padding] = np.nan
+    loss[padding] = np.nan
+
+    avg_gain = pd.DataFrame(gain.T).ewm(com=window-1, adjust=False).mean().iloc[-1]
+    avg_loss = pd.DataFrame(loss.T).ewm(com=window-1, adjust=False).mean().iloc[-1]
+    rs = avg_gain / avg_loss.replace(0, 1e-10) # ป้องกันหารด้วยศูนย์
+    return (100 - (100 / (1 + rs))).to_numpy()
+
+
+def calculate_rsi_periods(close, starts, window=14):
+    """
+    คำนวณ RSI ล่าสุดของทุกช่วงเวลาในครั้งเดียว (คอลัมน์ละช่วงเวลา ค่าก่อนจุดเริ่มต้นเป็น NaN)
+    ให้ผลเท่ากับ calculate_rsi(close.iloc[start:]).iloc[-1] ของแต่ละช่วง
+    """
+    values = close.to_numpy(dtype=np.float64)
+    delta = np.diff(values, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = -np.where(delta < 0, delta, 0.0)
+
+    names = list(starts)
+    positions = np.arange(len(values))[:, np.newaxis]
+    before = positions < np.array([starts[name] for name in names])[np.newaxis, :]
+    # แท่งแรกของแต่ละช่วงไม่มี delta จึงเป็น 0 เหมือนการคำนวณจากข้อมูลที่ตัดแล้ว
+    gains = pd.DataFrame(np.where(before, np.nan, gain[:, np.newaxis]), columns=names)
+    losses = pd.DataFrame(np.where(before, np.nan, loss[:, np.newaxis]), columns=names)
+    for name in names:
+        gains.iloc[starts[name], gains.columns.get_loc(name)] = 0.0
+        losses.iloc[starts[name], losses.columns.get_loc(name)] = 0.0
+
+    avg_gain = gains.ewm(com=window-1, adjust=False).mean().iloc[-1]
+    avg_loss = losses.ewm(com=window-1, adjust=False).mean().iloc[-1]
+    rs = avg_gain / avg_loss.replace(0, 1e-10) # ป้องกันหารด้วยศูนย์
+    rsi = 100 - (100 / (1 + rs))
+    return {name: float(rsi[name]) for name in names}
+
+
+def analyze_periods(hist, periods=PERIOD_ORDER, method="extrema"):
+    """
+    คำนวณแนวรับ แนวต้าน และ RSI ของทุกช่วงเวลาจากประวัติราคาชุดเดียว (เช่น "max")
+    วิธี extrema หาจุดต่ำสุด/สูงสุดในท้องถิ่นและค่าต่ำสุด/สูงสุดสะสมเพียงครั้งเดียว แล้วเลือกเฉพาะส่วนของแต่ละช่วง
+    วิธีอื่นคำนวณด้วย find_levels จาก view ของแต่ละช่วง
+    คืนค่า {period: {"start", "bars", "last_close", "supports", "resistances", "rsi"}}
+    """
+    close = hist['Close']
+    values = close.to_numpy(dtype=np.float64)
+    n = len(values)
+    starts = period_starts(hist, periods)
+    if n == 0:
+        return {period: {"start": 0, "bars": 0, "last_close": None, "supports": [], "resistances": [], "rsi": None}
+                for period in periods}
+
+    is_minimum = np.zeros(n, dtype=bool)
+    is_maximum = np.zeros(n, dtype=bool)
+    is_minimum[1:-1] = (values[:-2] > values[1:-1]) & (values[2:] > values[1:-1])
+    is_maximum[1:-1] = (values[:-2] < values[1:-1]) & (values[2:] < values[1:-1])
+    # ค่าต่ำสุด/สูงสุดตั้งแต่แต่ละตำแหน่งจนถึงแท่งล่าสุด (ข้าม NaN เหมือน Series.min/max)
+    suffix_min = np.fmin.accumulate(values[::-1])[::-1]
+    suffix_max = np.fmax.accumulate(values[::-1])[::-1]
+    last_price = values[-1]
+    rsi = calculate_rsi_periods(close, starts)
+
+    results = {}
+    for period in periods:
+        start = starts[period]
+        if method != "extrema":
+            supports, resistances = find_levels(hist.iloc[start:], method)
+            results[period] = {"start": start, "bars": n - start, "last_close": float(last_price),
+                               "supports": supports, "resistances": resistances, "rsi": rsi[period]}
+            continue
+        # แท่งแรกของช่วงไม่มีแท่งก่อนหน้า จึงไม่นับเป็นจุดต่ำสุด/สูงสุดในท้องถิ่น
+        minima = values[start + 1:][is_minimum[start + 1:]]
+        maxima = values[start + 1:][is_maximum[start + 1:]]
+        lowest = np.sort(minima)[:3] if len(minima) <= 3 else np.sort(np.partition(minima, 2)[:3])
+        highest = np.sort(maxima)[-3:] if len(maxima) <= 3 else np.sort(np.partition(maxima, -3)[-3:])
+        results[period] = {
+            "start": start,
+            "bars": n - start,
+            "last_close": float(last_price),
+            "supports": _finalize_support_levels(lowest.tolist(), suffix_min[start], last_price),
+            "resistances": _finalize_resistance_levels(highest.tolist(), suffix_max[start], last_price),
+            "rsi": rsi[period],
+        }
+    return results
+
+
+_provider = None
+
+
+def get_provider():
+    """
+    คืนค่าผู้ให้บริการข้อมูลที่ใช้ร่วมกันทั้งโปรเซส (ค่าเริ่มต้น: Yahoo Finance)
+    """
+    global _provider
+    if _provider is None:
+        _provider = YFinanceProvider(monitor=get_connectivity_monitor())
+    return _provider
+
+
+def set_provider(provider):
+    """
+    เปลี่ยนผู้ให้บริการข้อมูล (เช่น LocalFileProvider สำหรับทดสอบแบบออฟไลน์)
+    """
+    global _provider, _info_cache
+    _provider = provider
+    _info_cache = None # แคชข้อมูลบริษัทผูกกับ provider เดิม
+
+
+def use_data_dir(data_dir):
+    """
+    ใช้ข้อมูลจากโฟลเดอร์บนเครื่องแทนเครือข่าย (ไม่ทำอะไรถ้า data_dir เป็น None)
+    ใช้เป็น initializer ของ worker process ได้
+    """
+    if data_dir:
+        set_provider(LocalFileProvider(data_dir))
+
+
+_history_cache = None
+
+
+def get_history_cache():
+    """
+    คืนค่าแคชประวัติราคาที่ใช้ร่วมกันทั้งโปรเซส
+    """
+    global _history_cache
+    if _history_cache is None:
+        _history_cache = HistoryCache()
+    return _history_cache
+
+
+_info_cache = None
+
+
+def get_info_cache():
+    """
+    คืนค่าแคชข้อมูลบริษัทที่ใช้ร่วมกันทั้งโปรเซส
+    """
+    global _info_cache
+    if _info_cache is None:
+        provider = get_provider()
+        _info_cache = InfoCache(provider.info, provider.quote)
+    return _info_cache
+
+
+def fetch_info(symbol, on_info_update=None):
+    """
+    ดึงข้อมูลบริษัท (ใช้แคชก่อน) ข้อมูลที่หมดอายุจะถูกรีเฟรชเบื้องหลังและแจ้งผ่าน on_info_update(symbol, info)
+    """
+    provider = get_provider()
+    if not provider.cacheable:
+        info = provider.info(symbol)
+    elif is_offline():
+        info = get_info_cache().peek(symbol)
+        if info is None:
+            raise SymbolDataError(f"ออฟไลน์อยู่ และไม่มีข้อมูลบริษัทของ {symbol} ในแคช")
+    else:
+        info = get_info_cache().get(symbol, on_info_update)
+    if not info or "regularMarketPrice" not in info or info["regularMarketPrice"] is None:
+        raise SymbolDataError(f"ไม่พบข้อมูลหุ้นที่ถูกต้องสำหรับ: {symbol} หรือไม่มีราคาปัจจุบัน")
+    return info
+
+
+def fetch_history(symbol, period):
+    """
+    ดึงประวัติราคาของหุ้น (ใช้แคชบนดิสก์ก่อน ยกเว้น provider ที่อ่านจากดิสก์อยู่แล้ว)
+    ระหว่างออฟไลน์หรือเมื่อเครือข่ายล้มเหลว จะคืนข้อมูลในแคชโดยตั้ง hist.attrs["offline"] = True
+    """
+    provider = get_provider()
+    if not provider.cacheable:
+        hist = provider.history(symbol, period)
+    elif is_offline():
+        hist = _cached_history(symbol, period)
+    else:
+        try:
+            hist = get_history_cache().get_history(provider, symbol, period)
+        except provider.policy.retry_on:
+            hist = _cached_history(symbol, period) # เครือข่ายล้มเหลว ใช้ข้อมูลในแคชแทน
+    if hist.empty:
+        raise SymbolDataError(f"ไม่มีข้อมูลประวัติหุ้นสำหรับ {symbol} ในช่วงเวลาที่เลือก")
+    return hist
+
+
+def _cached_history(symbol, period):
+    hist = get_history_cache().load_period(symbol, period)
+    if hist is None or hist.empty:
+        raise SymbolDataError(f"ออฟไลน์อยู่ และไม่มีประวัติราคาของ {symbol} ในแคช")
+    hist.attrs["offline"] = True
+    return hist
+
+
+def load_local_history(symbol, period):
+    """
+    ประวัติราคา float64 โดยไม่ใช้เครือข่าย: จากไฟล์ของ provider ที่อ่านจากดิสก์ หรือจากแคชบนดิสก์ (None หากไม่มี)
+    """
+    provider = get_provider()
+    if not provider.cacheable:
+        return fetch_history(symbol, period)
+    hist = get_history_cache().load_period(symbol, period)
+    return hist if hist is not None and not hist.empty else None
+
+
+def fetch_symbol_data(symbol, period, on_info_update=None):
+    """
+    ดึงข้อมูลบริษัทและประวัติราคาของหุ้น คืนค่า (info, hist)
+    """
+    return fetch_info(symbol, on_info_update), fetch_history(symbol, period)
+
+
+def analyze_history(hist, method="extrema", symbol=None):
+    """
+    คำนวณแนวรับ แนวต้าน และ RSI ล่าสุดจากประวัติราคา
+    ระบุ symbol เพื่อเก็บ RSI ไว้ใน IndicatorService ให้กราฟของหุ้นเดียวกันใช้ต่อ
+    """
+    from indicator_service import get_indicator_service # indicator_service import โมดูลนี้
+
+    rsi = get_indicator_service().get(symbol, hist, "rsi", 14)
+    supports, resistances = find_levels(hist, method)
+    return {
+        "last_close": float(hist['Close'].iloc[-1]),
+        "supports": supports,
+        "resistances": resistances,
+        "rsi": float(rsi[-1]),
+        "bars": len(hist),
+    }
+
+
+def analyze_symbol(symbol, period="3mo", method="extrema"):
+    """
+    ดึงข้อมูลและวิเคราะห์หุ้น 1 ตัว คืนค่าเป็น dict ที่พร้อมบันทึกเป็น CSV/JSON
+    """
+    info, hist = fetch_symbol_data(symbol, period)
+    result = analyze_history(hist, method, symbol)
+    result.update({"symbol": symbol, "period": period, "method": method})
+    result.update(company_fields(symbol, info))
+    return result
+
+
+def company_fields(symbol, info):
+    """
+    ข้อมูลบริษัทที่ใส่ในผลวิเคราะห์ (CSV/JSON/API)
+    """
+    return {
+        "long_name": info.get("longName", symbol),
+        "sector": info.get("sector"),
+        "industry": info.get("industry"),
+        "market_cap": info.get("marketCap"),
+        "trailing_pe": info.get("trailingPE"),
+        "dividend_yield": info.get("dividendYield"),
+    }
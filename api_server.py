@@ -0,0 +1,422 @@
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from analysis_engine import (LEVEL_METHODS, SymbolDataError, analyze_history, company_fields, fetch_symbol_data,
+                             use_data_dir)
+from history_cache import PERIOD_ORDER
+from history_store import load_history
+from indicator_service import get_indicator_service
+from symbol_master import get_symbol_master, validate_symbol
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CACHE_TTL = 60 # วินาที: อายุของผลลัพธ์ในแคช
+CACHE_ENTRIES = 512
+MAX_BATCH = 200 # จำนวนหุ้นสูงสุดต่อคำขอ /batch
+MAX_HEADERS = 100
+CHART_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+CHART_DPI = 100
+
+
+class HttpError(Exception):
+    """
+    ข้อผิดพลาดที่ส่งกลับเป็น HTTP status พร้อมข้อความ
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ResultCache:
+    """
+    แคชผลลัพธ์ในหน่วยความจำแบบจำกัดจำนวน (LRU) และหมดอายุตามเวลา (TTL)
+    ใช้จาก event loop เท่านั้น จึงไม่ต้องใช้ lock
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (เวลาที่เก็บ, ผลลัพธ์)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _clean(value):
+    """
+    แปลงค่าให้บันทึกเป็น JSON มาตรฐานได้ (NaN/inf เป็น null, numpy เป็นชนิดของ Python)
+    """
+    if isinstance(value, dict):
+        return {key: _clean(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(item) for item in value]
+    if hasattr(value, "tolist"):
+        return _clean(value.tolist())
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _last(values):
+    return float(values[-1]) if values is not None and len(values) else None
+
+
+def levels_payload(symbol, period, method):
+    """
+    แนวรับ/แนวต้าน, RSI, MA50/MA200 ล่าสุด และข้อมูลบริษัทของหุ้น 1 ตัว (ทำงานใน thread pool)
+    """
+    info, hist = fetch_symbol_data(symbol, period)
+    result = analyze_history(hist, method, symbol)
+    indicators = get_indicator_service().chart_indicators(symbol, hist)
+    result.update({
+        "symbol": symbol,
+        "period": period,
+        "method": method,
+        "last_date": hist.index[-1].isoformat(),
+        "ma50": _last(indicators["ma50"]),
+        "ma200": _last(indicators["ma200"]),
+        "offline": bool(hist.attrs.get("offline", False)),
+    })
+    result.update(company_fields(symbol, info))
+    return result
+
+
+def indicators_payload(symbol, period, tail):
+    """
+    ค่าตัวชี้วัดทุกแท่ง (หรือเฉพาะ tail แท่งล่าสุด) พร้อมวันที่และราคาปิด (ทำงานใน thread pool)
+    """
+    info, hist = fetch_symbol_data(symbol, period)
+    indicators = get_indicator_service().chart_indicators(symbol, hist)
+    rows = slice(-tail if tail else None, None)
+    return {
+        "symbol": symbol,
+        "period": period,
+        "dates": [date.isoformat() for date in hist.index[rows]],
+        "close": hist["Close"].to_numpy()[rows],
+        "ma50": indicators["ma50"][rows],
+        "ma200": indicators["ma200"][rows] if indicators["ma200"] is not None else None,
+        "rsi": indicators["rsi"][rows],
+    }
+
+
+def render_chart(symbol, history, levels, fmt, dpi=CHART_DPI):
+    """
+    ทำงานใน worker process: วาดกราฟแบบเดียวกับหน้าจอกราฟ/PDF ของโปรแกรม (PriceChart) คืนค่าไฟล์ภาพเป็น bytes
+    history เป็น CompactHistory จาก HistoryStore ของโปรเซสหลัก และ levels เป็นผลของ levels_payload
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from chart_view import PriceChart
+
+    chart = PriceChart()
+    FigureCanvasAgg(chart.figure)
+    chart.set_data(history.to_frame(), levels["supports"], levels["resistances"],
+                   {"longName": levels["long_name"], "symbol": symbol}, symbol)
+    buffer = io.BytesIO()
+    chart.figure.savefig(buffer, format=fmt, dpi=dpi)
+    return buffer.getvalue()
+
+
+class ApiServer:
+    """
+    HTTP API แบบ asyncio (GET เท่านั้น) สำหรับสคริปต์และ dashboard:
+    /levels, /indicators, /batch, /chart.png, /chart.svg และ /health
+    คำขอที่เหมือนกันซึ่งมาพร้อมกันจะรอผลงานเดียวกัน (coalesce) และผลที่เพิ่งคำนวณจะตอบจากแคชในหน่วยความจำ
+    การคำนวณทำใน thread pool ส่วนการวาดกราฟทำใน process pool
+    """
+
+    def __init__(self, data_dir=None, workers=None, cache_ttl=CACHE_TTL, cache_entries=CACHE_ENTRIES):
+        use_data_dir(data_dir)
+        self.data_dir = data_dir
+        self.cache = ResultCache(cache_ttl, cache_entries)
+        self.threads = ThreadPoolExecutor(max_workers=max(4, (os.cpu_count() or 1) * 2), thread_name_prefix="api")
+        self.processes = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                             initializer=use_data_dir, initargs=(data_dir,))
+        self._pending = {} # key -> asyncio.Future ของงานที่กำลังทำ
+        self.coalesced = 0
+        self.requests = 0
+        self.routes = {
+            "/levels": self._levels,
+            "/indicators": self._indicators,
+            "/batch": self._batch,
+            "/chart.png": lambda query: self._chart(query, "png"),
+            "/chart.svg": lambda query: self._chart(query, "svg"),
+            "/health": self._health,
+        }
+        get_symbol_master() # โหลดรายชื่อหุ้นก่อนเริ่มรับคำขอ
+
+    async def _cached(self, key, executor, func, *args):
+        """
+        คืนผลจากแคช หรือรอผลของงานเดียวกันที่กำลังทำอยู่ หรือเริ่มงานใหม่ใน executor
+        """
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        self._pending[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self._pending.pop(key, None)
+        self.cache.put(key, result)
+        return result
+
+    # ---------- endpoints ----------
+
+    async def _levels(self, query):
+        symbol, period, method = _symbol(query), _period(query), _method(query)
+        result = await self._cached(("levels", symbol, period, method), self.threads,
+                                    levels_payload, symbol, period, method)
+        return _json_response(result)
+
+    async def _indicators(self, query):
+        symbol, period = _symbol(query), _period(query)
+        tail = _int(query, "tail", 0)
+        result = await self._cached(("indicators", symbol, period, tail), self.threads,
+                                    indicators_payload, symbol, period, tail)
+        return _json_response(result)
+
+    async def _batch(self, query):
+        symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in _param(query, "symbols").split(",")
+                                     if symbol.strip()))
+        if not symbols:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "ต้องระบุ symbols (คั่นด้วย ,)")
+        if len(symbols) > MAX_BATCH:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"ระบุหุ้นได้ไม่เกิน {MAX_BATCH} ตัวต่อคำขอ")
+        period, method = _period(query), _method(query)
+
+        async def one(symbol):
+            # ใช้แคชเดียวกับ /levels และเก็บข้อผิดพลาดไว้ในผลของหุ้นตัวนั้น แบบเดียวกับ batch_analysis
+            try:
+                error = validate_symbol(symbol)
+                if error:
+                    raise SymbolDataError(error)
+                return await self._cached(("levels", symbol, period, method), self.threads,
+                                          levels_payload, symbol, period, method)
+            except Exception as e:
+                return {"symbol": symbol, "period": period, "method": method, "error": str(e)}
+
+        return _json_response(await asyncio.gather(*(one(symbol) for symbol in symbols)))
+
+    async def _chart(self, query, fmt):
+        symbol, period, method = _symbol(query), _period(query), _method(query)
+        key = ("chart", symbol, period, method, fmt)
+        body = self.cache.get(key)
+        if body is None:
+            # แนวรับ/แนวต้านใช้ผลเดียวกับ /levels (float64) ส่วนกราฟวาดจาก CompactHistory ใน HistoryStore
+            # ส่งให้ worker เฉพาะ array float32 ไม่ต้องดึงและวิเคราะห์ซ้ำใน worker
+            levels = await self._cached(("levels", symbol, period, method), self.threads,
+                                        levels_payload, symbol, period, method)
+            history = await asyncio.get_running_loop().run_in_executor(self.threads, load_history, symbol, period)
+            body = await self._cached(key, self.processes, render_chart, symbol, history, levels, fmt)
+        return HTTPStatus.OK, CHART_FORMATS[fmt], body
+
+    async def _health(self, query):
+        return _json_response({
+            "status": "ok",
+            "data_dir": self.data_dir,
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "pending": len(self._pending),
+            "cache": self.cache.stats(),
+            "indicators": get_indicator_service().stats(),
+        })
+
+    # ---------- HTTP ----------
+
+    async def dispatch(self, method, target):
+        """
+        เลือก endpoint ตาม path คืนค่า (status, content_type, body)
+        """
+        if method not in ("GET", "HEAD"):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "รองรับเฉพาะ GET")
+        url = urlsplit(target)
+        handler = self.routes.get(url.path.rstrip("/") or "/")
+        if handler is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"ไม่พบ endpoint {url.path} (มี: {', '.join(self.routes)})")
+        return await handler(parse_qs(url.query))
+
+    async def handle_connection(self, reader, writer):
+        """
+        รับคำขอบน connection เดียวกันต่อเนื่อง (keep-alive) จนกว่าไคลเอนต์จะปิดหรือขอ Connection: close
+        """
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                self.requests += 1
+                try:
+                    status, content_type, body = await self.dispatch(method, target)
+                except HttpError as e:
+                    status, content_type, body = _error_response(e.status, e.message)
+                except SymbolDataError as e:
+                    status, content_type, body = _error_response(HTTPStatus.NOT_FOUND, str(e))
+                except Exception as e:
+                    status, content_type, body = _error_response(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, content_type, b"" if method == "HEAD" else body,
+                                keep_alive, len(body))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, HttpError):
+            pass # ไคลเอนต์ปิดการเชื่อมต่อกลางคัน หรือส่งคำขอที่อ่านไม่ได้
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        if ready:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.threads.shutdown(wait=False, cancel_futures=True)
+        self.processes.shutdown(wait=False, cancel_futures=True)
+
+
+async def _read_request(reader):
+    """
+    อ่าน request line และ header ของคำขอ HTTP 1 รายการ คืนค่า (method, target, version, headers)
+    หรือ None เมื่อไคลเอนต์ปิดการเชื่อมต่อ (ไม่รองรับ body เพราะใช้เฉพาะ GET)
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "request line ไม่ถูกต้อง")
+    headers = {}
+    for _ in range(MAX_HEADERS):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "header มากเกินไป")
+    return parts[0].upper(), parts[1], parts[2].upper(), headers
+
+
+def _write_response(writer, status, content_type, body, keep_alive, length):
+    status = HTTPStatus(status)
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {length}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+
+
+def _json_response(payload, status=HTTPStatus.OK):
+    body = json.dumps(_clean(payload), ensure_ascii=False).encode("utf-8")
+    return status, "application/json; charset=utf-8", body
+
+
+def _error_response(status, message):
+    return _json_response({"error": message}, status)
+
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    if not values:
+        if default is None:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"ต้องระบุพารามิเตอร์ {name}")
+        return default
+    return values[0]
+
+
+def _symbol(query):
+    symbol = _param(query, "symbol").strip().upper()
+    error = validate_symbol(symbol)
+    if error:
+        raise HttpError(HTTPStatus.BAD_REQUEST, error)
+    return symbol
+
+
+def _period(query):
+    period = _param(query, "period", "3mo")
+    if period not in PERIOD_ORDER:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"period ต้องเป็นหนึ่งใน {', '.join(PERIOD_ORDER)}")
+    return period
+
+
+def _method(query):
+    method = _param(query, "method", "extrema")
+    if method not in LEVEL_METHODS:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"method ต้องเป็นหนึ่งใน {', '.join(LEVEL_METHODS)}")
+    return method
+
+
+def _int(query, name, default):
+    try:
+        value = int(_param(query, name, str(default)))
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} ต้องเป็นจำนวนเต็ม")
+    if value < 0:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} ต้องไม่ติดลบ")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API สำหรับแนวรับ/แนวต้าน ตัวชี้วัด และกราฟ (ไม่ต้องเปิด GUI)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"ค่าเริ่มต้น: {DEFAULT_HOST}")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"ค่าเริ่มต้น: {DEFAULT_PORT}")
+    parser.add_argument("-d", "--data-dir", help="อ่านข้อมูลจากโฟลเดอร์ (<SYMBOL>.csv/.parquet/.json) แทน Yahoo Finance")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="จำนวน process สำหรับวาดกราฟ (ค่าเริ่มต้น: จำนวนคอร์)")
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL, help="อายุของผลลัพธ์ในแคช (วินาที)")
+    args = parser.parse_args(argv)
+
+    server = ApiServer(args.data_dir, args.workers, args.cache_ttl)
+
+    def ready(listener):
+        for sock in listener.sockets:
+            host, port = sock.getsockname()[:2]
+            print(f"เริ่ม API server ที่ http://{host}:{port}", file=sys.stderr)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
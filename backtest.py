@@ -0,0 +1,261 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import LEVEL_METHODS, calculate_rsi, fetch_history, find_levels, find_levels_matrix, use_data_dir
+from batch_analysis import load_symbols, load_watchlist
+from connectivity import set_offline_mode
+
+TRADING_DAYS = 252
+LEVEL_WINDOW = 126 # จำนวนแท่งย้อนหลังที่ใช้คำนวณแนวรับ/แนวต้านของแต่ละวัน
+LEVEL_STEP = 1 # คำนวณแนวรับ/แนวต้านใหม่ทุกกี่แท่ง
+RSI_LOW = 30
+RSI_HIGH = 70
+TOLERANCE = 0.01 # ราคาห่างจากแนวรับ/แนวต้านไม่เกิน 1% ถือว่าแตะ
+COST = 0.001 # ค่าธรรมเนียม+slippage ต่อการซื้อหรือขาย 1 ครั้ง (สัดส่วนของมูลค่า)
+CHUNK_ROWS = 4096 # จำนวนหน้าต่างที่คำนวณแนวรับ/แนวต้านพร้อมกัน (จำกัดหน่วยความจำ)
+RESULT_FIELDS = [
+    "symbol", "window", "rsi_low", "rsi_high", "tolerance", "method",
+    "total_return", "cagr", "sharpe", "max_drawdown", "trades", "win_rate", "exposure", "bars", "error",
+]
+
+
+def walk_forward_levels(close, window=LEVEL_WINDOW, step=LEVEL_STEP, method="extrema"):
+    """
+    แนวรับ/แนวต้านของแต่ละวันที่คำนวณจาก window แท่งก่อนหน้าเท่านั้น (ไม่รวมวันนั้น จึงไม่มี lookahead)
+    คำนวณใหม่ทุก step แท่งและใช้ค่าเดิมระหว่างนั้น คืนค่า (supports, resistances) ขนาด (จำนวนวัน x 3)
+    วันที่ข้อมูลยังไม่ครบ window แท่งเป็น NaN
+    """
+    values = np.asarray(close, dtype=np.float64)
+    n = len(values)
+    supports = np.full((n, 3), np.nan)
+    resistances = np.full((n, 3), np.nan)
+    if n <= window:
+        return supports, resistances
+
+    # วันที่ t ใช้หน้าต่าง values[t - window:t] ซึ่งคือแถวที่ t - window ของ sliding_window_view
+    days = np.arange(window, n, step)
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    for first in range(0, len(days), CHUNK_ROWS):
+        chunk = days[first:first + CHUNK_ROWS]
+        if method == "extrema":
+            chunk_supports, chunk_resistances = find_levels_matrix(windows[chunk - window])
+        else:
+            chunk_supports = np.full((len(chunk), 3), np.nan)
+            chunk_resistances = np.full((len(chunk), 3), np.nan)
+            for row, day in enumerate(chunk):
+                row_supports, row_resistances = find_levels(pd.DataFrame({"Close": values[day - window:day]}), method)
+                chunk_supports[row, :len(row_supports)] = row_supports
+                chunk_resistances[row, :len(row_resistances)] = row_resistances
+        supports[chunk] = chunk_supports
+        resistances[chunk] = chunk_resistances
+
+    if step > 1:
+        # ใช้ระดับล่าสุดที่คำนวณไว้จนกว่าจะถึงรอบถัดไป
+        holder = np.full(n, -1)
+        holder[days] = days
+        holder = np.maximum.accumulate(holder)
+        known = holder >= 0
+        supports[known] = supports[holder[known]]
+        resistances[known] = resistances[holder[known]]
+    return supports, resistances
+
+
+def generate_positions(close, rsi, supports, resistances, rsi_low=RSI_LOW, rsi_high=RSI_HIGH, tolerance=TOLERANCE):
+    """
+    สถานะถือหุ้น (1/0) ณ สิ้นวัน จากสัญญาณ:
+    ซื้อเมื่อราคาปิดอยู่ใกล้แนวรับที่ใกล้ที่สุด (ไม่เกิน tolerance) และ RSI ต่ำกว่า rsi_low
+    ขายเมื่อราคาปิดแตะแนวต้านที่ใกล้ที่สุด, RSI สูงกว่า rsi_high หรือราคาหลุดแนวรับต่ำสุด
+    """
+    close = np.asarray(close, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        # แนวรับที่สูงที่สุดที่ไม่เกินราคา และแนวต้านที่ต่ำที่สุดที่ไม่ต่ำกว่าราคา (ใกล้ราคาที่สุด)
+        below = np.where(supports <= close[:, np.newaxis] * (1 + tolerance), supports, -np.inf).max(axis=1)
+        above = np.where(resistances >= close[:, np.newaxis] * (1 - tolerance), resistances, np.inf).min(axis=1)
+        lowest_support = np.where(np.isnan(supports), np.inf, supports).min(axis=1)
+
+        entry = (close <= below * (1 + tolerance)) & (rsi < rsi_low)
+        exit_ = (close >= above * (1 - tolerance)) | (rsi > rsi_high) | (close < lowest_support * (1 - tolerance))
+
+    # ออกมีสิทธิ์ก่อนเข้า จากนั้นคงสถานะเดิมไว้จนกว่าจะมีสัญญาณใหม่
+    state = np.where(exit_, 0.0, np.where(entry, 1.0, np.nan))
+    return pd.Series(state).ffill().fillna(0.0).to_numpy()
+
+
+def backtest_positions(close, positions, cost=COST):
+    """
+    คำนวณผลตอบแทนรายวันของกลยุทธ์: สถานะ ณ สิ้นวัน t ได้ผลตอบแทนของวัน t+1 หักค่าธรรมเนียมเมื่อเปลี่ยนสถานะ
+    """
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1
+    held = np.concatenate([[0.0], positions[:-1]])
+    turnover = np.abs(np.diff(positions, prepend=0.0))
+    return np.nan_to_num(held * returns) - turnover * cost
+
+
+def performance(strategy_returns, positions, periods_per_year=TRADING_DAYS):
+    """
+    สรุปผลตอบแทนรวม, CAGR, Sharpe, drawdown สูงสุด, จำนวนเทรด, อัตราชนะ และสัดส่วนเวลาที่ถือหุ้น
+    """
+    n = len(strategy_returns)
+    equity = np.cumprod(1 + strategy_returns)
+    total_return = equity[-1] - 1 if n else 0.0
+    years = n / periods_per_year
+    std = strategy_returns.std()
+
+    # แต่ละเทรดคือช่วงที่ถือหุ้นต่อเนื่อง รวมผลตอบแทนรายวันของช่วงนั้นด้วย log return
+    entries = np.flatnonzero(np.diff(positions, prepend=0.0) > 0)
+    exits = np.flatnonzero(np.diff(positions, append=0.0) < 0) + 1
+    log_returns = np.concatenate([[0.0], np.cumsum(np.log1p(strategy_returns))])
+    trade_returns = np.expm1(log_returns[np.minimum(exits + 1, n)] - log_returns[entries])
+
+    return {
+        "total_return": float(total_return),
+        "cagr": float((1 + total_return) ** (1 / years) - 1) if years > 0 and total_return > -1 else float("nan"),
+        "sharpe": float(strategy_returns.mean() / std * np.sqrt(periods_per_year)) if std > 0 else 0.0,
+        "max_drawdown": float((equity / np.maximum.accumulate(equity) - 1).min()) if n else 0.0,
+        "trades": int(len(entries)),
+        "win_rate": float((trade_returns > 0).mean()) if len(entries) else float("nan"),
+        "exposure": float(positions.mean()) if n else 0.0,
+        "bars": n,
+    }
+
+
+def backtest_symbol(hist, windows=(LEVEL_WINDOW,), rsi_bounds=((RSI_LOW, RSI_HIGH),), tolerances=(TOLERANCE,),
+                    step=LEVEL_STEP, cost=COST, method="extrema"):
+    """
+    ทดสอบทุกชุดพารามิเตอร์กับหุ้น 1 ตัว แนวรับ/แนวต้านคำนวณครั้งเดียวต่อ window แล้วใช้ซ้ำกับ RSI/tolerance ทุกค่า
+    คืนค่ารายการผลลัพธ์ (dict) ต่อชุดพารามิเตอร์
+    """
+    close = hist['Close']
+    values = close.to_numpy(dtype=np.float64)
+    rsi = calculate_rsi(close).to_numpy()
+    results = []
+    for window in windows:
+        supports, resistances = walk_forward_levels(values, window, step, method)
+        for (rsi_low, rsi_high), tolerance in itertools.product(rsi_bounds, tolerances):
+            positions = generate_positions(values, rsi, supports, resistances, rsi_low, rsi_high, tolerance)
+            result = performance(backtest_positions(values, positions, cost), positions)
+            result.update({"window": window, "rsi_low": rsi_low, "rsi_high": rsi_high,
+                           "tolerance": tolerance, "method": method})
+            results.append(result)
+    return results
+
+
+def _init_worker(data_dir):
+    use_data_dir(data_dir)
+    set_offline_mode(True) # ใช้เฉพาะข้อมูลในแคช/โฟลเดอร์ ไม่ดึงข้อมูลจากเครือข่ายระหว่าง sweep
+
+
+def _sweep_worker(symbol, period, grid):
+    """
+    ทำงานใน worker process: โหลดประวัติราคาจากแคชแล้วทดสอบทุกชุดพารามิเตอร์ เก็บข้อผิดพลาดไว้ในผลลัพธ์
+    """
+    try:
+        hist = fetch_history(symbol, period)
+        return [dict(result, symbol=symbol) for result in backtest_symbol(hist, **grid)]
+    except Exception as e:
+        return [{"symbol": symbol, "error": str(e)}]
+
+
+def run_sweep(symbols, period="10y", grid=None, workers=None, progress=None, data_dir=None):
+    """
+    ทดสอบทุกชุดพารามิเตอร์กับหุ้นทุกตัวพร้อมกันด้วย process pool (หุ้นละ 1 งาน)
+    ข้อมูลมาจากแคชบนเครื่องหรือ data_dir เท่านั้น คืนค่าผลลัพธ์เรียงตามลำดับของ symbols
+    """
+    grid = grid or {}
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_dir,)) as executor:
+        futures = {executor.submit(_sweep_worker, symbol, period, grid): symbol for symbol in symbols}
+        for done, future in enumerate(as_completed(futures), start=1):
+            symbol = futures[future]
+            results[symbol] = future.result()
+            if progress:
+                progress(done, len(symbols), symbol)
+    return [row for symbol in symbols for row in results[symbol]]
+
+
+def summarize(results):
+    """
+    เฉลี่ยผลของทุกหุ้นต่อชุดพารามิเตอร์ เรียงตาม Sharpe เฉลี่ยจากมากไปน้อย
+    """
+    frame = pd.DataFrame([row for row in results if not row.get("error")])
+    if frame.empty:
+        return frame
+    keys = ["window", "rsi_low", "rsi_high", "tolerance", "method"]
+    summary = frame.groupby(keys).agg(
+        symbols=("symbol", "count"),
+        total_return=("total_return", "mean"),
+        sharpe=("sharpe", "mean"),
+        max_drawdown=("max_drawdown", "mean"),
+        trades=("trades", "sum"),
+        win_rate=("win_rate", "mean"),
+    )
+    return summary.sort_values("sharpe", ascending=False).reset_index()
+
+
+def write_results(results, output_path):
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ทดสอบย้อนหลัง (walk-forward) สัญญาณแนวรับ/แนวต้านและ RSI")
+    parser.add_argument("symbols_file", nargs="?", help="ไฟล์รายชื่อหุ้น (ค่าเริ่มต้น: watchlist ของโปรแกรม)")
+    parser.add_argument("-p", "--period", default="10y", choices=["3mo", "6mo", "1y", "5y", "10y", "max"], help="ช่วงเวลาของข้อมูล")
+    parser.add_argument("--windows", type=int, nargs="+", default=[LEVEL_WINDOW], help="จำนวนแท่งที่ใช้คำนวณแนวรับ/แนวต้าน")
+    parser.add_argument("--rsi-low", type=float, nargs="+", default=[RSI_LOW], help="RSI ที่ต่ำกว่านี้จึงซื้อ")
+    parser.add_argument("--rsi-high", type=float, nargs="+", default=[RSI_HIGH], help="RSI ที่สูงกว่านี้ให้ขาย")
+    parser.add_argument("--tolerance", type=float, nargs="+", default=[TOLERANCE], help="ระยะห่างจากแนวรับ/แนวต้านที่ถือว่าแตะ (สัดส่วน)")
+    parser.add_argument("--step", type=int, default=LEVEL_STEP, help="คำนวณแนวรับ/แนวต้านใหม่ทุกกี่แท่ง")
+    parser.add_argument("--cost", type=float, default=COST, help="ค่าธรรมเนียมต่อการซื้อหรือขาย (สัดส่วน)")
+    parser.add_argument("-m", "--method", default="extrema", choices=LEVEL_METHODS, help="วิธีคำนวณแนวรับ/แนวต้าน")
+    parser.add_argument("-o", "--output", default="backtest.csv", help="ไฟล์ผลลัพธ์ CSV (หุ้นละแถวต่อชุดพารามิเตอร์)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="จำนวน process (ค่าเริ่มต้น: จำนวนคอร์ทั้งหมด)")
+    parser.add_argument("-d", "--data-dir", help="อ่านข้อมูลจากโฟลเดอร์ (<SYMBOL>.csv/.parquet) แทนแคช")
+    parser.add_argument("--top", type=int, default=10, help="จำนวนชุดพารามิเตอร์ที่ดีที่สุดที่แสดง")
+    args = parser.parse_args(argv)
+
+    symbols = load_symbols(args.symbols_file) if args.symbols_file else load_watchlist()
+    if not symbols:
+        source = f"ไฟล์ {args.symbols_file}" if args.symbols_file else "watchlist"
+        print(f"ไม่พบรายชื่อหุ้นใน{source}", file=sys.stderr)
+        return 1
+
+    grid = {
+        "windows": args.windows,
+        "rsi_bounds": [(low, high) for low, high in itertools.product(args.rsi_low, args.rsi_high) if low < high],
+        "tolerances": args.tolerance,
+        "step": args.step,
+        "cost": args.cost,
+        "method": args.method,
+    }
+
+    def progress(done, total, symbol):
+        print(f"[{done}/{total}] {symbol}", file=sys.stderr)
+
+    results = run_sweep(symbols, args.period, grid, args.workers, progress, args.data_dir)
+    write_results(results, args.output)
+
+    failed = sorted({row["symbol"] for row in results if row.get("error")})
+    if failed:
+        print(f"ไม่มีข้อมูลในแคช/โฟลเดอร์: {', '.join(failed)}", file=sys.stderr)
+    summary = summarize(results)
+    if not summary.empty:
+        print(summary.head(args.top).to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+    print(f"ทดสอบเสร็จ {len(symbols) - len(failed)}/{len(symbols)} ตัว บันทึกที่ {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analysis_engine import LEVEL_METHODS, analyze_symbol, use_data_dir
+from local_store import get_local_store
+
+CSV_FIELDS = [
+    "symbol", "period", "method", "long_name", "last_close",
+    "support_1", "support_2", "support_3",
+    "resistance_1", "resistance_2", "resistance_3",
+    "rsi", "bars", "sector", "industry", "market_cap", "trailing_pe", "dividend_yield",
+    "error",
+]
+
+
+def load_symbols(path):
+    """
+    โหลดรายชื่อหุ้นจากไฟล์ (บรรทัดละ 1 ตัว) ตัดค่าซ้ำโดยคงลำดับเดิม
+    """
+    with open(path, "r") as f:
+        symbols = [line.strip().upper() for line in f if line.strip()]
+    return list(dict.fromkeys(symbols))
+
+
+def load_watchlist():
+    """
+    โหลด watchlist ของโปรแกรมจากฐานข้อมูลบนเครื่อง (นำเข้าจาก watchlist.txt หากยังไม่เคยนำเข้า)
+    """
+    store = get_local_store()
+    store.import_watchlist_file()
+    return store.watchlist()
+
+
+def _analyze_worker(symbol, period, method):
+    """
+    วิเคราะห์หุ้น 1 ตัวใน worker process โดยเก็บข้อผิดพลาดไว้ในผลลัพธ์แทนการหยุดทั้ง batch
+    """
+    try:
+        return analyze_symbol(symbol, period, method)
+    except Exception as e:
+        return {"symbol": symbol, "period": period, "method": method, "error": str(e)}
+
+
+def run_batch(symbols, period="3mo", workers=None, progress=None, data_dir=None, method="extrema"):
+    """
+    วิเคราะห์หุ้นหลายตัวพร้อมกันด้วย process pool คืนค่าผลลัพธ์ตามลำดับของ symbols
+    ระบุ data_dir เพื่ออ่านข้อมูลจากไฟล์บนเครื่องแทนเครือข่าย
+    """
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=use_data_dir, initargs=(data_dir,)) as executor:
+        futures = {executor.submit(_analyze_worker, symbol, period, method): symbol for symbol in symbols}
+        for done, future in enumerate(as_completed(futures), start=1):
+            symbol = futures[future]
+            results[symbol] = future.result()
+            if progress:
+                progress(done, len(symbols), symbol)
+    return [results[symbol] for symbol in symbols]
+
+
+def _flatten_result(result):
+    """
+    แปลงผลลัพธ์ให้อยู่ในรูปแถวของ CSV
+    """
+    row = {key: value for key, value in result.items() if key not in ("supports", "resistances")}
+    for i, level in enumerate(result.get("supports", []), start=1):
+        row[f"support_{i}"] = level
+    for i, level in enumerate(result.get("resistances", []), start=1):
+        row[f"resistance_{i}"] = level
+    return row
+
+
+def write_results(results, output_path, fmt=None):
+    """
+    บันทึกผลลัพธ์เป็น CSV หรือ JSON (เลือกตามนามสกุลไฟล์หากไม่ระบุ fmt)
+    """
+    fmt = fmt or ("json" if output_path.lower().endswith(".json") else "csv")
+    if fmt == "json":
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    else:
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for result in results:
+                writer.writerow(_flatten_result(result))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="วิเคราะห์แนวรับ/แนวต้าน/RSI ของหุ้นหลายตัวแบบ batch")
+    parser.add_argument("symbols_file", nargs="?", help="ไฟล์รายชื่อหุ้น (ค่าเริ่มต้น: watchlist ของโปรแกรม)")
+    parser.add_argument("-p", "--period", default="3mo", choices=["3mo", "6mo", "1y", "5y", "10y", "max"], help="ช่วงเวลาของข้อมูล")
+    parser.add_argument("-m", "--method", default="extrema", choices=LEVEL_METHODS,
+                        help="วิธีคำนวณแนวรับ/แนวต้าน: extrema (จุดต่ำสุด/สูงสุด) หรือ pivot (โซนจากจุดกลับตัว)")
+    parser.add_argument("-o", "--output", default="results.csv", help="ไฟล์ผลลัพธ์ (.csv หรือ .json)")
+    parser.add_argument("-f", "--format", choices=["csv", "json"], help="รูปแบบไฟล์ผลลัพธ์")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="จำนวน process (ค่าเริ่มต้น: จำนวนคอร์ทั้งหมด)")
+    parser.add_argument("-d", "--data-dir", help="อ่านข้อมูลจากโฟลเดอร์ (<SYMBOL>.csv/.parquet/.json) แทน Yahoo Finance")
+    parser.add_argument("-r", "--report", metavar="PDF", help="สร้างรายงาน PDF หลายหน้า (ตารางสรุป + กราฟหุ้นละ 1 หน้า)")
+    args = parser.parse_args(argv)
+
+    symbols = load_symbols(args.symbols_file) if args.symbols_file else load_watchlist()
+    if not symbols:
+        source = f"ไฟล์ {args.symbols_file}" if args.symbols_file else "watchlist"
+        print(f"ไม่พบรายชื่อหุ้นใน{source}", file=sys.stderr)
+        return 1
+
+    def progress(done, total, symbol):
+        print(f"[{done}/{total}] {symbol}", file=sys.stderr)
+
+    if args.report:
+        # import เฉพาะเมื่อใช้โหมดรายงาน เพราะต้องโหลด matplotlib
+        from batch_report import build_report
+        results = build_report(symbols, args.report, args.period, args.workers, progress=progress,
+                               data_dir=args.data_dir, method=args.method)
+        print(f"บันทึกรายงาน PDF ที่ {args.report}", file=sys.stderr)
+    else:
+        results = run_batch(symbols, args.period, args.workers, progress, args.data_dir, args.method)
+    write_results(results, args.output, args.format)
+
+    failed = sum(1 for result in results if result.get("error"))
+    print(f"วิเคราะห์เสร็จ {len(results) - failed}/{len(results)} ตัว บันทึกที่ {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib.image as mpimg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+from analysis_engine import analyze_history, company_fields, fetch_symbol_data, use_data_dir
+from chart_view import PriceChart
+
+PAGE_DPI = 120
+SUMMARY_ROWS_PER_PAGE = 30
+SUMMARY_COLUMNS = ["หุ้น", "ชื่อบริษัท", "ราคาปิด", "แนวรับ 1", "แนวรับ 2", "แนวรับ 3",
+                   "แนวต้าน 1", "แนวต้าน 2", "แนวต้าน 3", "RSI (14)"]
+
+
+def _render_page_worker(symbol, period, dpi, method):
+    """
+    ทำงานใน worker process: วิเคราะห์หุ้น 1 ตัวและวาดหน้ากราฟด้วย Agg คืนค่า (ผลวิเคราะห์, ภาพ PNG)
+    """
+    try:
+        info, hist = fetch_symbol_data(symbol, period)
+        result = analyze_history(hist, method, symbol)
+        result.update({"symbol": symbol, "period": period, "method": method})
+        result.update(company_fields(symbol, info)) # คอลัมน์เดียวกับ analyze_symbol
+
+        chart = PriceChart()
+        FigureCanvasAgg(chart.figure)
+        chart.set_data(hist, result["supports"], result["resistances"], info, symbol) # ใช้ RSI ที่คำนวณไว้แล้ว
+        buffer = io.BytesIO()
+        chart.figure.savefig(buffer, format="png", dpi=dpi)
+        return result, buffer.getvalue()
+    except Exception as e:
+        return {"symbol": symbol, "period": period, "method": method, "error": str(e)}, None
+
+
+def _format_level(levels, i):
+    return f"{levels[i]:.2f}" if i < len(levels) else "-"
+
+
+def _summary_row(result):
+    if result.get("error"):
+        return [result["symbol"], f"ผิดพลาด: {result['error']}"[:40]] + ["-"] * (len(SUMMARY_COLUMNS) - 2)
+    supports = result["supports"]
+    resistances = result["resistances"]
+    return ([result["symbol"], str(result.get("long_name", ""))[:28], f"{result['last_close']:.2f}"]
+            + [_format_level(supports, i) for i in range(3)]
+            + [_format_level(resistances, i) for i in range(3)]
+            + [f"{result['rsi']:.1f}"])
+
+
+def _write_summary_pages(pdf, results, period):
+    """
+    เขียนหน้าตารางสรุปแนวรับ/แนวต้าน/RSI ของหุ้นทุกตัว
+    """
+    rows = [_summary_row(result) for result in results]
+    pages = max(1, -(-len(rows) // SUMMARY_ROWS_PER_PAGE))
+    for page in range(pages):
+        chunk = rows[page * SUMMARY_ROWS_PER_PAGE:(page + 1) * SUMMARY_ROWS_PER_PAGE]
+        figure = Figure(figsize=(11.69, 8.27)) # A4 แนวนอน
+        FigureCanvasAgg(figure)
+        ax = figure.add_subplot(1, 1, 1)
+        ax.axis("off")
+        ax.set_title(f"สรุปแนวรับ/แนวต้านและ RSI ({period}) หน้า {page + 1}/{pages}", loc="left")
+        if chunk:
+            table = ax.table(cellText=chunk, colLabels=SUMMARY_COLUMNS, loc="upper center", cellLoc="center")
+            table.auto_set_font_size(False)
+            table.set_fontsize(8)
+            table.scale(1, 1.2)
+        pdf.savefig(figure)
+
+
+def _write_image_page(pdf, png_bytes):
+    """
+    เพิ่มภาพกราฟที่ worker วาดไว้เป็น 1 หน้าใน PDF
+    """
+    image = mpimg.imread(io.BytesIO(png_bytes), format="png")
+    height, width = image.shape[:2]
+    figure = Figure(figsize=(width / PAGE_DPI, height / PAGE_DPI), dpi=PAGE_DPI)
+    FigureCanvasAgg(figure)
+    figure.figimage(image, resize=False)
+    pdf.savefig(figure, dpi=PAGE_DPI)
+
+
+def build_report(symbols, output_path, period="3mo", workers=None, dpi=PAGE_DPI, progress=None, data_dir=None,
+                 method="extrema"):
+    """
+    สร้างรายงาน PDF หลายหน้า: หน้าสรุปตาราง ตามด้วยกราฟหุ้นละ 1 หน้า
+    หน้ากราฟถูกวาดพร้อมกันใน process pool แล้วนำมารวมเป็นไฟล์เดียวตามลำดับของ symbols
+    คืนค่าผลวิเคราะห์ของหุ้นทุกตัว
+    """
+    workers = workers or os.cpu_count() or 1
+    pages = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=use_data_dir, initargs=(data_dir,)) as executor:
+        futures = {executor.submit(_render_page_worker, symbol, period, dpi, method): symbol for symbol in symbols}
+        for done, future in enumerate(as_completed(futures), start=1):
+            symbol = futures[future]
+            pages[symbol] = future.result()
+            if progress:
+                progress(done, len(symbols), symbol)
+
+    results = [pages[symbol][0] for symbol in symbols]
+    with PdfPages(output_path) as pdf:
+        _write_summary_pages(pdf, results, period)
+        for symbol in symbols:
+            png_bytes = pages[symbol][1]
+            if png_bytes is not None:
+                _write_image_page(pdf, png_bytes)
+    return results
@@ -0,0 +1,287 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg") # ทำงานแบบไม่มีหน้าจอ
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import calculate_rsi, find_levels, find_levels_matrix, find_resistance_levels, find_support_levels
+
+# จำนวนแท่งราคารายวันโดยประมาณของแต่ละช่วงเวลา
+SIZES = {
+    "3mo": 63,
+    "1y": 252,
+    "5y": 1260,
+    "10y": 2520,
+    "50y": 12600,
+}
+SYMBOL_COUNTS = [100, 1000]
+END_DATE = "2024-12-31" # วันสุดท้ายคงที่เพื่อให้ข้อมูลเหมือนเดิมทุกครั้ง
+REGRESSION_THRESHOLD = 0.20 # ช้าลงเกิน 20% จาก baseline ถือว่า regression
+HEAVY_MODULES = ["numpy", "pandas", "matplotlib", "yfinance", "tkinter"]
+
+# โค้ดที่รันใน process ใหม่เพื่อวัดเวลาเริ่มต้นโดยไม่มีโมดูลที่ import ไว้แล้ว
+STARTUP_CASES = {
+    "gui_import": "import stock_support_calculator",
+    "gui_window": (
+        "import tkinter as tk\n"
+        "root = tk.Tk()\n"
+        "from stock_support_calculator import StockSupportCalculator\n"
+        "app = StockSupportCalculator(root)\n"
+        "root.update()\n"
+    ),
+    "first_lookup_imports": "import analysis_engine",
+    "first_graph_imports": "import chart_view\nimport matplotlib.backends.backend_tkagg",
+    "batch_import": "import batch_analysis",
+}
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<startup>", "exec"))
+elapsed = (time.perf_counter() - start) * 1000
+try:
+    import resource
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError:
+    peak_kb = 0
+print(json.dumps({"ms": elapsed, "peak_kb": peak_kb,
+                  "modules": [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+
+def synthetic_ohlcv(n_bars, seed=0, start_price=100.0, end=END_DATE, tz="America/New_York"):
+    """
+    สร้างประวัติราคา OHLCV รายวันแบบสุ่ม (random walk แบบ log-normal) ที่กำหนด seed ได้
+    รูปแบบคอลัมน์และ index เหมือน ticker.history()
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=end, periods=n_bars, tz=tz, name="Date")
+    returns = rng.normal(0.0003, 0.015, n_bars)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate([[start_price], close[:-1]]) * np.exp(rng.normal(0, 0.003, n_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, n_bars)))
+    volume = rng.lognormal(14, 0.5, n_bars).astype(np.int64)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def synthetic_close_matrix(n_symbols, n_bars, seed=0):
+    """
+    สร้างราคาปิดของหุ้นหลายตัวเป็น array (จำนวนหุ้น x จำนวนวัน) สำหรับทดสอบ find_levels_matrix
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.015, (n_symbols, n_bars))
+    start = rng.uniform(10, 500, (n_symbols, 1))
+    return start * np.exp(np.cumsum(returns, axis=1))
+
+
+def write_dataset(data_dir, n_symbols, n_bars, seed=0):
+    """
+    บันทึกหุ้นสังเคราะห์เป็น <SYMBOL>.csv สำหรับ LocalFileProvider (--data-dir ของโหมด batch)
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    symbols = [f"SYN{i:04d}" for i in range(n_symbols)]
+    for i, symbol in enumerate(symbols):
+        synthetic_ohlcv(n_bars, seed=seed + i).to_csv(os.path.join(data_dir, f"{symbol}.csv"))
+    return symbols
+
+
+def measure(func, repeat=5):
+    """
+    จับเวลา func (หน่วยมิลลิวินาที) repeat ครั้ง แล้ววัดหน่วยความจำสูงสุดด้วย tracemalloc อีก 1 ครั้ง
+    (แยกรอบวัดหน่วยความจำเพราะ tracemalloc ทำให้โค้ดช้าลง)
+    """
+    func() # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "peak_kb": peak / 1024,
+        "repeat": repeat,
+    }
+
+
+def measure_startup(repeat=5, cases=None):
+    """
+    วัดเวลาเริ่มต้นใน process ใหม่ทุกครั้ง (ไม่มี cache ของ import) คืนค่า {"startup/<case>": ผลการวัด}
+    ผลลัพธ์ระบุโมดูลขนาดใหญ่ที่ถูก import ด้วย กรณี gui_window จะข้ามไปหากไม่มีหน้าจอ
+    """
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for case, code in (cases or STARTUP_CASES).items():
+        timings = []
+        run = None
+        for _ in range(repeat):
+            completed = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, code] + HEAVY_MODULES,
+                                       cwd=root_dir, capture_output=True, text=True)
+            if completed.returncode != 0:
+                run = None
+                break
+            run = json.loads(completed.stdout.strip().splitlines()[-1])
+            timings.append(run["ms"])
+        if run is None:
+            continue # เช่น ไม่มีหน้าจอสำหรับ Tk
+        results[f"startup/{case}"] = {
+            "median_ms": statistics.median(timings),
+            "min_ms": min(timings),
+            "max_ms": max(timings),
+            "peak_kb": run["peak_kb"],
+            "repeat": repeat,
+            "modules": run["modules"],
+        }
+    return results
+
+
+def _render_cases(hist, supports, resistances):
+    from chart_view import PriceChart
+
+    info = {"symbol": "SYN", "longName": "Synthetic"}
+
+    def create_figure():
+        chart = PriceChart()
+        chart.set_data(hist, supports, resistances, info)
+        return chart
+
+    def save_pdf():
+        chart = create_figure()
+        chart.figure.savefig(io.BytesIO(), format="pdf", bbox_inches="tight")
+
+    return {"create_figure": create_figure, "save_pdf": save_pdf}
+
+
+def run_benchmarks(sizes=None, symbol_counts=None, repeat=5, render=True, progress=None):
+    """
+    วัดเวลาและหน่วยความจำของ hot path ทุกตัว คืนค่า {"<case>/<size>": ผลการวัด}
+    """
+    sizes = sizes or list(SIZES)
+    symbol_counts = SYMBOL_COUNTS if symbol_counts is None else symbol_counts
+    results = {}
+
+    def record(name, func, case_repeat=repeat):
+        if progress:
+            progress(name)
+        results[name] = measure(func, case_repeat)
+
+    for size in sizes:
+        hist = synthetic_ohlcv(SIZES[size], seed=SIZES[size])
+        close = hist["Close"]
+        record(f"find_support_levels/{size}", lambda: find_support_levels(hist))
+        record(f"find_resistance_levels/{size}", lambda: find_resistance_levels(hist))
+        record(f"find_pivot_levels/{size}", lambda: find_levels(hist, "pivot"))
+        record(f"calculate_rsi/{size}", lambda: calculate_rsi(close))
+        if render:
+            supports = find_support_levels(hist)
+            resistances = find_resistance_levels(hist)
+            for case, func in _render_cases(hist, supports, resistances).items():
+                record(f"{case}/{size}", func, max(1, repeat // 2)) # การวาดกราฟช้า ลดจำนวนรอบลง
+
+    for count in symbol_counts:
+        for size in sizes:
+            prices = synthetic_close_matrix(count, SIZES[size], seed=count)
+            record(f"find_levels_matrix/{count}x{size}", lambda: find_levels_matrix(prices), max(1, repeat // 2))
+
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    เทียบผลกับ baseline คืนค่ารายการ (case, อัตราส่วนเวลา, อัตราส่วนหน่วยความจำ, regression หรือไม่)
+    """
+    rows = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        time_ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else float("inf")
+        memory_ratio = current["peak_kb"] / previous["peak_kb"] if previous["peak_kb"] else 1.0
+        regressed = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        rows.append((case, time_ratio, memory_ratio, regressed))
+    return rows
+
+
+def _environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="วัดประสิทธิภาพการคำนวณแนวรับ/แนวต้าน/RSI และการวาดกราฟด้วยข้อมูลสังเคราะห์")
+    parser.add_argument("-s", "--sizes", nargs="+", choices=list(SIZES), default=list(SIZES), help="ขนาดข้อมูลที่จะทดสอบ")
+    parser.add_argument("-n", "--symbols", nargs="*", type=int, default=SYMBOL_COUNTS, help="จำนวนหุ้นสำหรับ find_levels_matrix")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="จำนวนรอบที่จับเวลาต่อกรณี")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="ไฟล์ผลลัพธ์ JSON")
+    parser.add_argument("-b", "--baseline", help="ไฟล์ผลลัพธ์เดิมสำหรับเปรียบเทียบ")
+    parser.add_argument("-t", "--threshold", type=float, default=REGRESSION_THRESHOLD, help="สัดส่วนที่ช้าลงได้ก่อนถือว่า regression")
+    parser.add_argument("--no-render", action="store_true", help="ข้ามการวัดการสร้างกราฟและบันทึก PDF")
+    parser.add_argument("--startup", action="store_true", help="วัดเวลาเปิดโปรแกรม/import แทนการคำนวณ")
+    parser.add_argument("--write-data", metavar="DIR", help="บันทึกหุ้นสังเคราะห์เป็น CSV (ใช้กับ --data-dir) แล้วจบการทำงาน")
+    args = parser.parse_args(argv)
+
+    if args.write_data:
+        count = args.symbols[0] if args.symbols else SYMBOL_COUNTS[0]
+        symbols = write_dataset(args.write_data, count, SIZES[args.sizes[-1]])
+        print(f"บันทึกหุ้นสังเคราะห์ {len(symbols)} ตัวที่ {args.write_data}", file=sys.stderr)
+        return 0
+
+    if args.startup:
+        results = measure_startup(args.repeat)
+    else:
+        results = run_benchmarks(args.sizes, args.symbols, args.repeat, not args.no_render,
+                                 progress=lambda name: print(f"กำลังวัด {name}...", file=sys.stderr))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": _environment(), "results": results}, f, indent=2)
+
+    print(f"{'กรณี':<40} {'median (ms)':>12} {'peak (KB)':>12}")
+    for case, result in results.items():
+        modules = f"  [{', '.join(result['modules'])}]" if "modules" in result else ""
+        print(f"{case:<40} {result['median_ms']:>12.2f} {result['peak_kb']:>12.1f}{modules}")
+    print(f"บันทึกผลที่ {args.output}", file=sys.stderr)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    rows = compare(results, baseline, args.threshold)
+    print(f"\n{'กรณี':<40} {'เวลา':>8} {'หน่วยความจำ':>12}")
+    for case, time_ratio, memory_ratio, regressed in rows:
+        mark = "  ⚠ regression" if regressed else ""
+        print(f"{case:<40} {time_ratio:>7.2f}x {memory_ratio:>11.2f}x{mark}")
+    regressions = [row for row in rows if row[3]]
+    if regressions:
+        print(f"พบ regression {len(regressions)} กรณี (เกณฑ์ {args.threshold:.0%})", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
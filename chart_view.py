@@ -0,0 +1,337 @@
+import numpy as np
+import matplotlib
+import matplotlib.dates as mdates
+import matplotlib.style
+from matplotlib import rcParams
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+
+from downsample import aggregate_bars, minmax_indices
+from indicator_service import get_indicator_service
+
+SUPPORT_NAMES = ["แนวรับต่ำสุด", "แนวรับรอง", "แนวรับสูงสุด"]
+RESISTANCE_NAMES = ["แนวต้านต่ำสุด", "แนวต้านรอง", "แนวต้านสูงสุด"]
+BAR_WIDTH = 0.8 # ความกว้างแท่ง Volume (หน่วยวัน) เท่ากับค่าเริ่มต้นของ ax.bar
+MIN_BUCKETS = 200 # จำนวนช่วงขั้นต่ำเมื่อลดรายละเอียดข้อมูล
+_style_applied = False
+
+
+def apply_style():
+    """
+    ตั้งค่า style ของ matplotlib ครั้งแรกที่สร้างกราฟ (ไม่ทำตอน import เพื่อให้โปรแกรมเปิดเร็ว)
+    """
+    global _style_applied
+    if _style_applied:
+        return
+    matplotlib.style.use("seaborn-v0_8-whitegrid")
+    rcParams.update({
+        "font.family": "Tahoma",
+        "axes.facecolor": "#ffffff",
+        "figure.facecolor": "#ffffff",
+        "axes.edgecolor": "#e5e7eb",
+        "axes.labelcolor": "#111827",
+        "xtick.color": "#6b7280",
+        "ytick.color": "#6b7280",
+        "grid.color": "#e5e7eb",
+        "grid.alpha": 0.8,
+    })
+    _style_applied = True
+
+
+def to_date_numbers(index):
+    """
+    แปลง DatetimeIndex เป็นตัวเลขวันที่ของ matplotlib (ใช้เวลาท้องถิ่นของตลาด)
+    """
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return mdates.date2num(index.values)
+
+
+def volume_bar_verts(left, right, volume):
+    """
+    สร้างจุดมุมของแท่ง Volume ทุกแท่งในครั้งเดียว สำหรับใช้กับ PolyCollection เดียว
+    """
+    zeros = np.zeros_like(left)
+    return np.stack([
+        np.column_stack([left, zeros]),
+        np.column_stack([left, volume]),
+        np.column_stack([right, volume]),
+        np.column_stack([right, zeros]),
+    ], axis=1)
+
+
+class PriceChart:
+    """
+    กราฟราคา, RSI และ Volume ที่สร้างแกนและเส้นเพียงครั้งเดียว
+    แล้วเปลี่ยนเฉพาะข้อมูลของเส้นเดิมเมื่อเปลี่ยนหุ้น (ไม่สร้าง Figure ใหม่)
+    blit=True ใช้กับกราฟบนหน้าจอ: เส้นแนวรับ/แนวต้านจะวาดทับพื้นหลังที่เก็บไว้ได้โดยไม่ต้องวาดใหม่ทั้งหมด
+    ข้อมูลที่ยาวเกินความกว้างของกราฟ (เป็นพิกเซล) จะถูกลดรายละเอียดตามช่วงที่มองเห็น
+    และกลับมาใช้ข้อมูลเต็มเมื่อซูมเข้าจนจำนวนแท่งน้อยกว่าจำนวนพิกเซล
+    """
+
+    def __init__(self, figure=None, blit=False):
+        apply_style()
+        self.figure = figure or Figure(figsize=(10, 7), dpi=100, facecolor="white")
+        self.blit = blit
+        self._background = None
+        self._series = None # ข้อมูลความละเอียดเต็มของหุ้นที่แสดงอยู่
+
+        # สร้าง subplot 3 แถว โดยแถวบนสุด (ราคา) มีขนาดใหญ่กว่า
+        gs = self.figure.add_gridspec(3, 1, height_ratios=[3, 1, 1], hspace=0) # hspace=0 เพื่อให้กราฟติดกัน
+        self.ax_price = self.figure.add_subplot(gs[0, 0])
+        self.ax_rsi = self.figure.add_subplot(gs[1, 0], sharex=self.ax_price) # แชร์แกน X กับ ax_price
+        self.ax_volume = self.figure.add_subplot(gs[2, 0], sharex=self.ax_price) # แชร์แกน X กับ ax_price
+        for ax in (self.ax_price, self.ax_rsi, self.ax_volume):
+            ax.xaxis_date()
+
+        # เส้นราคาปิดและเส้นค่าเฉลี่ยเคลื่อนที่
+        self.close_line, = self.ax_price.plot([], [], label="ราคาปิด", color="#0077cc")
+        self.ma50_line, = self.ax_price.plot([], [], label="MA 50", color="orange")
+        self.ma200_line, = self.ax_price.plot([], [], label="MA 200", color="green")
+
+        # เส้นแนวรับ/แนวต้าน (สร้างไว้ 3 เส้นและซ่อนเส้นที่ไม่ได้ใช้)
+        self.support_lines = [self._level_line("red") for _ in SUPPORT_NAMES]
+        self.resistance_lines = [self._level_line("purple") for _ in RESISTANCE_NAMES]
+
+        self.ax_price.set_ylabel("ราคา (USD)")
+        self.ax_price.grid(True)
+        self.ax_price.tick_params(labelbottom=False) # ซ่อน label แกน X เพื่อความเรียบร้อย
+
+        # กราฟ RSI
+        self.rsi_line, = self.ax_rsi.plot([], [], label="RSI (14)", color="blue")
+        self.ax_rsi.axhline(70, color='red', linestyle=':', linewidth=0.8, label='Overbought (70)')
+        self.ax_rsi.axhline(30, color='green', linestyle=':', linewidth=0.8, label='Oversold (30)')
+        self.ax_rsi.set_ylabel("RSI")
+        self.ax_rsi.set_ylim(0, 100) # กำหนดช่วง RSI
+        self.ax_rsi.legend(loc="upper left", fontsize=8)
+        self.ax_rsi.grid(True)
+        self.ax_rsi.tick_params(labelbottom=False)
+
+        # กราฟ Volume: ใช้ PolyCollection เดียวแทน Rectangle ทีละแท่ง
+        self.volume_bars = PolyCollection([], facecolors="gray", edgecolors="none", alpha=0.7, label="ปริมาณการซื้อขาย")
+        self.ax_volume.add_collection(self.volume_bars)
+        self.ax_volume.set_ylabel("Volume")
+        self.ax_volume.set_xlabel("วันที่")
+        self.ax_volume.ticklabel_format(style='plain', axis='y') # แสดงเลขแบบปกติ
+        self.ax_volume.legend(loc="upper left", fontsize=8)
+        self.ax_volume.grid(True)
+
+        # เมื่อซูม/เลื่อนด้วย toolbar หรือเปลี่ยนขนาดหน้าต่าง ให้เลือกความละเอียดข้อมูลใหม่
+        self.ax_price.callbacks.connect("xlim_changed", lambda ax: self._refresh_view())
+        self.figure.canvas.mpl_connect("resize_event", lambda event: self._refresh_view())
+        if self.blit:
+            self.figure.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _level_line(self, color):
+        line = self.ax_price.axhline(0, color=color, linestyle="--", linewidth=1, visible=False, animated=self.blit)
+        return line
+
+    def set_data(self, hist, supports, resistances, info, symbol=None):
+        """
+        เปลี่ยนข้อมูลของกราฟทั้งหมดเป็นหุ้นตัวใหม่
+        ระบุ symbol เพื่อใช้ผลตัวชี้วัดที่คำนวณไว้แล้วใน IndicatorService (เช่น แสดงกราฟแล้วบันทึก PDF)
+        """
+        x = to_date_numbers(hist.index)
+        close = hist['Close'].to_numpy() # คงชนิดข้อมูลเดิม (view ของ HistoryStore ไม่ต้องคัดลอก)
+        indicators = get_indicator_service().chart_indicators(symbol, hist)
+        # Moving Average 200 วัน (แสดงเมื่อมีข้อมูลพอ)
+        has_ma200 = indicators["ma200"] is not None
+        self.ma200_line.set_visible(has_ma200)
+        self.ma200_line.set_label("MA 200" if has_ma200 else "_nolegend_") # ไม่แสดงใน legend เมื่อข้อมูลไม่ถึง 200 แท่ง
+        volume = hist['Volume'].to_numpy(dtype=np.float64)
+
+        self._series = {
+            "x": x,
+            "close": close,
+            "ma50": indicators["ma50"],
+            "ma200": indicators["ma200"],
+            "rsi": indicators["rsi"],
+            "volume": volume,
+        }
+
+        self._set_level_lines(supports, resistances)
+        self.ax_price.set_title(f"กราฟราคา {info.get('longName', info.get('symbol', 'N/A'))} และตัวชี้วัด", loc='left')
+
+        # ปรับช่วงแกนตามข้อมูลใหม่ (set_xlim จะเรียก _refresh_view ผ่าน xlim_changed เพื่อใส่ข้อมูลลงเส้น)
+        if len(x):
+            self.ax_price.set_xlim(x[0] - BAR_WIDTH, x[-1] + BAR_WIDTH)
+            self.ax_volume.set_ylim(0, max(np.nanmax(volume), 1) * 1.05)
+        self.ax_price.relim(visible_only=True)
+        self.ax_price.autoscale_view(scalex=False)
+
+        self.figure.tight_layout(rect=[0, 0, 1, 0.96]) # ปรับ layout ให้สวยงาม
+
+    def _refresh_view(self):
+        """
+        ใส่ข้อมูลของช่วงที่มองเห็นลงในเส้นและแท่ง Volume โดยลดรายละเอียดให้เหลือประมาณ 2 จุดต่อพิกเซล
+        """
+        series = self._series
+        if series is None or not len(series["x"]):
+            return
+        x = series["x"]
+        x_min, x_max = self.ax_price.get_xlim()
+        # เผื่อ 1 แท่งทั้งสองข้างเพื่อให้เส้นต่อถึงขอบกราฟ
+        first = max(int(np.searchsorted(x, x_min, side="left")) - 1, 0)
+        last = min(int(np.searchsorted(x, x_max, side="right")) + 1, len(x))
+        if last <= first:
+            first, last = 0, len(x)
+        n_buckets = max(int(self.ax_price.bbox.width), MIN_BUCKETS)
+        visible = slice(first, last)
+        x_visible = x[visible]
+
+        # ใช้ตำแหน่ง min/max ของราคาปิดร่วมกันทุกเส้น เพื่อให้เส้นในแกนเดียวกันใช้จุดเวลาเดียวกัน
+        indices = minmax_indices(series["close"][visible], n_buckets)
+        self.close_line.set_data(x_visible[indices], series["close"][visible][indices])
+        self.ma50_line.set_data(x_visible[indices], series["ma50"][visible][indices])
+        if series["ma200"] is not None:
+            self.ma200_line.set_data(x_visible[indices], series["ma200"][visible][indices])
+        else:
+            self.ma200_line.set_data([], [])
+        rsi_indices = minmax_indices(series["rsi"][visible], n_buckets)
+        self.rsi_line.set_data(x_visible[rsi_indices], series["rsi"][visible][rsi_indices])
+
+        left, right, heights = aggregate_bars(x_visible, series["volume"][visible], n_buckets, BAR_WIDTH)
+        self.volume_bars.set_verts(volume_bar_verts(left, right, heights))
+
+    def _set_level_lines(self, supports, resistances):
+        for lines, names, levels in ((self.support_lines, SUPPORT_NAMES, supports),
+                                     (self.resistance_lines, RESISTANCE_NAMES, resistances)):
+            for i, line in enumerate(lines):
+                visible = i < len(levels)
+                line.set_visible(visible)
+                if visible:
+                    line.set_ydata([levels[i], levels[i]])
+                    line.set_label(f"{names[i]} ({levels[i]:.2f})")
+                else:
+                    line.set_label("_hidden")
+        legend = self.ax_price.legend(loc="upper left", fontsize=8)
+        legend.set_animated(self.blit) # ชื่อในคำอธิบายเปลี่ยนตามระดับราคา จึงวาดทับพร้อมเส้นแนวรับ/แนวต้าน
+
+    def set_levels(self, supports, resistances):
+        """
+        อัปเดตเฉพาะเส้นแนวรับ/แนวต้าน ถ้าเปิด blit จะวาดเฉพาะเส้นที่เปลี่ยนทับพื้นหลังเดิม
+        """
+        self._set_level_lines(supports, resistances)
+        canvas = self.figure.canvas
+        if self.blit and self._background is not None and getattr(canvas, "supports_blit", False):
+            canvas.restore_region(self._background)
+            self._draw_animated()
+            canvas.blit(self.figure.bbox)
+        else:
+            canvas.draw_idle()
+
+    def _draw_animated(self):
+        for line in self.support_lines + self.resistance_lines:
+            if line.get_visible():
+                self.ax_price.draw_artist(line)
+        self.ax_price.draw_artist(self.ax_price.get_legend())
+
+    def _on_draw(self, event):
+        """
+        เก็บพื้นหลัง (ทุกอย่างยกเว้นเส้นแนวรับ/แนวต้านและคำอธิบายกราฟ) หลังวาดเต็มรูปแบบ แล้ววาดส่วนนั้นทับ
+        ไม่ทำระหว่าง savefig: canvas ของไฟล์ (PDF/SVG) blit ไม่ได้ และ matplotlib วาดเส้น animated ลงไฟล์ให้อยู่แล้ว
+        """
+        canvas = self.figure.canvas
+        if canvas.is_saving() or not getattr(canvas, "supports_blit", False):
+            return
+        self._background = canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_animated()
+
+
+class ComparisonChart:
+    """
+    กราฟเปรียบเทียบหลายหุ้น: เส้นราคาที่ normalize ให้เริ่มที่ 100, ความแข็งแกร่งเทียบหุ้นอ้างอิง
+    และ correlation matrix ของผลตอบแทนรายวัน ข้อมูลทุกหุ้นมาจาก array เดียวที่จัดวันที่ไว้แล้ว (comparison.compare)
+    """
+
+    def __init__(self, figure=None):
+        apply_style()
+        self.figure = figure or Figure(figsize=(12, 7), dpi=100, facecolor="white")
+        self._data = None
+        self._x = None
+        self.lines = []
+        self.relative_lines = []
+        self.corr_image = None
+        self.colorbar = None
+
+        gs = self.figure.add_gridspec(2, 2, height_ratios=[3, 2], width_ratios=[3, 2], hspace=0, wspace=0.25)
+        self.ax_norm = self.figure.add_subplot(gs[0, 0])
+        self.ax_relative = self.figure.add_subplot(gs[1, 0], sharex=self.ax_norm)
+        self.ax_corr = self.figure.add_subplot(gs[:, 1])
+        for ax in (self.ax_norm, self.ax_relative):
+            ax.xaxis_date()
+            ax.grid(True)
+        self.ax_norm.set_ylabel("ราคา (เริ่มที่ 100)")
+        self.ax_norm.axhline(100, color="#9ca3af", linestyle=":", linewidth=0.8)
+        self.ax_norm.tick_params(labelbottom=False)
+        self.ax_relative.set_xlabel("วันที่")
+
+        self.ax_norm.callbacks.connect("xlim_changed", lambda ax: self._refresh_view())
+        self.figure.canvas.mpl_connect("resize_event", lambda event: self._refresh_view())
+
+    def set_data(self, data):
+        """
+        แสดงผลของ comparison.compare (สร้างเส้นใหม่ตามจำนวนหุ้น)
+        """
+        for line in self.lines + self.relative_lines:
+            line.remove()
+        self._data = data
+        self._x = data["days"].astype(np.float64) # จำนวนวันนับจาก 1970-01-01 = ตัวเลขวันที่ของ matplotlib
+        colors = matplotlib.colormaps["tab20"].colors
+        symbols = data["symbols"]
+        self.lines = [self.ax_norm.plot([], [], color=colors[i % len(colors)], linewidth=1.2,
+                                        label=f"{symbol} ({data['returns'][i]:+.1f}%)")[0]
+                      for i, symbol in enumerate(symbols)]
+        self.relative_lines = [self.ax_relative.plot([], [], color=colors[i % len(colors)], linewidth=1)[0]
+                               for i, _ in enumerate(symbols)]
+        self.ax_norm.legend(loc="upper left", fontsize=8, ncol=2 if len(symbols) > 10 else 1)
+        self.ax_norm.set_title(f"เปรียบเทียบ {len(symbols)} หุ้น", loc="left")
+        self.ax_relative.set_ylabel(f"เทียบกับ {data['benchmark']}" if data["benchmark"] else "")
+
+        self._draw_correlation(symbols, data["correlation"])
+        if len(self._x):
+            self.ax_norm.set_xlim(self._x[0], self._x[-1])
+            for ax, values in ((self.ax_norm, data["normalized"]), (self.ax_relative, data["relative"])):
+                low, high = np.nanmin(values), np.nanmax(values)
+                if np.isfinite(low) and np.isfinite(high):
+                    margin = (high - low) * 0.05 or 1
+                    ax.set_ylim(low - margin, high + margin)
+        self.figure.tight_layout()
+
+    def _draw_correlation(self, symbols, correlation):
+        ax = self.ax_corr
+        ax.clear()
+        ax.set_title("Correlation (ผลตอบแทนรายวัน)", loc="left")
+        if not len(symbols):
+            return
+        self.corr_image = ax.imshow(correlation, cmap="RdYlGn", vmin=-1, vmax=1)
+        ax.set_xticks(range(len(symbols)), symbols, rotation=90, fontsize=8)
+        ax.set_yticks(range(len(symbols)), symbols, fontsize=8)
+        ax.grid(False)
+        if len(symbols) <= 12: # ตัวเลขในช่องอ่านไม่ออกเมื่อหุ้นมาก
+            for i in range(len(symbols)):
+                for j in range(len(symbols)):
+                    ax.text(j, i, f"{correlation[i, j]:.2f}", ha="center", va="center", fontsize=7)
+        if self.colorbar is None:
+            self.colorbar = self.figure.colorbar(self.corr_image, ax=ax, fraction=0.046, pad=0.04)
+        else:
+            self.colorbar.update_normal(self.corr_image)
+
+    def _refresh_view(self):
+        """
+        ใส่ข้อมูลของช่วงที่มองเห็นลงในทุกเส้น โดยลดรายละเอียดเหลือประมาณ 2 จุดต่อพิกเซลต่อเส้น
+        """
+        if self._data is None or not len(self._x):
+            return
+        x = self._x
+        x_min, x_max = self.ax_norm.get_xlim()
+        first = max(int(np.searchsorted(x, x_min, side="left")) - 1, 0)
+        last = min(int(np.searchsorted(x, x_max, side="right")) + 1, len(x))
+        if last <= first:
+            first, last = 0, len(x)
+        n_buckets = max(int(self.ax_norm.bbox.width), MIN_BUCKETS)
+        x_visible = x[first:last]
+        for lines, values in ((self.lines, self._data["normalized"]), (self.relative_lines, self._data["relative"])):
+            for line, row in zip(lines, values[:, first:last]):
+                indices = minmax_indices(row, n_buckets)
+                line.set_data(x_visible[indices], row[indices])
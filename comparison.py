@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from history_store import load_history
+
+FETCH_WORKERS = 8 # จำนวน thread ที่ดึงประวัติราคาพร้อมกัน (งานส่วนใหญ่รอเครือข่าย/ดิสก์)
+BASE = 100.0 # ค่าเริ่มต้นของเส้นที่ normalize แล้ว
+
+
+def fetch_histories(symbols, period, workers=FETCH_WORKERS, progress=None):
+    """
+    ดึงประวัติราคาหลายหุ้นพร้อมกันผ่าน HistoryStore (load_history) คืนค่า ({symbol: CompactHistory}, {symbol: error})
+    """
+    histories = {}
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(symbols)))) as executor:
+        futures = {symbol: executor.submit(load_history, symbol, period) for symbol in symbols}
+        for done, (symbol, future) in enumerate(futures.items(), start=1):
+            try:
+                histories[symbol] = future.result()
+            except Exception as e:
+                errors[symbol] = str(e)
+            if progress:
+                progress(done, len(symbols), symbol)
+    return histories, errors
+
+
+def align_closes(histories):
+    """
+    จัดราคาปิดของทุกหุ้นลงบนวันที่ชุดเดียวกัน (รวมวันที่ของทุกหุ้น) เป็น array (จำนวนหุ้น x จำนวนวัน)
+    วันที่หุ้นไม่มีการซื้อขายใช้ราคาปิดก่อนหน้า ช่วงก่อนมีข้อมูลเป็น NaN คืนค่า (days, prices)
+    """
+    compacts = list(histories.values())
+    if not compacts:
+        return np.empty(0, dtype=np.int32), np.empty((0, 0))
+    days = np.unique(np.concatenate([compact.days for compact in compacts]))
+    prices = np.full((len(compacts), len(days)), np.nan)
+    for row, compact in enumerate(compacts):
+        prices[row, np.searchsorted(days, compact.days)] = compact.column("Close")
+    return days, forward_fill(prices)
+
+
+def forward_fill(prices):
+    """
+    เติม NaN ด้วยค่าก่อนหน้าในแถวเดียวกัน (ทุกแถวพร้อมกัน) NaN ด้านหน้าแถวยังคงเป็น NaN
+    """
+    positions = np.where(np.isnan(prices), 0, np.arange(prices.shape[1]))
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    return prices[np.arange(prices.shape[0])[:, np.newaxis], positions]
+
+
+def common_start(prices):
+    """
+    คอลัมน์แรกที่ทุกหุ้นมีราคาแล้ว (จุดเริ่มร่วมสำหรับ normalize)
+    """
+    valid = ~np.isnan(prices)
+    if not valid.any(axis=1).all():
+        return prices.shape[1]
+    return int(valid.argmax(axis=1).max())
+
+
+def normalize(prices, base=BASE):
+    """
+    ปรับทุกแถวให้เริ่มที่ base ณ คอลัมน์แรก
+    """
+    return prices / prices[:, :1] * base
+
+
+def relative_strength(normalized, benchmark=0, base=BASE):
+    """
+    ความแข็งแกร่งเทียบกับหุ้นอ้างอิง (แถว benchmark): มากกว่า base แปลว่าทำผลงานดีกว่าตั้งแต่จุดเริ่ม
+    """
+    return normalized / normalized[benchmark] * base
+
+
+def correlation_matrix(prices):
+    """
+    สหสัมพันธ์ของผลตอบแทนรายวัน (log return) ระหว่างทุกคู่หุ้น
+    """
+    if prices.shape[1] < 3:
+        return np.full((len(prices), len(prices)), np.nan)
+    returns = np.diff(np.log(prices), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.atleast_2d(np.corrcoef(returns))
+
+
+def compare(symbols, period="1y", benchmark=None, workers=FETCH_WORKERS, progress=None):
+    """
+    ดึงข้อมูลหุ้นหลายตัวพร้อมกัน จัดลงวันที่ชุดเดียวกัน แล้วคำนวณเส้น normalize, ความแข็งแกร่งเทียบหุ้นอ้างอิง
+    (ค่าเริ่มต้น: หุ้นตัวแรก) และ correlation matrix คืนค่าเป็น dict
+    """
+    symbols = list(dict.fromkeys(symbols))
+    histories, errors = fetch_histories(symbols, period, workers, progress)
+    symbols = [symbol for symbol in symbols if symbol in histories]
+    days, prices = align_closes({symbol: histories[symbol] for symbol in symbols})
+
+    start = common_start(prices) if symbols else 0
+    days, prices = days[start:], prices[:, start:]
+    benchmark_row = symbols.index(benchmark) if benchmark in symbols else 0
+    normalized = normalize(prices) if prices.shape[1] else prices
+    relative = relative_strength(normalized, benchmark_row) if prices.shape[1] else prices
+    return {
+        "symbols": symbols,
+        "benchmark": symbols[benchmark_row] if symbols else None,
+        "days": days,
+        "prices": prices,
+        "normalized": normalized,
+        "relative": relative,
+        "correlation": correlation_matrix(prices),
+        "returns": normalized[:, -1] - BASE if prices.shape[1] else np.full(len(symbols), np.nan), # % ตลอดช่วง
+        "errors": errors,
+    }
@@ -0,0 +1,131 @@
+import socket
+import threading
+import time
+
+PROBE_ADDRESS = ("8.8.8.8", 53)
+PROBE_TIMEOUT = 2 # วินาที
+PROBE_INTERVAL = 60 # วินาที: ตรวจสอบเองเฉพาะเมื่อไม่มีการดึงข้อมูลจริงในช่วงนี้
+RETRY_INTERVAL = 10 # วินาที: ระหว่างออฟไลน์ ตรวจสอบถี่ขึ้นเพื่อกลับมาออนไลน์เร็ว
+FAILURE_THRESHOLD = 2 # จำนวนครั้งที่ดึงข้อมูลล้มเหลวติดกันก่อนถือว่าออฟไลน์
+
+
+class ConnectivityMonitor:
+    """
+    ติดตามสถานะการเชื่อมต่อเบื้องหลัง โดยดูจากผลการดึงข้อมูลจริงเป็นหลัก (record_success/record_failure)
+    และตรวจสอบด้วย socket เป็นครั้งคราวเมื่อไม่มีการใช้งานเครือข่าย ไม่บล็อกผู้เรียก
+    """
+
+    def __init__(self, probe_address=PROBE_ADDRESS, probe_timeout=PROBE_TIMEOUT, probe_interval=PROBE_INTERVAL,
+                 retry_interval=RETRY_INTERVAL, failure_threshold=FAILURE_THRESHOLD):
+        self.probe_address = probe_address
+        self.probe_timeout = probe_timeout
+        self.probe_interval = probe_interval
+        self.retry_interval = retry_interval
+        self.failure_threshold = failure_threshold
+        self.online = True # ถือว่าออนไลน์ไว้ก่อนจนกว่าจะพบหลักฐานว่าไม่ใช่
+        self.last_success = None
+        self.last_activity = 0.0
+        self._failures = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """
+        ลงทะเบียน callback(online) ที่จะถูกเรียกเมื่อสถานะเปลี่ยน (เรียกจาก thread ที่พบการเปลี่ยนแปลง)
+        """
+        self._listeners.append(callback)
+
+    def record_success(self):
+        with self._lock:
+            self.last_success = time.time()
+            self.last_activity = time.monotonic()
+            self._failures = 0
+        self._set_online(True)
+
+    def record_failure(self, definitive=False):
+        """
+        บันทึกการดึงข้อมูลที่ล้มเหลวจากปัญหาเครือข่าย (definitive=True สำหรับผลจากการ probe)
+        """
+        with self._lock:
+            self.last_activity = time.monotonic()
+            self._failures += 1
+            offline = definitive or self._failures >= self.failure_threshold
+        if offline:
+            self._set_online(False)
+
+    def _set_online(self, online):
+        with self._lock:
+            changed = online != self.online
+            self.online = online
+        if changed:
+            for callback in list(self._listeners):
+                callback(online)
+
+    def probe(self):
+        """
+        ตรวจสอบการเชื่อมต่อด้วย socket หนึ่งครั้ง คืนค่า True หากเชื่อมต่อได้
+        """
+        try:
+            socket.create_connection(self.probe_address, timeout=self.probe_timeout).close()
+        except OSError:
+            self.record_failure(definitive=True)
+            return False
+        self.record_success()
+        return True
+
+    def start(self):
+        """
+        เริ่ม thread ตรวจสอบเบื้องหลัง (เรียกซ้ำได้)
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def _run(self):
+        self.probe() # ตรวจสอบครั้งแรกทันทีเพื่อให้สถานะบนหน้าจอถูกต้อง
+        while not self._stop.wait(self.probe_interval if self.online else self.retry_interval):
+            idle = time.monotonic() - self.last_activity
+            if not self.online or idle >= self.probe_interval:
+                self.probe()
+
+
+_connectivity = None
+_offline_mode = False
+
+
+def get_connectivity_monitor():
+    """
+    คืนค่าตัวติดตามสถานะการเชื่อมต่อที่ใช้ร่วมกันทั้งโปรเซส
+    """
+    global _connectivity
+    if _connectivity is None:
+        _connectivity = ConnectivityMonitor()
+    return _connectivity
+
+
+def set_offline_mode(enabled):
+    """
+    เปิด/ปิดโหมดออฟไลน์: ใช้เฉพาะข้อมูลในแคชบนเครื่อง ไม่ใช้เครือข่าย
+    """
+    global _offline_mode
+    _offline_mode = enabled
+
+
+def is_offline():
+    """
+    True เมื่อผู้ใช้เปิดโหมดออฟไลน์ หรือตัวติดตามการเชื่อมต่อ (ที่เริ่มทำงานแล้ว) พบว่าไม่มีการเชื่อมต่อ
+    """
+    monitor = get_connectivity_monitor()
+    return _offline_mode or (monitor.running and not monitor.online)
@@ -0,0 +1,289 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from history_cache import COLUMNS, period_start
+from instrumentation import span
+
+
+class ProviderPolicy:
+    """
+    ค่าตั้งที่ใช้ร่วมกันของผู้ให้บริการข้อมูล: ขนาด connection pool, จำนวนคำขอพร้อมกันสูงสุด,
+    การลองใหม่แบบ exponential backoff และจำนวนคำขอต่อวินาที (None = ไม่จำกัด)
+    """
+
+    def __init__(self, pool_size=10, max_concurrency=4, retries=3, backoff=0.5, max_backoff=8.0,
+                 rate_limit=None, retry_on=(OSError, ConnectionError, TimeoutError)):
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff # วินาที: รอก่อนลองใหม่ครั้งแรก แล้วเพิ่มเป็นสองเท่าทุกครั้ง
+        self.max_backoff = max_backoff
+        self.rate_limit = rate_limit
+        self.retry_on = retry_on
+
+    def delay(self, attempt):
+        return min(self.backoff * (2 ** attempt), self.max_backoff)
+
+
+class _Flight:
+    """
+    คำขอที่กำลังดึงข้อมูลอยู่ ผู้ที่ขอข้อมูลเดียวกันระหว่างนี้จะรอผลจากคำขอนี้แทนการดึงซ้ำ
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class DataProvider:
+    """
+    ส่วนกลางของผู้ให้บริการข้อมูลราคาและข้อมูลบริษัท
+    คลาสลูกเขียนเฉพาะ _fetch_history / _fetch_info / _fetch_quote ส่วนการรวมคำขอซ้ำ,
+    จำกัดจำนวนคำขอพร้อมกัน, จำกัดอัตรา และลองใหม่ อยู่ที่คลาสนี้
+    """
+
+    cacheable = True # ข้อมูลมาจากเครือข่าย ควรผ่านแคชบนดิสก์ก่อน
+
+    def __init__(self, policy=None, monitor=None):
+        self.policy = policy or ProviderPolicy()
+        self.monitor = monitor # ConnectivityMonitor ที่รับผลการดึงข้อมูลจริง (ไม่บังคับ)
+        self._semaphore = threading.BoundedSemaphore(self.policy.max_concurrency)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._next_request_at = 0.0
+
+    def history(self, symbol, period=None, start=None):
+        """
+        ดึงประวัติราคา OHLCV ตามช่วงเวลา (period) หรือตั้งแต่วันที่ start คืนค่า DataFrame ว่างหากไม่มีข้อมูล
+        """
+        return self._call(("history", symbol, period, str(start)), self._fetch_history, symbol, period, start)
+
+    def info(self, symbol):
+        """
+        ดึงข้อมูลบริษัททั้งหมด (รูปแบบเดียวกับ ticker.info)
+        """
+        return self._call(("info", symbol), self._fetch_info, symbol)
+
+    def quote(self, symbol):
+        """
+        ดึงเฉพาะข้อมูลที่เปลี่ยนเร็ว (regularMarketPrice, marketCap)
+        """
+        return self._call(("quote", symbol), self._fetch_quote, symbol)
+
+    def history_many(self, symbols, period=None, start=None):
+        """
+        ดึงประวัติราคาหลายตัวพร้อมกันภายใต้ขีดจำกัดของ policy คืนค่า {symbol: DataFrame}
+        หุ้นที่ดึงไม่สำเร็จจะได้ DataFrame ว่าง
+        """
+        def fetch(symbol):
+            try:
+                return self.history(symbol, period, start)
+            except Exception:
+                return pd.DataFrame(columns=COLUMNS)
+
+        with ThreadPoolExecutor(max_workers=self.policy.max_concurrency) as executor:
+            return dict(zip(symbols, executor.map(fetch, symbols)))
+
+    def _fetch_history(self, symbol, period, start):
+        raise NotImplementedError
+
+    def _fetch_info(self, symbol):
+        raise NotImplementedError
+
+    def _fetch_quote(self, symbol):
+        info = self._fetch_info(symbol)
+        return {"regularMarketPrice": info.get("regularMarketPrice"), "marketCap": info.get("marketCap")}
+
+    def _call(self, key, func, *args):
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            with span(f"provider.{key[0]}", symbol=key[1]):
+                flight.result = self._run_with_policy(func, *args)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.result
+
+    def _run_with_policy(self, func, *args):
+        attempt = 0
+        while True:
+            with self._semaphore:
+                self._wait_for_rate_limit()
+                try:
+                    result = func(*args)
+                except self.policy.retry_on:
+                    if attempt >= self.policy.retries:
+                        if self.monitor:
+                            self.monitor.record_failure()
+                        raise
+                else:
+                    if self.monitor:
+                        self.monitor.record_success()
+                    return result
+            time.sleep(self.policy.delay(attempt)) # รอนอก semaphore เพื่อไม่กันคำขออื่น
+            attempt += 1
+
+    def _wait_for_rate_limit(self):
+        if not self.policy.rate_limit:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + 1.0 / self.policy.rate_limit
+        if wait > 0:
+            time.sleep(wait)
+
+
+class YFinanceProvider(DataProvider):
+    """
+    ดึงข้อมูลจาก Yahoo Finance ผ่าน yfinance โดยใช้ requests.Session เดียวที่มี connection pool ร่วมกัน
+    """
+
+    def __init__(self, policy=None, monitor=None):
+        super().__init__(policy, monitor)
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.policy.pool_size, pool_maxsize=self.policy.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def _ticker(self, symbol):
+        import yfinance as yf
+        return yf.Ticker(symbol, session=self.session)
+
+    def _fetch_history(self, symbol, period, start):
+        if start is not None:
+            return self._ticker(symbol).history(start=start)
+        return self._ticker(symbol).history(period=period)
+
+    def _fetch_info(self, symbol):
+        return self._ticker(symbol).info
+
+    def history_many(self, symbols, period=None, start=None):
+        """
+        ดึงประวัติราคาหลายตัวด้วย yf.download ครั้งเดียว แทนการเรียก history ทีละตัว
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        return self._call(("history_many", tuple(symbols), period, str(start)),
+                          self._fetch_history_many, symbols, period, start)
+
+    def _fetch_history_many(self, symbols, period, start):
+        import yfinance as yf
+
+        options = {"start": start} if start is not None else {"period": period}
+        # auto_adjust=True และ ignore_tz=False ให้ผลเหมือน ticker.history()
+        data = yf.download(symbols, group_by="ticker", auto_adjust=True, ignore_tz=False, progress=False,
+                           threads=self.policy.max_concurrency, session=self.session, **options)
+        histories = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                hist = data[symbol] if symbol in data.columns.get_level_values(0) else pd.DataFrame(columns=COLUMNS)
+            else:
+                hist = data # ดึงหุ้นตัวเดียว ได้คอลัมน์ชั้นเดียว
+            # หุ้นแต่ละตัวมีวันทำการต่างกัน แถวที่เป็น NaN ทั้งหมดคือวันที่ไม่มีข้อมูลของหุ้นนั้น
+            histories[symbol] = hist[[column for column in COLUMNS if column in hist.columns]].dropna(how="all")
+        return histories
+
+    def _fetch_quote(self, symbol):
+        # fast_info เร็วกว่า info มาก ใช้สำหรับรีเฟรชเฉพาะราคาและมูลค่าตลาด
+        fast_info = self._ticker(symbol).fast_info
+        return {"regularMarketPrice": fast_info.last_price, "marketCap": fast_info.market_cap}
+
+
+class LocalFileProvider(DataProvider):
+    """
+    อ่านข้อมูลจากโฟลเดอร์บนเครื่อง: <SYMBOL>.parquet หรือ <SYMBOL>.csv สำหรับประวัติราคา
+    และ <SYMBOL>.json (ไม่บังคับ) สำหรับข้อมูลบริษัท ใช้ทดสอบ/benchmark แบบไม่ต้องใช้เครือข่าย
+    """
+
+    cacheable = False # อ่านจากดิสก์อยู่แล้ว ไม่ต้องผ่านแคช
+
+    def __init__(self, data_dir, tz="America/New_York", policy=None):
+        super().__init__(policy or ProviderPolicy(max_concurrency=os.cpu_count() or 1, retries=0))
+        self.data_dir = data_dir
+        self.tz = tz # เขตเวลาของตลาด ใช้เมื่อไฟล์ไม่มีข้อมูลเขตเวลา
+        self._frames = {}
+
+    def _path(self, symbol, extension):
+        return os.path.join(self.data_dir, f"{symbol.upper().replace('/', '_')}.{extension}")
+
+    def _load_frame(self, symbol):
+        path = self._path(symbol, "parquet")
+        if os.path.exists(path):
+            hist = pd.read_parquet(path)
+        else:
+            path = self._path(symbol, "csv")
+            if not os.path.exists(path):
+                return None
+            hist = pd.read_csv(path, index_col=0)
+            hist.index = pd.to_datetime(hist.index, utc=True)
+
+        hist.columns = [str(column).capitalize() for column in hist.columns]
+        hist = hist[[column for column in COLUMNS if column in hist.columns]]
+        index = pd.DatetimeIndex(hist.index)
+        index = index.tz_convert(self.tz) if index.tz is not None else index.tz_localize(self.tz)
+        hist.index = index.rename("Date")
+        return hist.sort_index()
+
+    def _frame(self, symbol):
+        key = symbol.upper()
+        if key not in self._frames:
+            self._frames[key] = self._load_frame(symbol)
+        return self._frames[key]
+
+    def _fetch_history(self, symbol, period, start):
+        hist = self._frame(symbol)
+        if hist is None or hist.empty:
+            return pd.DataFrame(columns=COLUMNS)
+        if start is not None:
+            first = pd.Timestamp(start)
+            first = first.tz_convert(self.tz) if first.tz is not None else first.tz_localize(self.tz)
+        else:
+            first = period_start(period or "max", hist.index[-1])
+        return hist.copy() if first is None else hist[hist.index >= first].copy()
+
+    def _fetch_info(self, symbol):
+        try:
+            with open(self._path(symbol, "json"), "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except FileNotFoundError:
+            info = {"symbol": symbol.upper(), "longName": symbol.upper()}
+        if info.get("regularMarketPrice") is None:
+            # ไม่มีราคาในไฟล์ ใช้ราคาปิดล่าสุดของประวัติราคาแทน
+            hist = self._frame(symbol)
+            if hist is None or hist.empty:
+                return {}
+            info["regularMarketPrice"] = float(hist["Close"].iloc[-1])
+        return info
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def minmax_indices(y, n_buckets):
+    """
+    แบ่งข้อมูลเป็น n_buckets ช่วงเท่าๆ กัน แล้วเลือกตำแหน่งค่าต่ำสุดและสูงสุดของแต่ละช่วง
+    (รักษายอด/ก้นของกราฟไว้ครบ) คืนค่าตำแหน่งที่เลือกเรียงตามเวลา
+    """
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+
+    size = -(-n // n_buckets) # ปัดขึ้น
+    padded = np.full(size * -(-n // size), np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(-1, size)
+    base = np.arange(buckets.shape[0]) * size
+
+    # NaN ไม่ถูกเลือกเป็นค่าต่ำสุด/สูงสุด ยกเว้นช่วงที่เป็น NaN ทั้งหมด (คงช่องว่างของเส้นไว้)
+    low = base + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    high = base + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+    indices = np.sort(np.column_stack([low, high]), axis=1).ravel()
+    indices = np.minimum(indices, n - 1)
+    return np.unique(np.concatenate([[0], indices, [n - 1]]))
+
+
+def aggregate_bars(x, values, n_buckets, width):
+    """
+    รวมแท่ง Volume ให้เหลือไม่เกิน n_buckets แท่ง (ใช้ค่าสูงสุดของแต่ละช่วงเพื่อคงสเกลแกนเดิม)
+    คืนค่า (left, right, height) ของแต่ละแท่ง
+    """
+    n = len(x)
+    if n <= n_buckets:
+        return x - width / 2, x + width / 2, values
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    starts = edges[:-1]
+    ends = edges[1:] - 1
+    heights = np.maximum.reduceat(np.nan_to_num(values), starts)
+    return x[starts] - width / 2, x[ends] + width / 2, heights
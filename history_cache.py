@@ -0,0 +1,271 @@
+import io
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.path.join("cache", "history")
+PERIOD_OFFSETS = {
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+    "max": None,
+}
+PERIOD_ORDER = list(PERIOD_OFFSETS)
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+REFRESH_INTERVAL = 15 * 60 # วินาที: ช่วงเวลาที่ถือว่าข้อมูลในแคชยังใหม่อยู่
+_write_lock = threading.Lock() # append เขียนทับไฟล์เดิม ห้ามเขียนหุ้นเดียวกันพร้อมกันจากหลาย thread
+
+
+def period_start(period, end):
+    """
+    คืนค่าวันเริ่มต้นของช่วงเวลา (None หมายถึงย้อนหลังทั้งหมด)
+    """
+    offset = PERIOD_OFFSETS[period]
+    return None if offset is None else end - offset
+
+
+class HistoryCache:
+    """
+    แคชประวัติราคา OHLCV บนดิสก์ แยกไฟล์ตามหุ้น เก็บเป็นคอลัมน์ .npy ที่เปิดแบบ memory-map
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, refresh_interval=REFRESH_INTERVAL):
+        self.cache_dir = cache_dir
+        self.refresh_interval = refresh_interval
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.cache_dir, symbol.upper().replace("/", "_"))
+
+    def _read_meta(self, symbol):
+        try:
+            with open(os.path.join(self._symbol_dir(symbol), "meta.json"), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, symbol, meta):
+        path = os.path.join(self._symbol_dir(symbol), "meta.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, symbol, start=None):
+        """
+        อ่านประวัติราคาจากแคช (เฉพาะตั้งแต่ start ถ้าระบุ) คืนค่า None หากไม่มีในแคช
+        """
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return None
+        symbol_dir = self._symbol_dir(symbol)
+        try:
+            index = np.load(os.path.join(symbol_dir, "index.npy"), mmap_mode="r")
+            first = 0
+            if start is not None:
+                first = int(np.searchsorted(index, start.tz_convert("UTC").value, side="left"))
+            # อ่านเฉพาะช่วงที่ต้องการจาก memory-map แล้วคัดลอกออกมา ไม่โหลดทั้งไฟล์
+            data = {
+                column: np.array(np.load(os.path.join(symbol_dir, f"{column}.npy"), mmap_mode="r")[first:])
+                for column in meta["columns"]
+            }
+            dates = pd.to_datetime(np.array(index[first:]), unit="ns", utc=True).tz_convert(meta["tz"])
+        except FileNotFoundError:
+            return None
+        if any(len(values) != len(dates) for values in data.values()):
+            return None # เขียนไฟล์ไม่ครบ (โปรแกรมหยุดระหว่าง append) ให้ดึงใหม่
+        return pd.DataFrame(data, index=pd.DatetimeIndex(dates, name="Date"))
+
+    def store(self, symbol, hist, period):
+        """
+        บันทึกประวัติราคาทั้งชุดลงแคช พร้อมระบุช่วงเวลาที่ครอบคลุม
+        """
+        with _write_lock:
+            symbol_dir = self._symbol_dir(symbol)
+            os.makedirs(symbol_dir, exist_ok=True)
+            columns = [column for column in COLUMNS if column in hist.columns]
+            index = hist.index.tz_convert("UTC") if hist.index.tz is not None else hist.index.tz_localize("UTC")
+            index = index.as_unit("ns") # เก็บเวลาเป็น nanosecond เสมอ
+
+            for name, values in [("index", index.asi8)] + [(column, hist[column].to_numpy()) for column in columns]:
+                path = os.path.join(symbol_dir, f"{name}.npy")
+                with open(path + ".tmp", "wb") as f:
+                    np.save(f, values)
+                os.replace(path + ".tmp", path)
+
+            self._write_meta(symbol, {
+                "period": period,
+                "columns": columns,
+                "tz": str(hist.index.tz or "UTC"),
+                "last_date": int(index.asi8[-1]) if len(index) else None,
+                "checked_at": time.time(),
+            })
+
+    def save_indicator_state(self, symbol, state, last_date=None):
+        """
+        บันทึกสถานะของตัวชี้วัดแบบ incremental คู่กับประวัติราคาที่อยู่ในแคช ณ ตอนนี้
+        ระบุ last_date (nanosecond UTC ของแท่งล่าสุดที่ state ครอบคลุม) เพื่อบันทึกเฉพาะเมื่อตรงกับแคช
+        """
+        with _write_lock:
+            meta = self._read_meta(symbol)
+            if meta is None or (last_date is not None and last_date != meta["last_date"]):
+                return False
+            path = os.path.join(self._symbol_dir(symbol), "indicators.json")
+            with open(path + ".tmp", "w") as f:
+                json.dump({"last_date": meta["last_date"], "state": state}, f)
+            os.replace(path + ".tmp", path)
+        return True
+
+    def load_indicator_state(self, symbol, last_date=None):
+        """
+        คืนสถานะตัวชี้วัดที่บันทึกไว้ หากยังตรงกับแท่งราคาล่าสุดในแคช (หรือ last_date ถ้าระบุ) ไม่เช่นนั้นคืนค่า None
+        """
+        meta = self._read_meta(symbol)
+        try:
+            with open(os.path.join(self._symbol_dir(symbol), "indicators.json"), "r") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        expected = meta["last_date"] if meta is not None and last_date is None else last_date
+        if meta is None or saved["last_date"] != expected:
+            return None
+        return saved["state"]
+
+    def covers(self, symbol, period, meta=None):
+        """
+        True หากแคชมีประวัติราคาของหุ้นครอบคลุมช่วงเวลาที่ขอ
+        """
+        meta = meta or self._read_meta(symbol)
+        return meta is not None and PERIOD_ORDER.index(meta["period"]) >= PERIOD_ORDER.index(period)
+
+    def get_history(self, provider, symbol, period):
+        """
+        คืนประวัติราคาตามช่วงเวลา โดยใช้แคชก่อน และดึงจาก provider เฉพาะแท่งราคาที่ยังไม่มี
+        """
+        meta = self._read_meta(symbol)
+        if not self.covers(symbol, period, meta):
+            # แคชยังไม่ครอบคลุมช่วงเวลาที่ขอ ต้องดึงใหม่ทั้งช่วง
+            hist = provider.history(symbol, period=period)
+            if not hist.empty:
+                self.store(symbol, hist, period)
+            return hist[[column for column in COLUMNS if column in hist.columns]]
+
+        if time.time() - meta["checked_at"] > self.refresh_interval:
+            self._append_new_bars(provider, symbol, meta)
+            meta = self._read_meta(symbol)
+
+        # ช่วงเวลาที่สั้นกว่าคือการตัดข้อมูลจากแคช ไม่ต้องใช้เครือข่าย
+        hist = self.load_period(symbol, period)
+        return hist if hist is not None else provider.history(symbol, period=period)
+
+    def load_period(self, symbol, period):
+        """
+        อ่านประวัติราคาตามช่วงเวลาจากแคชโดยไม่ใช้เครือข่าย (ถ้าแคชมีข้อมูลสั้นกว่าที่ขอจะคืนเท่าที่มี)
+        hist.attrs["checked_at"] คือเวลาที่ตรวจสอบกับแหล่งข้อมูลครั้งล่าสุด คืนค่า None หากไม่มีในแคช
+        """
+        meta = self._read_meta(symbol)
+        if meta is None or meta["last_date"] is None:
+            return None
+        last_date = pd.Timestamp(meta["last_date"], unit="ns", tz="UTC").tz_convert(meta["tz"])
+        hist = self.load(symbol, period_start(period, last_date))
+        if hist is not None:
+            hist.attrs["checked_at"] = meta["checked_at"]
+        return hist
+
+    def load_column(self, symbol, column, period):
+        """
+        อ่านคอลัมน์เดียว (เช่น "Close") ตามช่วงเวลาเป็น numpy array โดยไม่สร้าง DataFrame
+        เร็วกว่า load_period มากเมื่อต้องอ่านหุ้นจำนวนมาก คืนค่า None หากไม่มีในแคช
+        """
+        meta = self._read_meta(symbol)
+        if meta is None or meta["last_date"] is None or column not in meta["columns"]:
+            return None
+        symbol_dir = self._symbol_dir(symbol)
+        try:
+            first = 0
+            last_date = pd.Timestamp(meta["last_date"], unit="ns", tz="UTC").tz_convert(meta["tz"])
+            start = period_start(period, last_date)
+            if start is not None:
+                index = np.load(os.path.join(symbol_dir, "index.npy"), mmap_mode="r")
+                first = int(np.searchsorted(index, start.tz_convert("UTC").value, side="left"))
+            return np.array(np.load(os.path.join(symbol_dir, f"{column}.npy"), mmap_mode="r")[first:])
+        except FileNotFoundError:
+            return None
+
+    def _append_new_bars(self, provider, symbol, meta):
+        """
+        ดึงเฉพาะแท่งราคาตั้งแต่วันล่าสุดในแคช (รวมวันล่าสุดเพื่อแทนที่แท่งที่ยังไม่ปิด) แล้วต่อท้าย
+        """
+        if meta["last_date"] is None:
+            return
+        last_date = pd.Timestamp(meta["last_date"], unit="ns", tz="UTC").tz_convert(meta["tz"])
+        new_bars = provider.history(symbol, start=last_date.date())
+        if new_bars.empty or not self.append(symbol, new_bars):
+            with _write_lock:
+                meta = self._read_meta(symbol) # อ่านใหม่ อาจถูก append จาก thread อื่นไปแล้ว
+                if meta is not None:
+                    meta["checked_at"] = time.time()
+                    self._write_meta(symbol, meta)
+
+    def append(self, symbol, bars):
+        """
+        ต่อท้ายแท่งราคาใหม่ลงแคช แท่งในแคชตั้งแต่เวลาของแท่งแรกใน bars จะถูกแทนที่
+        เขียนเฉพาะส่วนท้ายของแต่ละไฟล์ .npy (และ header) ไม่เขียนประวัติทั้งชุดใหม่
+        คืนค่า False หากไม่มีแคชของหุ้นนี้หรือ bars ไม่มีคอลัมน์ครบ
+        """
+        with _write_lock:
+            meta = self._read_meta(symbol)
+            if meta is None or bars.empty or any(column not in bars.columns for column in meta["columns"]):
+                return False
+            index = pd.DatetimeIndex(bars.index)
+            index = index.tz_convert("UTC") if index.tz is not None else index.tz_localize(meta["tz"]).tz_convert("UTC")
+            index = index.as_unit("ns")
+            symbol_dir = self._symbol_dir(symbol)
+            cached_index = np.load(os.path.join(symbol_dir, "index.npy"), mmap_mode="r")
+            keep = int(np.searchsorted(cached_index, index.asi8[0], side="left"))
+            del cached_index # ปิด memory-map ก่อนเขียนไฟล์
+
+            # เขียนคอลัมน์ราคาก่อน index และ meta: หากหยุดกลางคัน ความยาวไม่ตรงกันและ load จะถือว่าไม่มีแคช
+            for name, values in [(column, bars[column].to_numpy()) for column in meta["columns"]] + [("index", index.asi8)]:
+                path = os.path.join(symbol_dir, f"{name}.npy")
+                if not _replace_tail(path, keep, values):
+                    merged = np.concatenate([np.load(path, mmap_mode="r")[:keep], values])
+                    with open(path + ".tmp", "wb") as f:
+                        np.save(f, merged)
+                    os.replace(path + ".tmp", path)
+
+            meta["last_date"] = int(index.asi8[-1])
+            meta["checked_at"] = time.time()
+            self._write_meta(symbol, meta)
+        return True
+
+
+def _replace_tail(path, keep, values):
+    """
+    แทนที่ข้อมูลตั้งแต่ตำแหน่ง keep ของไฟล์ .npy (1 มิติ) ด้วย values ในไฟล์เดิม แล้วแก้ shape ใน header
+    คืนค่า False หากทำในไฟล์เดิมไม่ได้ (ชนิดข้อมูลต่างกัน หรือ header ใหม่ยาวไม่เท่าเดิม)
+    """
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+        if len(shape) != 1 or keep > shape[0] or not np.can_cast(values.dtype, dtype, casting="same_kind"):
+            return False
+        header = io.BytesIO()
+        write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+        # numpy เว้นที่ว่างใน header ไว้ให้ shape ยาวขึ้นได้ จึงเขียนทับ header เดิมได้โดยไม่ต้องย้ายข้อมูล
+        write_header(header, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": fortran_order,
+                              "shape": (keep + len(values),)})
+        if len(header.getvalue()) != offset:
+            return False
+        f.seek(offset + keep * dtype.itemsize)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
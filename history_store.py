@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import fetch_history, get_provider
+from history_cache import COLUMNS, PERIOD_ORDER, REFRESH_INTERVAL, HistoryCache, period_start
+
+MEMORY_BUDGET = 64 * 1024 * 1024 # ไบต์: ขนาดรวมสูงสุดของประวัติราคาที่เก็บในหน่วยความจำ
+NS_PER_DAY = 86400 * 10**9
+
+
+class CompactHistory:
+    """
+    ประวัติราคารายวันแบบกะทัดรัด: วันที่เป็นจำนวนวันนับจาก 1970-01-01 ตามเวลาตลาด (int32)
+    และ OHLCV เป็น float32 ใน array ก้อนเดียวขนาด (คอลัมน์ x แท่ง) ใช้หน่วยความจำ 24 ไบต์ต่อแท่ง
+    slice/period/to_frame คืน view ที่ใช้หน่วยความจำร่วมกัน ไม่คัดลอกข้อมูล
+    """
+
+    def __init__(self, days, values, columns, tz=None, attrs=None):
+        self.days = days
+        self.values = values
+        self.columns = list(columns)
+        self.tz = tz
+        self.attrs = dict(attrs or {})
+
+    @classmethod
+    def from_frame(cls, hist):
+        """
+        แปลง DataFrame แบบ ticker.history() (เก็บเฉพาะคอลัมน์ OHLCV)
+        """
+        columns = [column for column in COLUMNS if column in hist.columns]
+        index = pd.DatetimeIndex(hist.index)
+        tz = index.tz
+        local = index.tz_localize(None) if tz is not None else index
+        days = (local.normalize().as_unit("ns").asi8 // NS_PER_DAY).astype(np.int32)
+        values = np.empty((len(columns), len(hist)), dtype=np.float32)
+        for row, column in enumerate(columns):
+            values[row] = hist[column].to_numpy(dtype=np.float32)
+        return cls(days, values, columns, tz, hist.attrs)
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def nbytes(self):
+        return self.days.nbytes + self.values.nbytes
+
+    def column(self, name):
+        """
+        คืนคอลัมน์เป็น float32 array (view)
+        """
+        return self.values[self.columns.index(name)]
+
+    def date_numbers(self):
+        """
+        วันที่ในรูปตัวเลขวันที่ของ matplotlib (epoch 1970-01-01 ตรงกับจำนวนวันที่เก็บไว้)
+        """
+        return self.days.astype(np.float64)
+
+    @property
+    def index(self):
+        """
+        DatetimeIndex ตามเขตเวลาของตลาด (สร้างใหม่ทุกครั้ง ไม่เก็บไว้)
+        """
+        index = pd.DatetimeIndex(self.days.astype(np.int64) * NS_PER_DAY, name="Date")
+        return index.tz_localize(self.tz) if self.tz is not None else index
+
+    def slice(self, start=0, stop=None):
+        return CompactHistory(self.days[start:stop], self.values[:, start:stop], self.columns, self.tz, self.attrs)
+
+    def period(self, period):
+        """
+        คืน view เฉพาะช่วงเวลา (เช่น "1y") นับจากแท่งล่าสุด
+        """
+        if not len(self):
+            return self
+        # คำนวณด้วยวันที่ตามเวลาตลาดโดยตรง ไม่ต้องสร้าง DatetimeIndex ทั้งชุด
+        first = period_start(period, pd.Timestamp(int(self.days[-1]) * NS_PER_DAY))
+        if first is None:
+            return self
+        first_day = first.value // NS_PER_DAY
+        return self.slice(int(np.searchsorted(self.days, first_day, side="left")))
+
+    def to_frame(self):
+        """
+        DataFrame ที่คอลัมน์เป็น view ของ array เดิม (float32) สำหรับแสดงกราฟ
+        float32 ละเอียดประมาณ 7 หลัก ราคาหลักพันอาจคลาดเคลื่อนที่ทศนิยมตำแหน่งที่ 3-4
+        แนวรับ/แนวต้าน/RSI ที่แสดงเป็นตัวเลขจึงคำนวณจาก DataFrame float64 ก่อนเก็บ (เหมือน batch/screener/API)
+        """
+        frame = pd.DataFrame(self.values.T, index=self.index, columns=self.columns, copy=False)
+        frame.attrs.update(self.attrs)
+        return frame
+
+
+class HistoryStore:
+    """
+    เก็บประวัติราคาหลายหุ้นในหน่วยความจำแบบ CompactHistory ภายใต้งบหน่วยความจำ (budget ไบต์)
+    เมื่อเกินงบจะปล่อยหุ้นที่ไม่ได้ใช้นานที่สุดออก (LRU) ข้อมูลต้นฉบับ float64 อยู่ในแคชบนดิสก์แล้ว
+    (fetch_history บันทึกไว้) จึงไม่ต้องเขียนกลับ และโหลดกลับจากแคชบนดิสก์เมื่อถูกขออีกครั้ง
+    """
+
+    def __init__(self, budget=MEMORY_BUDGET, cache=None):
+        self.budget = budget
+        self.cache = cache or HistoryCache()
+        self._entries = OrderedDict() # symbol -> (CompactHistory, period, เวลาที่เก็บ)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def put(self, symbol, hist, period="max"):
+        """
+        เก็บประวัติราคา (DataFrame หรือ CompactHistory) ของช่วงเวลา period คืนค่า CompactHistory ที่เก็บไว้
+        """
+        compact = hist if isinstance(hist, CompactHistory) else CompactHistory.from_frame(hist)
+        symbol = symbol.upper()
+        with self._lock:
+            previous = self._entries.pop(symbol, None)
+            if previous is not None:
+                self._bytes -= previous[0].nbytes
+            self._entries[symbol] = (compact, period, time.time())
+            self._bytes += compact.nbytes
+            self._evict()
+        return compact
+
+    def get(self, symbol, period="max", max_age=None, disk=True):
+        """
+        คืนประวัติราคาตามช่วงเวลาเป็น view จากหน่วยความจำ หรือโหลดจากแคชบนดิสก์ (disk=True)
+        max_age (วินาที) ไม่ใช้ข้อมูลที่ตรวจกับแหล่งข้อมูลนานกว่านี้ คืนค่า None หากไม่มีข้อมูลที่ใช้ได้
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None and _covers(entry[1], period) and not _expired(entry[2], max_age):
+                self._entries.move_to_end(symbol)
+                self.hits += 1
+                return entry[0].period(period)
+            self.misses += 1
+        if not disk:
+            return None
+        hist = self.cache.load_period(symbol, period)
+        if hist is None or hist.empty or _expired(hist.attrs["checked_at"], max_age):
+            return None
+        return self.put(symbol, hist, period)
+
+    def discard(self, symbol):
+        with self._lock:
+            entry = self._entries.pop(symbol.upper(), None)
+            if entry is not None:
+                self._bytes -= entry[0].nbytes
+
+    def _evict(self):
+        # ต้องถือ self._lock อยู่ คงหุ้นล่าสุดไว้อย่างน้อย 1 ตัวแม้จะเกินงบ
+        while self._bytes > self.budget and len(self._entries) > 1:
+            _, (compact, _, _) = self._entries.popitem(last=False)
+            self._bytes -= compact.nbytes
+            self.evictions += 1
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def stats(self):
+        with self._lock:
+            return {"symbols": len(self._entries), "bytes": self._bytes, "budget": self.budget,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def _covers(stored_period, period):
+    return PERIOD_ORDER.index(stored_period) >= PERIOD_ORDER.index(period)
+
+
+def _expired(checked_at, max_age):
+    return max_age is not None and time.time() - checked_at > max_age
+
+
+_history_store = None
+
+
+def get_history_store():
+    """
+    คืนค่าที่เก็บประวัติราคาในหน่วยความจำที่ใช้ร่วมกันทั้งโปรเซส
+    """
+    global _history_store
+    if _history_store is None:
+        _history_store = HistoryStore()
+    return _history_store
+
+
+def load_history(symbol, period="max", max_age=REFRESH_INTERVAL):
+    """
+    ประวัติราคาของหุ้นผ่าน HistoryStore: ใช้ข้อมูลในหน่วยความจำหรือแคชบนดิสก์ที่ยังไม่เก่ากว่า max_age
+    ไม่เช่นนั้นดึงด้วย fetch_history แล้วเก็บไว้ คืนค่า CompactHistory (view) ของช่วงเวลาที่ขอ
+    """
+    store = get_history_store()
+    cacheable = get_provider().cacheable # provider ที่อ่านไฟล์เอง (--data-dir) ไม่ใช้แคชบนดิสก์
+    compact = store.get(symbol, period, max_age, disk=cacheable)
+    if compact is None:
+        compact = store.put(symbol, fetch_history(symbol, period), period)
+    return compact
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+
+from analysis_engine import calculate_rsi
+
+MAX_ENTRIES = 128 # จำนวนผลลัพธ์สูงสุดที่เก็บไว้ (ตัวชี้วัดละ 1 array)
+
+
+def moving_average(close, window):
+    return close.rolling(window=window).mean()
+
+
+INDICATORS = {
+    "ma": moving_average,
+    "rsi": calculate_rsi,
+}
+
+
+def history_version(hist):
+    """
+    รุ่นของประวัติราคา: (เวลาแท่งล่าสุดเป็น nanosecond, จำนวนแท่ง, ชนิดข้อมูลราคาปิด)
+    view ของช่วงเวลาต่างกันจากข้อมูลชุดเดียวกันจะมีรุ่นต่างกันตามจำนวนแท่ง
+    ข้อมูล float32 (HistoryStore) กับ float64 (fetch_history) ได้ผลต่างกันเล็กน้อย จึงแยกรุ่นตามชนิดข้อมูล
+    """
+    dtype = hist["Close"].dtype.str
+    if not len(hist):
+        return (None, 0, dtype)
+    return (int(hist.index[-1].value), len(hist), dtype)
+
+
+class IndicatorService:
+    """
+    คำนวณตัวชี้วัดจากราคาปิดแล้วเก็บผลไว้ตาม (หุ้น, รุ่นของข้อมูลรวมชนิดข้อมูล, ตัวชี้วัด, window)
+    ผลลัพธ์เป็น numpy array แบบอ่านอย่างเดียว ใช้ร่วมกันได้ทุกส่วน (ผลวิเคราะห์, กราฟ, PDF, batch) โดยไม่แก้ hist
+    เมื่อมีแท่งราคาใหม่ (แท่งล่าสุดเลื่อนไป) ผลของรุ่นเก่าของหุ้นนั้นจะถูกลบทิ้ง
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # (symbol, version, name, window) -> array
+        self._latest = {} # symbol -> เวลาแท่งล่าสุดที่เคยเห็น
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol, hist, name, window):
+        """
+        คืนค่าตัวชี้วัด name (เช่น "ma", "rsi") ของทุกแท่งใน hist เป็น array อ่านอย่างเดียว
+        symbol=None คำนวณใหม่โดยไม่เก็บผล
+        """
+        if symbol is None:
+            return self._compute(hist, name, window)
+        symbol = symbol.upper()
+        version = history_version(hist)
+        key = (symbol, version, name, window)
+        with self._lock:
+            self._check_version(symbol, version[0])
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return values
+            self.misses += 1
+
+        values = self._compute(hist, name, window)
+        with self._lock:
+            if self._latest.get(symbol) == version[0]: # ข้อมูลไม่ถูกแทนที่ระหว่างคำนวณ
+                self._entries[key] = values
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return values
+
+    def chart_indicators(self, symbol, hist):
+        """
+        ตัวชี้วัดที่ใช้ในกราฟ: MA50, MA200 (None หากข้อมูลไม่ถึง 200 แท่ง) และ RSI (14)
+        """
+        return {
+            "ma50": self.get(symbol, hist, "ma", 50),
+            "ma200": self.get(symbol, hist, "ma", 200) if len(hist) >= 200 else None,
+            "rsi": self.get(symbol, hist, "rsi", 14),
+        }
+
+    def invalidate(self, symbol):
+        """
+        ลบผลทั้งหมดของหุ้น (ใช้เมื่อข้อมูลเปลี่ยนโดยแท่งล่าสุดไม่เลื่อน เช่น แท่งของวันนี้ถูกแทนที่)
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            self._latest.pop(symbol, None)
+            self._drop(symbol)
+
+    def _check_version(self, symbol, last):
+        # ต้องถือ self._lock อยู่: เจอแท่งที่ใหม่กว่า แปลว่ามีการต่อแท่งราคา ผลเดิมของหุ้นนี้ใช้ไม่ได้แล้ว
+        latest = self._latest.get(symbol)
+        if latest is None or (last is not None and last > latest):
+            if latest is not None:
+                self._drop(symbol)
+            self._latest[symbol] = last
+
+    def _drop(self, symbol):
+        for key in [key for key in self._entries if key[0] == symbol]:
+            del self._entries[key]
+
+    def _compute(self, hist, name, window):
+        values = INDICATORS[name](hist['Close'], window).to_numpy()
+        values.flags.writeable = False
+        return values
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_indicator_service = None
+
+
+def get_indicator_service():
+    """
+    คืนค่าที่เก็บผลตัวชี้วัดที่ใช้ร่วมกันทั้งโปรเซส
+    """
+    global _indicator_service
+    if _indicator_service is None:
+        _indicator_service = IndicatorService()
+    return _indicator_service
@@ -0,0 +1,337 @@
+import math
+from collections import deque
+
+import numpy as np
+
+
+class StreamingIndicator:
+    """
+    ตัวชี้วัดแบบ incremental: seed จากประวัติราคา แล้วอัปเดตทีละแท่งด้วยเวลา O(1)
+    update() ใช้เมื่อมีแท่งราคาใหม่ ส่วน update_last() ใช้แก้ค่าแท่งล่าสุดระหว่างวัน (tick)
+    """
+
+    def seed(self, values):
+        """
+        ป้อนประวัติราคาทั้งชุด คืนค่าตัวชี้วัดของทุกแท่ง (ตรงกับการคำนวณแบบ batch)
+        """
+        return np.array([self.update(value) for value in values], dtype=np.float64)
+
+    def update(self, value):
+        raise NotImplementedError
+
+    def update_last(self, value):
+        raise NotImplementedError
+
+    @property
+    def value(self):
+        raise NotImplementedError
+
+    def snapshot(self):
+        """
+        คืนสถานะปัจจุบันเป็น dict ที่บันทึกเป็น JSON ได้
+        """
+        state = {key: (list(item) if isinstance(item, deque) else item)
+                 for key, item in vars(self).items() if not isinstance(item, StreamingIndicator)}
+        state["type"] = type(self).__name__
+        return state
+
+    @classmethod
+    def from_snapshot(cls, state):
+        indicator = cls.__new__(cls)
+        for key, item in state.items():
+            if key != "type":
+                setattr(indicator, key, item)
+        if "values" in state:
+            indicator.values = deque(state["values"]) # หน้าต่างข้อมูลของตัวชี้วัดแบบ rolling
+        return indicator
+
+
+def _ewm_step(weighted, value, alpha):
+    """
+    ขั้นตอนเดียวของ ewm(adjust=False).mean() ตามลำดับการคำนวณของ pandas
+    """
+    if weighted is None:
+        return value
+    if weighted != value:
+        old_weight = 1.0 - alpha
+        weighted = (old_weight * weighted + alpha * value) / (old_weight + alpha)
+    return weighted
+
+
+class WilderRSI(StreamingIndicator):
+    """
+    RSI แบบ Wilder (ให้ผลเหมือน calculate_rsi)
+    """
+
+    def __init__(self, window=14):
+        self.window = window
+        self.alpha = 1.0 / window # com = window - 1
+        self.prev_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.last = None # สถานะก่อนแท่งล่าสุด ใช้สำหรับ update_last
+
+    def update(self, value):
+        self.last = [self.prev_close, self.avg_gain, self.avg_loss]
+        if self.prev_close is None:
+            gain = loss = 0.0 # แท่งแรกไม่มี delta
+        else:
+            delta = value - self.prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+        self.avg_gain = _ewm_step(self.avg_gain, gain, self.alpha)
+        self.avg_loss = _ewm_step(self.avg_loss, loss, self.alpha)
+        self.prev_close = value
+        return self.value
+
+    def update_last(self, value):
+        if self.last is None:
+            return self.update(value)
+        self.prev_close, self.avg_gain, self.avg_loss = self.last
+        return self.update(value)
+
+    @property
+    def value(self):
+        if self.avg_gain is None:
+            return math.nan
+        rs = self.avg_gain / (self.avg_loss if self.avg_loss != 0 else 1e-10) # ป้องกันหารด้วยศูนย์
+        return 100 - (100 / (1 + rs))
+
+
+class EMA(StreamingIndicator):
+    """
+    Exponential Moving Average (ให้ผลเหมือน Series.ewm(span=span, adjust=False).mean())
+    """
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.weighted = None
+        self.last = None
+
+    def update(self, value):
+        self.last = self.weighted
+        self.weighted = _ewm_step(self.weighted, value, self.alpha)
+        return self.value
+
+    def update_last(self, value):
+        self.weighted = self.last
+        return self.update(value)
+
+    @property
+    def value(self):
+        return math.nan if self.weighted is None else self.weighted
+
+
+class SMA(StreamingIndicator):
+    """
+    Simple Moving Average (ให้ผลเหมือน Series.rolling(window).mean())
+    ใช้ผลรวมแบบ Kahan (แยกค่าชดเชยของการเพิ่ม/ลบ) และลำดับการคำนวณแบบเดียวกับ pandas
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.neg_ct = 0
+        self.same_count = 0
+        self.prev_value = math.nan
+        self.last = None
+
+    def _add(self, value):
+        y = value - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+        self.same_count = self.same_count + 1 if value == self.prev_value else 1
+        self.prev_value = value
+
+    def _remove(self, value):
+        y = -value - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+    def update(self, value):
+        removed = self.values.popleft() if len(self.values) == self.window else None
+        self.last = [removed, self.sum_x, self.compensation_add, self.compensation_remove,
+                     self.neg_ct, self.same_count, self.prev_value]
+        if removed is not None:
+            self._remove(removed)
+        self.values.append(value)
+        self._add(value)
+        return self.value
+
+    def update_last(self, value):
+        if self.last is None:
+            return self.update(value)
+        (removed, self.sum_x, self.compensation_add, self.compensation_remove,
+         self.neg_ct, self.same_count, self.prev_value) = self.last
+        self.values.pop()
+        if removed is not None:
+            self.values.appendleft(removed)
+        return self.update(value)
+
+    @property
+    def value(self):
+        nobs = len(self.values)
+        if nobs < self.window:
+            return math.nan
+        result = self.sum_x / nobs
+        if self.same_count >= nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class BollingerBands(StreamingIndicator):
+    """
+    Bollinger Bands: ค่ากลางเป็น SMA และความกว้างเป็นส่วนเบี่ยงเบนมาตรฐาน (ddof=1) ของช่วงเดียวกัน
+    value คืนค่า (lower, middle, upper)
+    """
+
+    def __init__(self, window=20, num_std=2.0):
+        self.window = window
+        self.num_std = num_std
+        self.values = deque()
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation = 0.0
+        self.same_count = 0
+        self.prev_value = math.nan
+        self.middle = SMA(window)
+        self.last = None
+
+    def _add(self, value):
+        self.same_count = self.same_count + 1 if value == self.prev_value else 1
+        self.prev_value = value
+        nobs = len(self.values)
+        prev_mean = self.mean_x - self.compensation
+        y = value - self.compensation
+        t = y - self.mean_x
+        self.compensation = t + self.mean_x - y
+        self.mean_x += t / nobs
+        self.ssqdm_x += (value - prev_mean) * (value - self.mean_x)
+
+    def _remove(self, value):
+        nobs = len(self.values)
+        if nobs:
+            prev_mean = self.mean_x - self.compensation
+            y = value - self.compensation
+            t = y - self.mean_x
+            self.compensation = t + self.mean_x - y
+            self.mean_x -= t / nobs
+            self.ssqdm_x -= (value - prev_mean) * (value - self.mean_x)
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+
+    def _push(self, value):
+        self.last = [self.mean_x, self.ssqdm_x, self.compensation, self.same_count, self.prev_value]
+        # ลบค่าที่หลุดช่วงก่อนแล้วจึงเพิ่มค่าใหม่ ตามลำดับของ pandas
+        if len(self.values) == self.window:
+            removed = self.values.popleft()
+            self.last.append(removed)
+            self._remove(removed)
+        self.values.append(value)
+        self._add(value)
+
+    def update(self, value):
+        self.middle.update(value)
+        self._push(value)
+        return self.value
+
+    def update_last(self, value):
+        if self.last is None:
+            return self.update(value)
+        self.mean_x, self.ssqdm_x, self.compensation, self.same_count, self.prev_value = self.last[:5]
+        self.values.pop()
+        if len(self.last) > 5:
+            self.values.appendleft(self.last[5])
+        self.middle.update_last(value)
+        self._push(value)
+        return self.value
+
+    @property
+    def std(self):
+        nobs = len(self.values)
+        if nobs < self.window or nobs < 2:
+            return math.nan
+        if self.same_count >= nobs:
+            return 0.0
+        return math.sqrt(max(self.ssqdm_x / (nobs - 1), 0.0))
+
+    @property
+    def value(self):
+        middle = self.middle.value
+        width = self.num_std * self.std
+        return (middle - width, middle, middle + width)
+
+    def seed(self, values):
+        return np.array([self.update(value) for value in values], dtype=np.float64).reshape(-1, 3)
+
+    def snapshot(self):
+        state = super().snapshot()
+        state["middle"] = self.middle.snapshot()
+        return state
+
+    @classmethod
+    def from_snapshot(cls, state):
+        state = dict(state)
+        middle = SMA.from_snapshot(state.pop("middle"))
+        indicator = super().from_snapshot(state)
+        indicator.middle = middle
+        return indicator
+
+
+INDICATOR_TYPES = {cls.__name__: cls for cls in (WilderRSI, EMA, SMA, BollingerBands)}
+
+
+def restore_indicator(state):
+    """
+    สร้างตัวชี้วัดกลับจากสถานะที่ได้จาก snapshot()
+    """
+    return INDICATOR_TYPES[state["type"]].from_snapshot(state)
+
+
+class IndicatorSet:
+    """
+    กลุ่มตัวชี้วัดที่อัปเดตพร้อมกันด้วยราคาปิดเดียวกัน (ค่าเริ่มต้น: RSI 14, MA50, MA200)
+    """
+
+    def __init__(self, indicators=None):
+        self.indicators = indicators or {
+            "RSI": WilderRSI(14),
+            "MA50": SMA(50),
+            "MA200": SMA(200),
+        }
+
+    def seed(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        return {name: indicator.seed(values) for name, indicator in self.indicators.items()}
+
+    def update(self, value):
+        return {name: indicator.update(value) for name, indicator in self.indicators.items()}
+
+    def update_last(self, value):
+        return {name: indicator.update_last(value) for name, indicator in self.indicators.items()}
+
+    @property
+    def values(self):
+        return {name: indicator.value for name, indicator in self.indicators.items()}
+
+    def snapshot(self):
+        return {name: indicator.snapshot() for name, indicator in self.indicators.items()}
+
+    @classmethod
+    def from_snapshot(cls, state):
+        return cls({name: restore_indicator(item) for name, item in state.items()})
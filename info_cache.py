@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_FILE = os.path.join("cache", "info_cache.json")
+# ข้อมูลที่เปลี่ยนช้า (ชื่อ, ภาคส่วน, ปัจจัยพื้นฐาน) และข้อมูลที่เปลี่ยนเร็ว (ราคา, มูลค่าตลาด)
+SLOW_FIELDS = ["symbol", "longName", "sector", "industry", "trailingPE", "dividendYield"]
+FAST_FIELDS = ["regularMarketPrice", "marketCap"]
+SLOW_TTL = 24 * 60 * 60 # วินาที
+FAST_TTL = 5 * 60 # วินาที
+MAX_ENTRIES = 500
+
+
+class InfoCache:
+    """
+    แคชข้อมูลบริษัท (ticker.info) แบบจำกัดขนาด (LRU) แยก TTL ตามกลุ่มข้อมูล
+    และคืนข้อมูลเก่าทันทีระหว่างที่รีเฟรชอยู่เบื้องหลัง (stale-while-revalidate)
+    """
+
+    def __init__(self, fetch_info, fetch_quote=None, cache_file=CACHE_FILE,
+                 slow_ttl=SLOW_TTL, fast_ttl=FAST_TTL, max_entries=MAX_ENTRIES):
+        self.fetch_info = fetch_info # ดึงข้อมูลทั้งหมด: symbol -> dict
+        self.fetch_quote = fetch_quote or fetch_info # ดึงเฉพาะข้อมูลที่เปลี่ยนเร็ว: symbol -> dict
+        self.cache_file = cache_file
+        self.slow_ttl = slow_ttl
+        self.fast_ttl = fast_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for symbol, entry in entries.items():
+            self._entries[symbol] = entry
+        self._evict()
+
+    def _save(self):
+        with self._lock:
+            snapshot = {symbol: dict(entry, info=dict(entry["info"])) for symbol, entry in self._entries.items()}
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_file}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_file)
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False) # ลบรายการที่ไม่ได้ใช้นานที่สุด
+
+    def _store(self, symbol, info, slow):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(symbol) or {"info": {}, "slow_at": 0, "fast_at": 0}
+            fields = SLOW_FIELDS + FAST_FIELDS if slow else FAST_FIELDS
+            entry["info"].update({field: info.get(field) for field in fields if field in info})
+            entry["fast_at"] = now
+            if slow:
+                entry["slow_at"] = now
+            self._entries[symbol] = entry
+            self._entries.move_to_end(symbol)
+            self._evict()
+            return dict(entry["info"])
+
+    def peek(self, symbol):
+        """
+        คืนข้อมูลที่อยู่ในแคช (อาจเก่า) โดยไม่ใช้เครือข่าย คืนค่า None หากไม่มี
+        """
+        with self._lock:
+            entry = self._entries.get(symbol)
+            return dict(entry["info"]) if entry else None
+
+    def get(self, symbol, on_update=None):
+        """
+        คืนข้อมูลบริษัท: ถ้ามีในแคชจะคืนทันทีแม้หมดอายุ แล้วรีเฟรชเบื้องหลัง
+        เมื่อรีเฟรชเสร็จจะเรียก on_update(symbol, info)
+        """
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                self._entries.move_to_end(symbol)
+
+        if entry is None:
+            # ไม่มีในแคชเลย ต้องรอดึงข้อมูลจากเครือข่าย
+            info = self.fetch_info(symbol)
+            if not info or info.get("regularMarketPrice") is None:
+                return info # ไม่เก็บข้อมูลของหุ้นที่ไม่มีราคา
+            cached = self._store(symbol, info, slow=True)
+            self._save()
+            return cached
+
+        now = time.time()
+        slow_stale = now - entry["slow_at"] > self.slow_ttl
+        fast_stale = now - entry["fast_at"] > self.fast_ttl
+        if slow_stale or fast_stale:
+            self._refresh_async(symbol, slow_stale, on_update)
+        return self.peek(symbol)
+
+    def _refresh_async(self, symbol, slow, on_update):
+        with self._lock:
+            if symbol in self._refreshing:
+                return
+            self._refreshing.add(symbol)
+        threading.Thread(target=self._refresh, args=(symbol, slow, on_update), daemon=True).start()
+
+    def _refresh(self, symbol, slow, on_update):
+        try:
+            info = self.fetch_info(symbol) if slow else self.fetch_quote(symbol)
+            if info:
+                cached = self._store(symbol, info, slow)
+                self._save()
+                if on_update:
+                    on_update(symbol, cached)
+        except Exception:
+            pass # รีเฟรชไม่สำเร็จ ใช้ข้อมูลเดิมต่อไปและลองใหม่ในครั้งถัดไป
+        finally:
+            with self._lock:
+                self._refreshing.discard(symbol)
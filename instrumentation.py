@@ -0,0 +1,182 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+MAX_SAMPLES = 1000 # จำนวนค่าเวลาที่เก็บต่อชื่อ span สำหรับคำนวณ percentile
+MAX_EVENTS = 10000 # จำนวน event ล่าสุดที่เก็บไว้สำหรับ Chrome trace
+PROFILE_DIR = os.path.join("cache", "profiles")
+
+
+class _NullSpan:
+    """
+    span ที่ไม่ทำอะไรเลย ใช้เมื่อปิดการวัดเวลา (ใช้ object เดียวร่วมกันทุกครั้ง)
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    ช่วงเวลาของขั้นตอน 1 ครั้ง บันทึกลง Recorder เมื่อออกจาก with
+    """
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.recorder.record(self.name, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+
+def _percentile(sorted_values, fraction):
+    # แบบ nearest-rank
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """
+    เก็บเวลาของแต่ละขั้นตอน (span) แยกตามชื่อ สรุปเป็น p50/p95/max และส่งออกเป็น JSON หรือ Chrome trace
+    """
+
+    def __init__(self, max_samples=MAX_SAMPLES, max_events=MAX_EVENTS):
+        self.enabled = False
+        self.max_samples = max_samples
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._events = deque(maxlen=max_events)
+        self._last = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, name, start, duration, args=None):
+        with self._lock:
+            self._samples[name].append(duration)
+            self._last[name] = duration
+            self._events.append((name, start - self._origin, duration, threading.get_ident(), args or {}))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._events.clear()
+            self._last.clear()
+
+    def stats(self):
+        """
+        คืนค่าสรุปของทุก span: {ชื่อ: {count, p50_ms, p95_ms, max_ms, total_ms}}
+        """
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+        return {
+            name: {
+                "count": len(values),
+                "p50_ms": _percentile(values, 0.50) * 1000,
+                "p95_ms": _percentile(values, 0.95) * 1000,
+                "max_ms": values[-1] * 1000,
+                "total_ms": sum(values) * 1000,
+            }
+            for name, values in samples.items() if values
+        }
+
+    def last_summary(self, prefix=""):
+        """
+        ข้อความสั้นของเวลาครั้งล่าสุดของ span ที่ขึ้นต้นด้วย prefix เช่น "info 120ms · history 340ms"
+        """
+        with self._lock:
+            last = [(name, duration) for name, duration in self._last.items() if name.startswith(prefix)]
+        return " · ".join(f"{name[len(prefix):]} {duration * 1000:.0f}ms" for name, duration in last)
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.stats(), f, ensure_ascii=False, indent=2)
+
+    def export_chrome_trace(self, path):
+        """
+        บันทึก event ล่าสุดในรูปแบบ Chrome trace (เปิดด้วย chrome://tracing หรือ Perfetto)
+        """
+        with self._lock:
+            events = list(self._events)
+        pid = os.getpid()
+        trace = [
+            {"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6, "pid": pid, "tid": tid,
+             "args": {key: str(value) for key, value in args.items()}}
+            for name, start, duration, tid, args in events
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+
+_recorder = Recorder()
+
+
+def get_recorder():
+    return _recorder
+
+
+def enable(enabled=True):
+    _recorder.enabled = enabled
+
+
+def is_enabled():
+    return _recorder.enabled
+
+
+def span(name, **args):
+    """
+    จับเวลาขั้นตอนด้วย with span("name"): ... (เมื่อปิดการวัดจะคืน NULL_SPAN ที่ไม่ทำอะไร)
+    """
+    if not _recorder.enabled:
+        return NULL_SPAN
+    return Span(_recorder, name, args)
+
+
+@contextmanager
+def capture_profile(name, profile_dir=PROFILE_DIR, top=30):
+    """
+    เก็บ cProfile และ tracemalloc ของโค้ดภายใน with (เฉพาะ thread ที่เรียก)
+    บันทึก <name>.prof (เปิดด้วย pstats/snakeviz) และ <name>.txt (สรุปฟังก์ชันที่ใช้เวลา/หน่วยความจำมากที่สุด)
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    base = os.path.join(profile_dir, name)
+    profiler = cProfile.Profile()
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        yield base
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+        profiler.dump_stats(base + ".prof")
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+        report.write(f"\nหน่วยความจำสูงสุด: {peak / 1024:.1f} KB\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            report.write(f"{stat}\n")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
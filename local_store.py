@@ -0,0 +1,242 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DB_PATH = os.path.join("cache", "local.db")
+WATCHLIST_FILE = "watchlist.txt" # ไฟล์ watchlist แบบเดิม (นำเข้าครั้งแรกที่เปิดฐานข้อมูล)
+RECENT_SEARCHES = 10 # จำนวนรายการที่แสดงในช่องค้นหา (ประวัติทั้งหมดยังเก็บไว้ในฐานข้อมูล)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS watchlist (
+    symbol TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    period TEXT,
+    searched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_history_symbol ON search_history (symbol, searched_at);
+CREATE TABLE IF NOT EXISTS levels (
+    symbol TEXT NOT NULL,
+    period TEXT NOT NULL,
+    method TEXT NOT NULL,
+    bars INTEGER,
+    last_close REAL,
+    supports TEXT,
+    resistances TEXT,
+    rsi REAL,
+    computed_at REAL NOT NULL,
+    PRIMARY KEY (symbol, method, period)
+);
+CREATE TABLE IF NOT EXISTS quotes (
+    symbol TEXT PRIMARY KEY,
+    last_close REAL,
+    rsi REAL,
+    supports TEXT,
+    resistances TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class LocalStore:
+    """
+    ฐานข้อมูล SQLite บนเครื่อง (โหมด WAL) เก็บ watchlist, ประวัติการค้นหาทั้งหมด,
+    แนวรับ/แนวต้าน/RSI ล่าสุดของแต่ละหุ้นและช่วงเวลา และราคาล่าสุดของหุ้นใน watchlist
+    การเขียนแต่ละครั้งเป็น transaction เดียว (ข้อมูลหลายแถวเขียนพร้อมกันด้วย executemany)
+    ใช้จากหลาย thread ได้ โดยใช้ connection เดียวร่วมกันภายใต้ lock
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL") # WAL: ปลอดภัยเมื่อโปรแกรมล้ม เร็วกว่า FULL มาก
+        with self._lock:
+            self._conn.executescript(SCHEMA) # executescript จัดการ transaction เอง
+
+    @contextmanager
+    def transaction(self):
+        """
+        เปิด transaction: สำเร็จทั้งหมดหรือย้อนกลับทั้งหมด
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- watchlist ----------
+
+    def watchlist(self):
+        return [row["symbol"] for row in self._query("SELECT symbol FROM watchlist ORDER BY position")]
+
+    def add_to_watchlist(self, symbol):
+        """
+        เพิ่มหุ้นต่อท้าย watchlist คืนค่า False หากมีอยู่แล้ว
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO watchlist (symbol, position, added_at) "
+                "SELECT ?, COALESCE(MAX(position), -1) + 1, ? FROM watchlist", (symbol, time.time()))
+            return cursor.rowcount > 0
+
+    def remove_from_watchlist(self, symbol):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM watchlist WHERE symbol = ?", (symbol,))
+
+    def set_watchlist(self, symbols):
+        """
+        แทนที่ watchlist ทั้งรายการตามลำดับที่ให้มา
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM watchlist")
+            conn.executemany("INSERT OR IGNORE INTO watchlist (symbol, position, added_at) VALUES (?, ?, ?)",
+                             [(symbol, position, now) for position, symbol in enumerate(symbols)])
+
+    def import_watchlist_file(self, path=WATCHLIST_FILE):
+        """
+        นำเข้า watchlist จากไฟล์ข้อความแบบเดิมครั้งเดียว (ไม่ทำซ้ำแม้ผู้ใช้จะลบหุ้นจนหมดภายหลัง)
+        คืนค่าจำนวนหุ้นที่นำเข้า
+        """
+        if self._query("SELECT 1 FROM meta WHERE key = 'watchlist_imported'"):
+            return 0
+        try:
+            with open(path, "r") as f:
+                symbols = list(dict.fromkeys(line.strip().upper() for line in f if line.strip()))
+        except FileNotFoundError:
+            symbols = []
+        now = time.time()
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO watchlist (symbol, position, added_at) "
+                "SELECT ?, COALESCE(MAX(position), -1) + 1, ? FROM watchlist",
+                [(symbol, now) for symbol in symbols])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('watchlist_imported', ?)", (path,))
+        return len(symbols)
+
+    # ---------- ประวัติการค้นหา ----------
+
+    def add_search(self, symbol, period=None):
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO search_history (symbol, period, searched_at) VALUES (?, ?, ?)",
+                         (symbol, period, time.time()))
+
+    def recent_searches(self, limit=RECENT_SEARCHES):
+        """
+        หุ้นที่ค้นหาล่าสุด (ไม่ซ้ำ) เรียงจากล่าสุดไปเก่าสุด
+        """
+        rows = self._query("SELECT symbol, MAX(searched_at) AS last FROM search_history "
+                           "GROUP BY symbol ORDER BY last DESC LIMIT ?", (limit,))
+        return [row["symbol"] for row in rows]
+
+    def last_search(self):
+        """
+        คืนค่า (symbol, period) ของการค้นหาครั้งล่าสุด หรือ None
+        """
+        rows = self._query("SELECT symbol, period FROM search_history ORDER BY id DESC LIMIT 1")
+        return (rows[0]["symbol"], rows[0]["period"]) if rows else None
+
+    # ---------- แนวรับ/แนวต้านล่าสุด ----------
+
+    def save_levels(self, symbol, method, periods):
+        """
+        บันทึกผลของ analyze_periods ทุกช่วงเวลาของหุ้นใน transaction เดียว
+        """
+        now = time.time()
+        rows = [(symbol, period, method, levels["bars"], levels["last_close"], json.dumps(levels["supports"]),
+                 json.dumps(levels["resistances"]), levels["rsi"], now)
+                for period, levels in periods.items()]
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO levels (symbol, period, method, bars, last_close, supports, resistances, rsi, "
+                "computed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def load_levels(self, symbol, method):
+        """
+        คืนผลที่บันทึกไว้ในรูปเดียวกับ analyze_periods ({period: {...}}) พร้อม computed_at (ว่างหากไม่มี)
+        """
+        rows = self._query("SELECT * FROM levels WHERE symbol = ? AND method = ?", (symbol, method))
+        return {row["period"]: {
+            "bars": row["bars"],
+            "last_close": row["last_close"],
+            "supports": json.loads(row["supports"]),
+            "resistances": json.loads(row["resistances"]),
+            "rsi": _float(row["rsi"]),
+            "computed_at": row["computed_at"],
+        } for row in rows}
+
+    # ---------- ราคาล่าสุด ----------
+
+    def save_quotes(self, summaries):
+        """
+        บันทึกราคา/RSI/แนวรับแนวต้านล่าสุดของหลายหุ้นพร้อมกัน (รูปแบบเดียวกับ WatchlistMonitor summary)
+        """
+        now = time.time()
+        rows = [(summary["symbol"], summary["last_close"], summary["rsi"], json.dumps(summary.get("supports", [])),
+                 json.dumps(summary.get("resistances", [])), now) for summary in summaries]
+        with self.transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO quotes (symbol, last_close, rsi, supports, resistances, updated_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def load_quotes(self, symbols):
+        """
+        คืนราคาล่าสุดที่บันทึกไว้ {symbol: summary} เฉพาะหุ้นที่มีข้อมูล
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        placeholders = ", ".join("?" * len(symbols))
+        rows = self._query(f"SELECT * FROM quotes WHERE symbol IN ({placeholders})", symbols)
+        return {row["symbol"]: {
+            "symbol": row["symbol"],
+            "last_close": _float(row["last_close"]),
+            "rsi": _float(row["rsi"]),
+            "supports": json.loads(row["supports"]),
+            "resistances": json.loads(row["resistances"]),
+            "updated_at": row["updated_at"],
+        } for row in rows}
+
+
+def _float(value):
+    return math.nan if value is None else value # SQLite เก็บ NaN เป็น NULL
+
+
+_local_store = None
+
+
+def get_local_store():
+    """
+    คืนค่าฐานข้อมูลบนเครื่องที่ใช้ร่วมกันทั้งโปรเซส
+    """
+    global _local_store
+    if _local_store is None:
+        _local_store = LocalStore()
+    return _local_store
@@ -0,0 +1,133 @@
+import numpy as np
+
+PIVOT_ORDER = 5 # จำนวนแท่งทั้งสองข้างที่จุดกลับตัวต้องต่ำ/สูงกว่า
+ZONE_TOLERANCE = 0.01 # จุดกลับตัวที่ราคาห่างกันไม่เกิน 1% อยู่ในโซนเดียวกัน
+PROFILE_BINS = 50 # จำนวนช่องราคาของ volume profile
+LEVEL_COUNT = 3
+
+
+def sliding_min(values, window):
+    """
+    ค่าต่ำสุดของทุกหน้าต่างขนาด window (ผลลัพธ์ตำแหน่ง j = min(values[j:j + window])) แบบ van Herk/Gil-Werman
+    ใช้เวลา O(n) ไม่ขึ้นกับขนาดหน้าต่าง และข้าม NaN
+    """
+    return _sliding_extreme(values, window, np.fmin, np.inf)
+
+
+def sliding_max(values, window):
+    """
+    ค่าสูงสุดของทุกหน้าต่างขนาด window แบบเดียวกับ sliding_min
+    """
+    return _sliding_extreme(values, window, np.fmax, -np.inf)
+
+
+def _sliding_extreme(values, window, func, fill):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if window > n:
+        return np.empty(0)
+    # แบ่งเป็นบล็อกขนาด window: หน้าต่างใดๆ คร่อมไม่เกิน 2 บล็อก จึงเป็น func(suffix ของบล็อกแรก, prefix ของบล็อกถัดไป)
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, fill)
+    padded[:n] = values
+    padded = padded.reshape(blocks, window)
+    prefix = func.accumulate(padded, axis=1).ravel()
+    suffix = func.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    starts = np.arange(n - window + 1)
+    return func(suffix[starts], prefix[starts + window - 1])
+
+
+def find_pivots(values, order=PIVOT_ORDER):
+    """
+    หาตำแหน่งจุดกลับตัว (pivot) ที่ราคาเป็นค่าต่ำสุดในช่วง order แท่งทั้งซ้ายและขวา
+    แท่งที่ราคาเท่ากันต่อเนื่องนับเฉพาะแท่งแรก คืนค่าอาร์เรย์ตำแหน่ง
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if order < 1 or n < 2 * order + 1:
+        return np.empty(0, dtype=np.int64)
+    centre = values[order:n - order]
+    window_min = sliding_min(values, 2 * order + 1)
+    left_min = sliding_min(values[:n - order - 1], order) # order แท่งก่อนหน้าของแต่ละจุดกลาง
+    pivots = (centre == window_min) & (centre < left_min)
+    return np.flatnonzero(pivots) + order
+
+
+def volume_profile(close, volume, bins=PROFILE_BINS):
+    """
+    ปริมาณการซื้อขายสะสมในแต่ละช่วงราคา คืนค่า (ปริมาณของแต่ละช่อง, ขอบช่อง)
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    valid = ~(np.isnan(close) | np.isnan(volume))
+    return np.histogram(close[valid], bins=bins, weights=volume[valid])
+
+
+def cluster_zones(prices, tolerance=ZONE_TOLERANCE):
+    """
+    จัดกลุ่มราคาที่ใกล้กันเป็นโซนกว้างไม่เกิน tolerance (สัดส่วนของราคาต่ำสุดในโซน)
+    เรียงราคาครั้งเดียวแล้วกระโดดหาขอบโซนด้วย searchsorted จึงใช้เวลา O(n log n)
+    คืนค่า (ราคาเฉลี่ย, ราคาต่ำสุด, ราคาสูงสุด, จำนวนครั้งที่แตะ) ของแต่ละโซน
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    prices = np.sort(prices[~np.isnan(prices)])
+    starts = []
+    start = 0
+    while start < len(prices):
+        starts.append(start)
+        start = int(np.searchsorted(prices, prices[start] * (1 + tolerance), side="right"))
+    starts = np.array(starts, dtype=np.int64)
+    if len(starts) == 0:
+        empty = np.empty(0)
+        return empty, empty, empty, np.empty(0, dtype=np.int64)
+    ends = np.append(starts[1:], len(prices))
+    touches = ends - starts
+    means = np.add.reduceat(prices, starts) / touches
+    return means, prices[starts], prices[ends - 1], touches
+
+
+def find_zones(hist, order=PIVOT_ORDER, tolerance=ZONE_TOLERANCE, bins=PROFILE_BINS):
+    """
+    หาโซนแนวรับ/แนวต้านจากจุดกลับตัวของราคาต่ำสุด (Low) และสูงสุด (High) รวมกัน
+    จัดอันดับตามจำนวนครั้งที่ราคาแตะโซน แล้วตามปริมาณการซื้อขายในช่วงราคาของโซน (volume profile)
+    คืนค่ารายการ dict เรียงจากโซนที่แข็งแรงที่สุด
+    """
+    close = hist['Close'].to_numpy(dtype=np.float64)
+    lows = hist['Low'].to_numpy(dtype=np.float64) if 'Low' in hist else close
+    highs = hist['High'].to_numpy(dtype=np.float64) if 'High' in hist else close
+
+    # ราคาสูงสุดกลับด้านเครื่องหมายเพื่อใช้ find_pivots (หาค่าต่ำสุด) ตัวเดียวกัน
+    pivot_prices = np.concatenate([lows[find_pivots(lows, order)], highs[find_pivots(-highs, order)]])
+    means, zone_lows, zone_highs, touches = cluster_zones(pivot_prices, tolerance)
+    if len(means) == 0:
+        return []
+
+    if 'Volume' in hist:
+        profile, edges = volume_profile(close, hist['Volume'].to_numpy(dtype=np.float64), bins)
+        cumulative = np.concatenate([[0.0], np.cumsum(profile)])
+        first_bin = np.clip(np.searchsorted(edges, zone_lows, side="right") - 1, 0, len(profile) - 1)
+        last_bin = np.clip(np.searchsorted(edges, zone_highs, side="right") - 1, 0, len(profile) - 1)
+        volumes = cumulative[last_bin + 1] - cumulative[first_bin]
+    else:
+        volumes = np.zeros(len(means))
+
+    order_by_strength = np.lexsort((-volumes, -touches)) # จำนวนครั้งที่แตะก่อน แล้วตามปริมาณ
+    return [
+        {"price": float(means[i]), "low": float(zone_lows[i]), "high": float(zone_highs[i]),
+         "touches": int(touches[i]), "volume": float(volumes[i])}
+        for i in order_by_strength
+    ]
+
+
+def find_pivot_levels(hist, order=PIVOT_ORDER, tolerance=ZONE_TOLERANCE, bins=PROFILE_BINS, count=LEVEL_COUNT):
+    """
+    เลือกแนวรับ/แนวต้านไม่เกิน count ระดับจากโซนที่แข็งแรงที่สุดใต้/เหนือราคาปิดล่าสุด คืนค่า (supports, resistances)
+    """
+    close = hist['Close']
+    if close.empty:
+        return [], []
+    last_price = close.iloc[-1]
+    zones = find_zones(hist, order, tolerance, bins)
+    supports = [zone["price"] for zone in zones if zone["price"] <= last_price][:count]
+    resistances = [zone["price"] for zone in zones if zone["price"] > last_price][:count]
+    return sorted(supports), sorted(resistances)
@@ -0,0 +1,208 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import (calculate_rsi_matrix, find_levels_matrix, get_history_cache, get_provider, is_offline,
+                             use_data_dir)
+from batch_analysis import load_symbols
+
+CHUNK_SIZE = 250 # จำนวนหุ้นต่องานใน process pool (คำนวณเป็น matrix ทีละกลุ่ม)
+FETCH_BATCH = 200 # จำนวนหุ้นต่อคำขอเมื่อดึงข้อมูลที่ไม่มีในแคช
+EXAMPLE_QUERY = "support_distance <= 2 and rsi < 35"
+RESULT_FIELDS = [
+    "symbol", "last_close", "bars",
+    "support_1", "support_2", "support_3", "resistance_1", "resistance_2", "resistance_3",
+    "nearest_support", "support_distance", "nearest_resistance", "resistance_distance",
+    "rsi", "ma50", "ma200", "above_ma50", "above_ma200", "ma50_above_ma200", "error",
+]
+
+
+def _load_closes(symbol, period):
+    """
+    อ่านราคาปิดจากแคชบนเครื่อง (หรือจาก data_dir) โดยไม่ใช้เครือข่าย คืนค่า None หากไม่มีข้อมูล
+    """
+    provider = get_provider()
+    if provider.cacheable:
+        values = get_history_cache().load_column(symbol, "Close", period)
+        return values.astype(np.float64) if values is not None and len(values) else None
+    hist = provider.history(symbol, period)
+    return hist["Close"].to_numpy(dtype=np.float64) if not hist.empty else None
+
+
+def _last_mean(prices, window):
+    """
+    ค่าเฉลี่ยของ window แท่งล่าสุดของทุกแถว (NaN หากข้อมูลไม่ครบ window แท่ง)
+    """
+    if prices.shape[1] < window:
+        return np.full(prices.shape[0], np.nan)
+    tail = prices[:, -window:]
+    complete = ~np.isnan(tail).any(axis=1)
+    return np.where(complete, np.nan_to_num(tail).sum(axis=1) / window, np.nan)
+
+
+def screen_prices(symbols, prices):
+    """
+    คำนวณแนวรับ/แนวต้าน, RSI และสถานะ MA50/MA200 ของหุ้นหลายตัวพร้อมกัน
+    prices: array (จำนวนหุ้น x จำนวนวัน) ชิดขวา เติม NaN ด้านหน้า คืนค่ารายการ dict ตามลำดับ symbols
+    """
+    supports, resistances = find_levels_matrix(prices)
+    rsi = calculate_rsi_matrix(prices)
+    ma50 = _last_mean(prices, 50)
+    ma200 = _last_mean(prices, 200)
+    last_close = prices[:, -1]
+    bars = (~np.isnan(prices)).sum(axis=1)
+
+    with np.errstate(invalid="ignore"):
+        # แนวรับที่ใกล้ที่สุดใต้ราคา และแนวต้านที่ใกล้ที่สุดเหนือราคา
+        nearest_support = np.where(supports <= last_close[:, np.newaxis], supports, -np.inf).max(axis=1)
+        nearest_resistance = np.where(resistances >= last_close[:, np.newaxis], resistances, np.inf).min(axis=1)
+    nearest_support[np.isinf(nearest_support)] = np.nan
+    nearest_resistance[np.isinf(nearest_resistance)] = np.nan
+
+    rows = []
+    for i, symbol in enumerate(symbols):
+        row = {"symbol": symbol, "last_close": last_close[i], "bars": int(bars[i])}
+        for level in range(3):
+            row[f"support_{level + 1}"] = supports[i, level]
+            row[f"resistance_{level + 1}"] = resistances[i, level]
+        row.update({
+            "nearest_support": nearest_support[i],
+            "support_distance": (last_close[i] - nearest_support[i]) / last_close[i] * 100, # % เหนือแนวรับ
+            "nearest_resistance": nearest_resistance[i],
+            "resistance_distance": (nearest_resistance[i] - last_close[i]) / last_close[i] * 100, # % ใต้แนวต้าน
+            "rsi": rsi[i],
+            "ma50": ma50[i],
+            "ma200": ma200[i],
+            "above_ma50": bool(last_close[i] > ma50[i]),
+            "above_ma200": bool(last_close[i] > ma200[i]),
+            "ma50_above_ma200": bool(ma50[i] > ma200[i]),
+        })
+        rows.append(row)
+    return rows
+
+
+def _screen_chunk(symbols, period):
+    """
+    ทำงานใน worker process: โหลดราคาปิดของหุ้นกลุ่มหนึ่ง จัดเป็น matrix ชิดขวา แล้วคำนวณพร้อมกัน
+    """
+    closes = {}
+    rows = []
+    for symbol in symbols:
+        try:
+            values = _load_closes(symbol, period)
+        except Exception as e:
+            rows.append({"symbol": symbol, "error": str(e)})
+            continue
+        if values is None or np.isnan(values[-1]):
+            rows.append({"symbol": symbol, "error": "ไม่มีประวัติราคาในแคช"})
+        else:
+            closes[symbol] = values
+    if closes:
+        width = max(len(values) for values in closes.values())
+        prices = np.full((len(closes), width), np.nan)
+        for row, values in enumerate(closes.values()):
+            prices[row, width - len(values):] = values
+        rows.extend(screen_prices(list(closes), prices))
+    return rows
+
+
+def fetch_missing(symbols, period, batch_size=FETCH_BATCH, progress=None):
+    """
+    ดึงประวัติราคาของหุ้นที่ยังไม่มีในแคชเป็นกลุ่มด้วย history_many แล้วบันทึกลงแคช คืนค่าจำนวนหุ้นที่ดึงได้
+    """
+    provider = get_provider()
+    if not provider.cacheable or is_offline():
+        return 0
+    cache = get_history_cache()
+    missing = [symbol for symbol in symbols if not cache.covers(symbol, period)]
+    fetched = 0
+    for first in range(0, len(missing), batch_size):
+        batch = missing[first:first + batch_size]
+        for symbol, hist in provider.history_many(batch, period).items():
+            if not hist.empty:
+                cache.store(symbol, hist, period)
+                fetched += 1
+        if progress:
+            progress(min(first + batch_size, len(missing)), len(missing), "fetch")
+    return fetched
+
+
+def scan_universe(symbols, period="1y", workers=None, progress=None, data_dir=None, chunk_size=CHUNK_SIZE):
+    """
+    สแกนหุ้นทุกตัวจากแคชบนเครื่อง (หรือ data_dir) ด้วย process pool ทีละกลุ่ม คืนค่า DataFrame หุ้นละ 1 แถว
+    """
+    symbols = list(dict.fromkeys(symbols))
+    workers = workers or os.cpu_count() or 1
+    chunks = [symbols[first:first + chunk_size] for first in range(0, len(symbols), chunk_size)]
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=use_data_dir, initargs=(data_dir,)) as executor:
+        futures = [executor.submit(_screen_chunk, chunk, period) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            rows.extend(future.result())
+            if progress:
+                progress(done, len(chunks), "scan")
+    order = {symbol: i for i, symbol in enumerate(symbols)}
+    rows.sort(key=lambda row: order[row["symbol"]])
+    return pd.DataFrame(rows, columns=RESULT_FIELDS)
+
+
+def filter_results(results, query=None, sort_by=None, ascending=True):
+    """
+    กรองผลด้วยนิพจน์ของ DataFrame.query (เช่น EXAMPLE_QUERY) แล้วเรียงตามคอลัมน์ sort_by
+    หุ้นที่มีข้อผิดพลาดจะถูกตัดออกเสมอ
+    """
+    results = results[results["error"].isna()]
+    if query:
+        results = results.query(query)
+    if sort_by:
+        results = results.sort_values(sort_by, ascending=ascending, na_position="last")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สแกนหุ้นทั้งรายการหาหุ้นที่ใกล้แนวรับ/RSI ต่ำ จากข้อมูลในแคช")
+    parser.add_argument("universe_file", help="ไฟล์รายชื่อหุ้น (บรรทัดละ 1 ตัว)")
+    parser.add_argument("-p", "--period", default="1y", choices=["3mo", "6mo", "1y", "5y", "10y", "max"], help="ช่วงเวลาของข้อมูล")
+    parser.add_argument("-q", "--query", help=f'เงื่อนไขกรอง เช่น "{EXAMPLE_QUERY}"')
+    parser.add_argument("-s", "--sort", default="support_distance", help="คอลัมน์ที่ใช้เรียง")
+    parser.add_argument("--descending", action="store_true", help="เรียงจากมากไปน้อย")
+    parser.add_argument("-o", "--output", help="บันทึกผลเป็น CSV (ไม่ระบุ = แสดงบนหน้าจอ)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="จำนวน process (ค่าเริ่มต้น: จำนวนคอร์ทั้งหมด)")
+    parser.add_argument("-d", "--data-dir", help="อ่านข้อมูลจากโฟลเดอร์ (<SYMBOL>.csv/.parquet) แทนแคช")
+    parser.add_argument("--fetch", action="store_true", help="ดึงข้อมูลหุ้นที่ยังไม่มีในแคชจาก Yahoo Finance ก่อนสแกน")
+    args = parser.parse_args(argv)
+
+    symbols = load_symbols(args.universe_file)
+    if not symbols:
+        print(f"ไม่พบรายชื่อหุ้นในไฟล์ {args.universe_file}", file=sys.stderr)
+        return 1
+
+    def progress(done, total, stage):
+        print(f"[{stage} {done}/{total}]", file=sys.stderr)
+
+    if args.fetch and not args.data_dir:
+        fetched = fetch_missing(symbols, args.period, progress=progress)
+        print(f"ดึงข้อมูลเพิ่ม {fetched} ตัว", file=sys.stderr)
+
+    results = scan_universe(symbols, args.period, args.workers, progress, args.data_dir)
+    try:
+        matches = filter_results(results, args.query, args.sort, not args.descending)
+    except Exception as e:
+        print(f"เงื่อนไขไม่ถูกต้อง: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        matches.to_csv(args.output, index=False)
+    else:
+        print(matches.drop(columns="error").to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    failed = int(results["error"].notna().sum())
+    print(f"สแกน {len(symbols) - failed}/{len(symbols)} ตัว ผ่านเงื่อนไข {len(matches)} ตัว", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import yfinance as yf
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import socket
+import threading
+from contextlib import nullcontext
 from datetime import datetime
 
-plt.style.use("seaborn-v0_8-whitegrid")
-plt.rcParams.update({
-    "font.family": "Tahoma",
-    "axes.facecolor": "#ffffff",
-    "figure.facecolor": "#ffffff",
-    "axes.edgecolor": "#e5e7eb",
-    "axes.labelcolor": "#111827",
-    "xtick.color": "#6b7280",
-    "ytick.color": "#6b7280",
-    "grid.color": "#e5e7eb",
-    "grid.alpha": 0.8,
-})
+# โมดูลที่ใช้ตอนเปิดโปรแกรมมีแค่ standard library เท่านั้น
+# analysis_engine (pandas/numpy), chart_view และ backend ของ matplotlib จะ import เมื่อใช้ครั้งแรก
+# หรือถูกโหลดล่วงหน้าใน thread เบื้องหลังหลังจากหน้าต่างแสดงแล้ว (_start_warmup)
+from connectivity import get_connectivity_monitor, set_offline_mode
+import instrumentation
+from instrumentation import span
+from local_store import get_local_store
+from symbol_master import get_symbol_master, peek_symbol_master, validate_symbol
+from task_pipeline import BackgroundRunner
+
+WARMUP_MODULES = ["analysis_engine", "chart_view", "matplotlib.backends.backend_tkagg", "yfinance"]
+WARMUP_DELAY_MS = 200 # เริ่มโหลดล่วงหน้าหลังหน้าต่างแสดงผลแล้ว
+SYMBOL_HINT = "(ตัวอย่าง: AAPL, BRK-B, PTT.BK)"
+PERIODS = ["3mo", "6mo", "1y", "5y", "10y", "max"] # ตรงกับ history_cache.PERIOD_ORDER
+COMPARISON_DEFAULT_COUNT = 10 # จำนวนหุ้นเริ่มต้นในหน้าต่างเปรียบเทียบ
+LEVEL_METHODS = ["extrema", "pivot"] # ตรงกับ analysis_engine.LEVEL_METHODS (ไม่ import เพื่อให้เปิดโปรแกรมเร็ว)
+# คอลัมน์ที่แสดงในตารางผลสแกน (ชื่อคอลัมน์ของ screener.scan_universe, หัวตาราง)
+SCREENER_COLUMNS = [
+    ("symbol", "หุ้น"), ("last_close", "ราคาปิด"), ("nearest_support", "แนวรับใกล้สุด"),
+    ("support_distance", "ห่างแนวรับ %"), ("nearest_resistance", "แนวต้านใกล้สุด"),
+    ("resistance_distance", "ห่างแนวต้าน %"), ("rsi", "RSI"), ("ma50", "MA50"), ("ma200", "MA200"),
+    ("ma50_above_ma200", "MA50 > MA200"),
+]
 
 class StockSupportCalculator:
     def __init__(self, root):
@@ -27,6 +35,10 @@ class StockSupportCalculator:
         
         self.root.attributes("-fullscreen", True)
         self.root.bind("<Escape>", lambda e: self.root.attributes("-fullscreen", False))
+        # ปุ่มลัดสำหรับวัดประสิทธิภาพ: Ctrl+T เปิด/ปิดการจับเวลา, Ctrl+P profile ครั้งถัดไป, Ctrl+E ส่งออกผล
+        self.root.bind("<Control-t>", lambda e: self._toggle_timing())
+        self.root.bind("<Control-p>", lambda e: self._arm_profile())
+        self.root.bind("<Control-e>", lambda e: self._export_timings())
         self.root.configure(bg="#ffffff")
         self.root.option_add("*Font", ("Tahoma", 13))
 
@@ -35,10 +47,26 @@ class StockSupportCalculator:
         # Initialize instance variables that will hold Tkinter widgets
         # This ensures they exist before _create_main_frame tries to configure them
         self.period_var = tk.StringVar(value="3mo") # ตั้งค่าเริ่มต้นเป็น 3 เดือน
+        self.method_var = tk.StringVar(value="extrema") # วิธีคำนวณแนวรับ/แนวต้าน (analysis_engine.LEVEL_METHODS)
+        self.offline_var = tk.BooleanVar(value=False) # โหมดออฟไลน์: ใช้เฉพาะข้อมูลในแคช
+        self.monitor_var = tk.BooleanVar(value=False) # ติดตาม watchlist อัตโนมัติ
+        self.watchlist_monitor = None
+        self.monitor_summaries = {} # ราคา/RSI/แนวรับแนวต้านล่าสุดของหุ้นใน watchlist
+        self.monitor_alerts = {} # การแจ้งเตือนล่าสุดของแต่ละหุ้น (ใช้กำหนดสีใน Listbox)
         self.symbol_var = tk.StringVar()
-        self.search_history = [] # สำหรับเก็บประวัติการค้นหา
+        # watchlist, ประวัติการค้นหา, ผลคำนวณและราคาล่าสุดเก็บในฐานข้อมูล SQLite (cache/local.db)
+        self.local_store = get_local_store()
+        self.search_history = self.local_store.recent_searches() # สำหรับเก็บประวัติการค้นหา
+        self.profile_next_lookup = False # Ctrl+P: เก็บ cProfile/tracemalloc ของการค้นหาครั้งถัดไป
+        self.screener_window = None # หน้าต่างสแกนหุ้น (สร้างเมื่อเปิดครั้งแรก)
+        self.screener_results = None # ผลสแกนทั้งหมด (DataFrame) ก่อนกรอง
+        self.screener_view = None # ผลที่กรอง/เรียงแล้วและแสดงอยู่ในตาราง
+        self.screener_sort = (None, True)
+        self.comparison_window = None # หน้าต่างเปรียบเทียบหุ้น (สร้างเมื่อเปิดครั้งแรก)
+        self.comparison_chart = None
 
         self.symbol_entry = None # Will be initialized in _create_main_frame
+        self.symbol_hint_label = None # แสดงหุ้นที่ตรงกับที่พิมพ์มากที่สุดจากรายชื่อหุ้น
         self.price_label = None
         self.support_labels = []
         self.resistance_labels = []
@@ -49,32 +77,67 @@ class StockSupportCalculator:
         self.pe_label = None
         self.dividend_label = None
         self.status_label = None
+        self.connection_label = None
         self.watchlist_listbox = None
+        self.period_table = None # ตารางแนวรับ/แนวต้านของทุกช่วงเวลา
+        self.method_combo = None
         self.calc_button = None
         self.view_graph_button = None
         self.save_pdf_button = None
         self.canvas = None
         self.toolbar = None
         self.figure = None # To hold the matplotlib figure
+        self.price_chart = None # กราฟที่สร้างครั้งเดียวและใช้ซ้ำทุกครั้งที่เปิดหน้ากราฟ
+        self.chart_key = None # (หุ้น, จำนวนแท่ง, วันที่แท่งล่าสุด) ของข้อมูลที่อยู่ในกราฟ
+        self.current_chart_key = None # ค่าเดียวกันของข้อมูลที่เลือกแสดงอยู่
         self.toolbar_frame = None # To hold the toolbar frame
         self.canvas_widget = None # To hold the canvas widget
 
         self._setup_main_layout() # ตั้งค่า Layout หลักของหน้าต่าง
 
+        # งานดึงข้อมูลและคำนวณทั้งหมดทำใน thread เบื้องหลัง แล้วส่งผลกลับผ่าน root.after
+        self.runner = BackgroundRunner(self.root)
+
+        # ติดตามสถานะการเชื่อมต่อเบื้องหลัง แทนการตรวจสอบทุกครั้งที่กดคำนวณ
+        self.connectivity = get_connectivity_monitor()
+        self.connectivity.add_listener(lambda online: self.runner.call_in_main(self._update_connection_label))
+        self.connectivity.start()
+        self._update_connection_label()
+
         # ตัวแปรสำหรับเก็บข้อมูลที่คำนวณได้ เพื่อใช้ในการสร้างกราฟหรือ PDF
         self.current_hist_data = None
         self.current_support_levels = None
         self.current_resistance_levels = None
         self.current_symbol_info = None
-
-        # จัดการ Watchlist
-        self.watchlist_file = "watchlist.txt"
-        self.watchlist = self._load_watchlist()
+        self.current_symbol = None
+        self.current_history = None # CompactHistory ช่วง "max" ใน HistoryStore ทุกช่วงเวลาที่แสดงเป็น view ของข้อมูลนี้
+        self.current_periods = None # ผลของ analyze_periods: แนวรับ/แนวต้าน/RSI ของทุกช่วงเวลา
+
+        # จัดการ Watchlist (นำเข้าจาก watchlist.txt ครั้งแรก) พร้อมราคา/RSI ล่าสุดที่บันทึกไว้
+        self.local_store.import_watchlist_file()
+        self.watchlist = self.local_store.watchlist()
+        self.monitor_summaries = self.local_store.load_quotes(self.watchlist)
         self._update_watchlist_listbox()
+        self._restore_last_lookup()
 
         # จัดการเมื่อผู้ใช้ปิดหน้าต่าง
         root.protocol("WM_DELETE_WINDOW", self._on_closing)
 
+        self.root.after(WARMUP_DELAY_MS, self._start_warmup)
+
+    def _start_warmup(self):
+        """
+        import โมดูลขนาดใหญ่ล่วงหน้าใน thread เบื้องหลัง เพื่อให้การค้นหา/เปิดกราฟครั้งแรกไม่ต้องรอ
+        """
+        def warmup():
+            get_symbol_master() # โหลดรายชื่อหุ้นก่อน เพื่อให้แนะนำรหัสหุ้นได้เร็วที่สุด
+            for name in WARMUP_MODULES:
+                try:
+                    __import__(name)
+                except ImportError:
+                    pass # ไม่มีโมดูลนี้ จะแจ้งข้อผิดพลาดเมื่อใช้งานจริง
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+
     def _setup_styles(self):
         """
         ตั้งค่า Style สำหรับ ttk widgets เพื่อให้ UI ดูสวยงามและเป็นระเบียบ
@@ -134,6 +197,9 @@ class StockSupportCalculator:
 
         # ผูกปุ่ม Enter กับฟังก์ชันคำนวณในช่องกรอกหุ้น
         self.symbol_entry.bind("<Return>", lambda e: self.calculate_support())
+        # แนะนำรหัสหุ้นจากรายชื่อหุ้นบนเครื่องทุกครั้งที่พิมพ์
+        self.symbol_entry.bind("<KeyRelease>", self._on_symbol_typed)
+        self.symbol_entry.bind("<<ComboboxSelected>>", self._on_symbol_suggestion_selected)
     
     def _create_main_frame(self):
         """
@@ -156,16 +222,27 @@ class StockSupportCalculator:
         ttk.Label(symbol_row_frame, text="รหัสหุ้น:", width=10).pack(side="left", padx=(0, 10))
         self.symbol_entry = ttk.Combobox(symbol_row_frame, textvariable=self.symbol_var, values=self.search_history, font=("Tahoma", 13))
         self.symbol_entry.pack(side="left", fill="x", expand=True)
-        ttk.Label(symbol_row_frame, text="(ตัวอย่าง: AAPL, MSFT)", foreground="#555555").pack(side="left", padx=10)
+        self.symbol_hint_label = ttk.Label(symbol_row_frame, text=SYMBOL_HINT, foreground="#555555")
+        self.symbol_hint_label.pack(side="left", padx=10)
 
         period_button_row_frame = ttk.Frame(input_frame)
         period_button_row_frame.pack(fill="x", pady=8)
 
         ttk.Label(period_button_row_frame, text="ช่วงเวลา:", width=10).pack(side="left", padx=(0, 10))
         self.period_combo = ttk.Combobox(period_button_row_frame, textvariable=self.period_var, 
-                                          values=["3mo", "6mo", "1y", "5y", "10y", "max"], 
+                                          values=PERIODS, 
                                           width=7, state="readonly", font=("Tahoma", 13))
         self.period_combo.pack(side="left", padx=(0, 20))
+        self.period_combo.bind("<<ComboboxSelected>>", self._on_period_selected)
+
+        ttk.Label(period_button_row_frame, text="วิธี:").pack(side="left", padx=(0, 10))
+        self.method_combo = ttk.Combobox(period_button_row_frame, textvariable=self.method_var,
+                                         values=LEVEL_METHODS, width=8, state="readonly", font=("Tahoma", 13))
+        self.method_combo.pack(side="left", padx=(0, 20))
+        self.method_combo.bind("<<ComboboxSelected>>", self._on_method_selected)
+
+        ttk.Checkbutton(period_button_row_frame, text="โหมดออฟไลน์", variable=self.offline_var,
+                        command=self._toggle_offline_mode).pack(side="left")
 
         self.save_pdf_button = ttk.Button(period_button_row_frame, text="บันทึกกราฟเป็น PDF", command=self.save_graph_pdf)
         self.save_pdf_button.pack(side="right", padx=5)
@@ -178,12 +255,16 @@ class StockSupportCalculator:
         self.calc_button = ttk.Button(period_button_row_frame, text="คำนวณ", command=self.calculate_support)
         self.calc_button.pack(side="right", padx=5)
 
+        ttk.Button(period_button_row_frame, text="สแกนหุ้น", command=self.open_screener).pack(side="right", padx=5)
+        ttk.Button(period_button_row_frame, text="เปรียบเทียบ", command=self.open_comparison).pack(side="right", padx=5)
+
         # --- กรอบสำหรับแสดงผลข้อมูลสำคัญของหุ้น ---
         self.results_frame = ttk.LabelFrame(main_frame, text="ข้อมูลสำคัญและระดับราคา", padding=20, style="Small.TLabelframe")
         self.results_frame.grid(row=1, column=0, sticky="nsew", padx=(0, 15), pady=(0, 10))
         self.results_frame.grid_columnconfigure(0, weight=1) # ให้คอลัมน์ด้านซ้ายขยาย (price_info_frame)
         self.results_frame.grid_columnconfigure(1, weight=1) # ให้คอลัมน์ด้านขวาขยาย (company_info_frame)
         self.results_frame.grid_rowconfigure(0, weight=1) # ให้แถวภายในขยายตาม
+        self.results_frame.grid_rowconfigure(1, weight=0) # ตารางเปรียบเทียบทุกช่วงเวลา
 
         # เฟรมสำหรับแสดงราคาปัจจุบัน แนวรับ แนวต้าน
         price_info_frame = ttk.Frame(self.results_frame)
@@ -228,9 +309,25 @@ class StockSupportCalculator:
         self.pe_label = self._add_info_label(company_info_frame, "P/E Ratio (TTM):")
         self.dividend_label = self._add_info_label(company_info_frame, "อัตราเงินปันผล (%):")
 
+        # ตารางแนวรับ/แนวต้าน/RSI ของทุกช่วงเวลาเทียบกัน (คลิกแถวเพื่อสลับช่วงเวลา)
+        period_columns = ("period", "bars", "s1", "s2", "s3", "r1", "r2", "r3", "rsi")
+        period_headings = ("ช่วงเวลา", "จำนวนวัน", "แนวรับ 1", "แนวรับ 2", "แนวรับ 3",
+                           "แนวต้าน 1", "แนวต้าน 2", "แนวต้าน 3", "RSI")
+        self.period_table = ttk.Treeview(self.results_frame, columns=period_columns, show="headings",
+                                         height=len(PERIODS), selectmode="browse")
+        for column, heading in zip(period_columns, period_headings):
+            self.period_table.heading(column, text=heading)
+            self.period_table.column(column, width=90, anchor="center")
+        self.period_table.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(15, 0))
+        self.period_table.bind("<<TreeviewSelect>>", self._on_period_row_selected)
+
         # Label แสดงสถานะ
         self.status_label = ttk.Label(main_frame, text="", foreground="#888888", font=("Tahoma", 11))
-        self.status_label.grid(row=2, column=0, columnspan=2, sticky="w", pady=(10, 0), padx=(0, 10))
+        self.status_label.grid(row=2, column=0, sticky="w", pady=(10, 0), padx=(0, 10))
+
+        # Label แสดงสถานะการเชื่อมต่อ
+        self.connection_label = ttk.Label(main_frame, text="", font=("Tahoma", 11))
+        self.connection_label.grid(row=2, column=1, sticky="e", pady=(10, 0))
 
         # --- กรอบสำหรับ Watchlist ---
         watchlist_frame = ttk.LabelFrame(main_frame, text="รายการหุ้นโปรด", padding=15, style="Small.TLabelframe")
@@ -244,6 +341,8 @@ class StockSupportCalculator:
         watchlist_buttons_frame.pack(fill="x", pady=(10, 0))
         ttk.Button(watchlist_buttons_frame, text="เพิ่ม", command=self._add_to_watchlist).pack(side="left", expand=True, padx=2)
         ttk.Button(watchlist_buttons_frame, text="ลบ", command=self._remove_from_watchlist).pack(side="right", expand=True, padx=2)
+        ttk.Checkbutton(watchlist_frame, text="ติดตามอัตโนมัติ + แจ้งเตือน", variable=self.monitor_var,
+                        command=self._toggle_watchlist_monitor).pack(anchor="w", pady=(10, 0))
         
         self.watchlist_listbox.bind("<<ListboxSelect>>", self._on_watchlist_select)
 
@@ -273,7 +372,7 @@ class StockSupportCalculator:
         self.back_button = ttk.Button(self.graph_display_frame, text="กลับหน้าหลัก", command=lambda: self.show_frame("main"))
         self.back_button.grid(row=0, column=0, sticky="nw", padx=10, pady=10)
 
-        # self.canvas and self.toolbar will be created dynamically in show_graph_frame
+        # self.canvas and self.toolbar จะถูกสร้างครั้งเดียวเมื่อเปิดหน้ากราฟครั้งแรก (show_graph_frame)
 
     def show_frame(self, frame_name):
         """
@@ -286,126 +385,53 @@ class StockSupportCalculator:
         # แสดง Frame ที่ต้องการ และให้ขยายเต็มพื้นที่ของ container_frame
         frame.grid(row=0, column=0, sticky="nsew", in_=self.container_frame)
 
-    def has_internet(self):
+    def _toggle_offline_mode(self):
         """
-        ตรวจสอบการเชื่อมต่ออินเทอร์เน็ต
+        เปิด/ปิดโหมดออฟไลน์ตาม Checkbutton
         """
-        try:
-            socket.create_connection(("8.8.8.8", 53), timeout=2)
-            return True
-        except OSError:
-            return False
+        set_offline_mode(self.offline_var.get())
+        self._update_connection_label()
 
-    def find_support_levels(self, hist):
+    def _update_connection_label(self):
         """
-        คำนวณระดับแนวรับ 3 ระดับ
+        แสดงสถานะการเชื่อมต่อ/โหมดออฟไลน์ที่มุมล่างขวา
         """
-        close_prices = hist['Close']
-        
-        if close_prices.empty:
-            return []
-
-        # หาจุดต่ำสุดในท้องถิ่น (local minima)
-        local_minima = close_prices[(close_prices.shift(1) > close_prices) & (close_prices.shift(-1) > close_prices)]
-
-        # เลือก 3 จุดต่ำสุดที่เล็กที่สุด (แนวรับที่แข็งแกร่งที่สุด)
-        support_levels = local_minima.nsmallest(3).sort_values(ascending=True)
-
-        final_supports = support_levels.tolist()
-
-        # หากมีแนวรับไม่ถึง 3 ระดับ ให้เพิ่มระดับโดยใช้ค่าต่ำสุดรวม หรือคำนวณจากราคาปัจจุบัน
-        if len(final_supports) < 3:
-            min_overall = close_prices.min()
-            
-            # เพิ่มค่าต่ำสุดรวมหากยังไม่มีอยู่ในแนวรับที่พบ
-            if not any(abs(lvl - min_overall) < 0.01 for lvl in final_supports):
-                final_supports.append(min_overall)
-            
-            final_supports = sorted(list(set([round(x, 2) for x in final_supports])))
-
-            while len(final_supports) < 3:
-                if final_supports:
-                    last_known_support = sorted(final_supports)[0] # ใช้แนวรับที่ต่ำที่สุดที่พบ
-                    new_lower_support = last_known_support * 0.95 # ลดลง 5% จากแนวรับนั้น
-                    
-                    # ตรวจสอบไม่ให้ค่าแนวรับที่สร้างขึ้นต่ำกว่า 90% ของค่าต่ำสุดในประวัติ
-                    if new_lower_support < close_prices.min() * 0.9:
-                        new_lower_support = close_prices.min() * 0.9
-                    
-                    # เพิ่มเข้าไปถ้ายังไม่มีค่าใกล้เคียง
-                    if not any(abs(lvl - new_lower_support) < 0.01 for lvl in final_supports):
-                        final_supports.append(new_lower_support)
-                    else: # ถ้าค่าที่คำนวณซ้ำกัน ให้หยุด
-                        break 
-                else: # กรณีไม่พบแนวรับเลย (ข้อมูลน้อยมาก)
-                    last_price = close_prices.iloc[-1] if not close_prices.empty else 100
-                    final_supports.extend([last_price * 0.98, last_price * 0.95, last_price * 0.92])
-                    final_supports = sorted(list(set([round(x, 2) for x in final_supports])))[:3]
-                    break
-        
-        return sorted(list(set([round(x, 2) for x in final_supports])))[:3]
+        if self.offline_var.get():
+            self.connection_label.config(text="● โหมดออฟไลน์ (ใช้ข้อมูลในแคช)", foreground="#888888")
+        elif self.connectivity.online:
+            self.connection_label.config(text="● ออนไลน์", foreground="#228833")
+        else:
+            self.connection_label.config(text="● ไม่มีการเชื่อมต่อ (ใช้ข้อมูลในแคช)", foreground="#cc3333")
 
-    def find_resistance_levels(self, hist):
+    def _toggle_timing(self):
         """
-        คำนวณระดับแนวต้าน 3 ระดับ
+        เปิด/ปิดการจับเวลาแต่ละขั้นตอน (แสดงผลใน status_label หลังค้นหาเสร็จ)
         """
-        close_prices = hist['Close']
-        
-        if close_prices.empty:
-            return []
-
-        # หาจุดสูงสุดในท้องถิ่น (local maxima)
-        local_maxima = close_prices[(close_prices.shift(1) < close_prices) & (close_prices.shift(-1) < close_prices)]
-        
-        # เลือก 3 จุดสูงสุดที่ใหญ่ที่สุด (แนวต้านที่แข็งแกร่งที่สุด)
-        resistance_levels = local_maxima.nlargest(3).sort_values(ascending=True) 
-        
-        final_resistances = resistance_levels.tolist()
-
-        # หากมีแนวต้านไม่ถึง 3 ระดับ ให้เพิ่มระดับโดยใช้ค่าสูงสุดรวม หรือคำนวณจากราคาปัจจุบัน
-        if len(final_resistances) < 3:
-            max_overall = close_prices.max()
-            if not any(abs(lvl - max_overall) < 0.01 for lvl in final_resistances):
-                final_resistances.append(max_overall)
-
-            final_resistances = sorted(list(set([round(x, 2) for x in final_resistances])))
-
-            while len(final_resistances) < 3:
-                if final_resistances:
-                    last_known_resistance = sorted(final_resistances, reverse=True)[0] # ใช้แนวต้านที่สูงสุดที่พบ
-                    new_higher_resistance = last_known_resistance * 1.05 # เพิ่มขึ้น 5% จากแนวต้านนั้น
-                    
-                    # ตรวจสอบไม่ให้ค่าแนวต้านที่สร้างขึ้นสูงกว่า 110% ของค่าสูงสุดในประวัติ
-                    if new_higher_resistance > close_prices.max() * 1.1:
-                           new_higher_resistance = close_prices.max() * 1.1
-                    
-                    # เพิ่มเข้าไปถ้ายังไม่มีค่าใกล้เคียง
-                    if not any(abs(lvl - new_higher_resistance) < 0.01 for lvl in final_resistances):
-                        final_resistances.append(new_higher_resistance)
-                    else: # ถ้าค่าที่คำนวณซ้ำกัน ให้หยุด
-                        break
-                else: # กรณีไม่พบแนวต้านเลย (ข้อมูลน้อยมาก)
-                    last_price = close_prices.iloc[-1] if not close_prices.empty else 100
-                    final_resistances.extend([last_price * 1.02, last_price * 1.05, last_price * 1.08])
-                    final_resistances = sorted(list(set([round(x, 2) for x in final_resistances])))[-3:]
-                    break
-        
-        return sorted(list(set([round(x, 2) for x in final_resistances])))[-3:]
+        instrumentation.enable(not instrumentation.is_enabled())
+        state = "เปิด" if instrumentation.is_enabled() else "ปิด"
+        self.status_label.config(text=f"{state}การจับเวลาแต่ละขั้นตอน (Ctrl+E เพื่อส่งออกผล)")
 
-    def calculate_rsi(self, series, window=14):
+    def _arm_profile(self):
         """
-        คำนวณค่า Relative Strength Index (RSI)
+        เก็บ cProfile และ tracemalloc ของการค้นหาครั้งถัดไป
         """
-        delta = series.diff()
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
+        self.profile_next_lookup = True
+        self.status_label.config(text=f"จะเก็บ profile ของการค้นหาครั้งถัดไปไว้ที่ {instrumentation.PROFILE_DIR}")
 
-        avg_gain = gain.ewm(com=window-1, adjust=False).mean()
-        avg_loss = loss.ewm(com=window-1, adjust=False).mean()
-
-        rs = avg_gain / avg_loss.replace(0, 1e-10) # ป้องกันหารด้วยศูนย์
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+    def _export_timings(self):
+        """
+        บันทึกสรุปเวลา (p50/p95/max) เป็น JSON และ event ทั้งหมดเป็น Chrome trace
+        """
+        file_path = filedialog.asksaveasfilename(defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            initialfile="timings.json"
+        )
+        if file_path:
+            recorder = instrumentation.get_recorder()
+            trace_path = file_path.rsplit(".", 1)[0] + ".trace.json"
+            recorder.export_json(file_path)
+            recorder.export_chrome_trace(trace_path)
+            messagebox.showinfo("บันทึกสำเร็จ", f"บันทึกสรุปเวลา: {file_path}\nChrome trace: {trace_path}")
 
     def save_graph_pdf(self):
         """
@@ -422,31 +448,14 @@ class StockSupportCalculator:
         if file_path:
             try:
                 # สร้าง Figure ชั่วคราวเพื่อบันทึก
-                temp_figure = self._create_graph_figure(self.current_hist_data, self.current_support_levels, self.current_resistance_levels, self.current_symbol_info)
-                temp_figure.savefig(file_path, format='pdf', bbox_inches='tight')
-                plt.close(temp_figure) # ปิด Figure ชั่วคราวเพื่อไม่ให้ค้างในหน่วยความจำ
+                with span("pdf.create_figure"):
+                    temp_figure = self._create_graph_figure(self.current_hist_data, self.current_support_levels, self.current_resistance_levels, self.current_symbol_info, self.current_symbol)
+                with span("pdf.savefig"):
+                    temp_figure.savefig(file_path, format='pdf', bbox_inches='tight')
                 messagebox.showinfo("บันทึกสำเร็จ", f"บันทึกไฟล์ PDF: {file_path}")
             except Exception as e:
                 messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถบันทึกไฟล์ PDF ได้\n{e}")
 
-    def _load_watchlist(self):
-        """
-        โหลดรายการหุ้นโปรดจากไฟล์
-        """
-        try:
-            with open(self.watchlist_file, "r") as f:
-                return [line.strip().upper() for line in f if line.strip()]
-        except FileNotFoundError:
-            return []
-
-    def _save_watchlist(self):
-        """
-        บันทึกรายการหุ้นโปรดลงไฟล์
-        """
-        with open(self.watchlist_file, "w") as f:
-            for symbol in self.watchlist:
-                f.write(symbol + "\n")
-
     def _update_watchlist_listbox(self):
         """
         อัปเดต Listbox แสดงรายการหุ้นโปรด
@@ -455,7 +464,75 @@ class StockSupportCalculator:
         if self.watchlist_listbox:
             self.watchlist_listbox.delete(0, tk.END)
             for symbol in self.watchlist:
-                self.watchlist_listbox.insert(tk.END, symbol)
+                summary = self.monitor_summaries.get(symbol)
+                if summary:
+                    self.watchlist_listbox.insert(tk.END, f"{symbol}  {summary['last_close']:.2f}  RSI {summary['rsi']:.1f}")
+                else:
+                    self.watchlist_listbox.insert(tk.END, symbol)
+                kind = self.monitor_alerts.get(symbol)
+                if kind:
+                    color = "#228833" if kind.endswith("_up") or kind == "rsi_overbought" else "#cc3333"
+                    self.watchlist_listbox.itemconfig(tk.END, foreground=color)
+
+    def _toggle_watchlist_monitor(self):
+        """
+        เปิด/ปิดการติดตาม watchlist อัตโนมัติ (รีเฟรชตามรอบเบื้องหลังและแจ้งเตือนเมื่อราคาตัดผ่านแนวรับ/แนวต้าน)
+        """
+        if not self.monitor_var.get():
+            if self.watchlist_monitor:
+                self.watchlist_monitor.stop()
+            self.status_label.config(text="หยุดติดตาม watchlist แล้ว")
+            return
+
+        if self.watchlist_monitor is None:
+            from watchlist_monitor import WatchlistMonitor
+            self.watchlist_monitor = WatchlistMonitor(
+                on_update=self._on_monitor_refreshed,
+                on_alert=lambda alerts: self.runner.call_in_main(self._on_monitor_alerts, alerts),
+                on_error=lambda error: self.runner.call_in_main(self._on_monitor_error, error),
+            )
+        self.watchlist_monitor.set_symbols(self.watchlist)
+        self.watchlist_monitor.start()
+        self.status_label.config(text=f"กำลังติดตาม {len(self.watchlist)} หุ้นใน watchlist...")
+
+    def _on_monitor_refreshed(self, summaries):
+        """
+        เรียกจาก thread ของ WatchlistMonitor: บันทึกราคาล่าสุดลงฐานข้อมูลแล้วส่งไปอัปเดต UI
+        """
+        if summaries:
+            self.local_store.save_quotes(summaries)
+        self.runner.call_in_main(self._on_monitor_update, summaries)
+
+    def _on_monitor_update(self, summaries):
+        """
+        อัปเดตราคา/RSI ใน Listbox เมื่อรีเฟรชเสร็จ (เรียกบน main thread)
+        """
+        if not summaries:
+            return
+        for summary in summaries:
+            self.monitor_summaries[summary["symbol"]] = summary
+        self._update_watchlist_listbox()
+
+    def _on_monitor_alerts(self, alerts):
+        """
+        แจ้งเตือนเมื่อราคาตัดผ่านแนวรับ/แนวต้าน หรือ RSI ผ่านระดับ 30/70 (เรียกบน main thread)
+        """
+        for alert in alerts:
+            self.monitor_alerts[alert["symbol"]] = alert["kind"]
+        more = f" (และอีก {len(alerts) - 1} รายการ)" if len(alerts) > 1 else ""
+        self.status_label.config(text=f"🔔 {alerts[-1]['message']}{more}")
+        self.root.bell()
+        self._update_watchlist_listbox()
+
+    def _on_monitor_error(self, error):
+        """
+        รีเฟรช watchlist ล้มเหลวด้วยข้อผิดพลาดที่ไม่ใช่เครือข่าย (เรียกบน main thread) ยังติดตามต่อในรอบถัดไป
+        """
+        self.status_label.config(text=f"⚠ รีเฟรช watchlist ไม่สำเร็จ: {error}")
+
+    def _sync_watchlist_monitor(self):
+        if self.watchlist_monitor and self.watchlist_monitor.running:
+            self.watchlist_monitor.set_symbols(self.watchlist)
 
     def _add_to_watchlist(self):
         """
@@ -465,14 +542,16 @@ class StockSupportCalculator:
         if not symbol:
             messagebox.showwarning("คำเตือน", "กรุณากรอกรหัสหุ้นที่จะเพิ่ม")
             return
-        if not symbol.isalnum():
-            messagebox.showwarning("คำเตือน", "รหัสหุ้นไม่ถูกต้อง (ตัวอักษรหรือตัวเลขเท่านั้น)")
+        error = validate_symbol(symbol, wait=False) # ไม่หยุดรอโหลดรายชื่อหุ้นบน main thread
+        if error:
+            messagebox.showwarning("คำเตือน", error)
             return
 
         if symbol not in self.watchlist:
             self.watchlist.append(symbol)
+            self.local_store.add_to_watchlist(symbol)
             self._update_watchlist_listbox()
-            self._save_watchlist()
+            self._sync_watchlist_monitor()
             messagebox.showinfo("สำเร็จ", f"เพิ่ม {symbol} เข้าสู่รายการโปรดแล้ว")
         else:
             messagebox.showinfo("แจ้งเตือน", f"{symbol} มีอยู่ในรายการโปรดแล้ว")
@@ -483,10 +562,12 @@ class StockSupportCalculator:
         """
         selected_index = self.watchlist_listbox.curselection()
         if selected_index:
-            symbol_to_remove = self.watchlist_listbox.get(selected_index[0])
-            self.watchlist.pop(selected_index[0])
+            symbol_to_remove = self.watchlist.pop(selected_index[0])
+            self.monitor_summaries.pop(symbol_to_remove, None)
+            self.monitor_alerts.pop(symbol_to_remove, None)
+            self.local_store.remove_from_watchlist(symbol_to_remove)
             self._update_watchlist_listbox()
-            self._save_watchlist()
+            self._sync_watchlist_monitor()
             messagebox.showinfo("สำเร็จ", f"ลบ {symbol_to_remove} ออกจากรายการโปรดแล้ว")
         else:
             messagebox.showwarning("คำเตือน", "กรุณาเลือกหุ้นที่ต้องการลบ")
@@ -497,80 +578,280 @@ class StockSupportCalculator:
         """
         selected_index = self.watchlist_listbox.curselection()
         if selected_index:
-            symbol = self.watchlist_listbox.get(selected_index[0])
+            symbol = self.watchlist[selected_index[0]] # ข้อความใน Listbox อาจมีราคา/RSI ต่อท้าย
+            self.monitor_alerts.pop(symbol, None)
             self.symbol_var.set(symbol)
+            # แสดงข้อมูลบริษัทจากแคชทันทีโดยไม่ต้องรอเครือข่าย
+            from analysis_engine import get_info_cache
+            cached_info = get_info_cache().peek(symbol)
+            if cached_info:
+                self._show_company_info(symbol, cached_info)
             self.calculate_support()
 
+    def open_screener(self):
+        """
+        เปิดหน้าต่างสแกนหุ้นจากไฟล์รายชื่อ (ใช้ข้อมูลในแคชบนเครื่อง) เพื่อหาหุ้นที่ใกล้แนวรับ/RSI ต่ำ
+        """
+        from screener import EXAMPLE_QUERY
+
+        if self.screener_window is not None and self.screener_window.winfo_exists():
+            self.screener_window.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("สแกนหุ้น")
+        window.geometry("1200x700")
+        window.configure(bg="#ffffff")
+        self.screener_window = window
+
+        controls = ttk.Frame(window, padding=10)
+        controls.pack(fill="x")
+        self.screener_file_var = tk.StringVar(value="") # ว่าง = ใช้ watchlist ปัจจุบันของโปรแกรม
+        self.screener_query_var = tk.StringVar(value=EXAMPLE_QUERY)
+        self.screener_fetch_var = tk.BooleanVar(value=False)
+        ttk.Label(controls, text="ไฟล์รายชื่อ (ว่าง = watchlist):").pack(side="left")
+        ttk.Entry(controls, textvariable=self.screener_file_var, width=25).pack(side="left", padx=5)
+        ttk.Button(controls, text="เลือก...", command=self._choose_universe_file).pack(side="left", padx=(0, 15))
+        ttk.Label(controls, text="เงื่อนไข:").pack(side="left")
+        query_entry = ttk.Entry(controls, textvariable=self.screener_query_var, width=40)
+        query_entry.pack(side="left", padx=5)
+        query_entry.bind("<Return>", lambda e: self._apply_screener_filter())
+        ttk.Checkbutton(controls, text="ดึงข้อมูลที่ไม่มีในแคช", variable=self.screener_fetch_var).pack(side="left", padx=10)
+        ttk.Button(controls, text="บันทึก CSV", command=self._save_screener_csv).pack(side="right", padx=5)
+        ttk.Button(controls, text="สแกน", command=self._run_screener).pack(side="right", padx=5)
+
+        table_frame = ttk.Frame(window, padding=(10, 0))
+        table_frame.pack(fill="both", expand=True)
+        columns = [column for column, _ in SCREENER_COLUMNS]
+        self.screener_table = ttk.Treeview(table_frame, columns=columns, show="headings")
+        for column, heading in SCREENER_COLUMNS:
+            # คลิกหัวคอลัมน์เพื่อเรียง (คลิกซ้ำเพื่อสลับมาก/น้อย)
+            self.screener_table.heading(column, text=heading, command=lambda c=column: self._sort_screener(c))
+            self.screener_table.column(column, width=110, anchor="center")
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.screener_table.yview)
+        self.screener_table.configure(yscrollcommand=scrollbar.set)
+        self.screener_table.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.screener_table.bind("<Double-1>", self._on_screener_open_symbol)
+
+        self.screener_status = ttk.Label(window, text="ดับเบิลคลิกหุ้นเพื่อดูรายละเอียด", foreground="#888888",
+                                         font=("Tahoma", 11), padding=10)
+        self.screener_status.pack(anchor="w")
+
+    def _choose_universe_file(self):
+        path = filedialog.askopenfilename(parent=self.screener_window,
+                                          filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            self.screener_file_var.set(path)
+
+    def _run_screener(self):
+        """
+        ส่งงานสแกนไปทำเบื้องหลัง (คำนวณใน process pool) ผลจะถูกกรองด้วยเงื่อนไขปัจจุบันเมื่อเสร็จ
+        """
+        self.screener_status.config(text="กำลังสแกน...")
+        self.runner.submit("screener", self._screener_job, self.screener_file_var.get().strip(), list(self.watchlist),
+                           self.period_var.get(), self.screener_fetch_var.get(),
+                           on_progress=self._on_screener_progress,
+                           on_success=self._on_screener_done,
+                           on_error=self._on_screener_error)
+
+    def _screener_job(self, task, path, watchlist, period, fetch):
+        from batch_analysis import load_symbols
+        from screener import fetch_missing, scan_universe
+
+        symbols = load_symbols(path) if path else watchlist
+        if fetch:
+            fetch_missing(symbols, period, progress=lambda done, total, stage: task.progress(stage, (done, total)))
+        results = scan_universe(symbols, period, progress=lambda done, total, stage: task.progress(stage, (done, total)))
+        task.check_cancelled()
+        return results
+
+    def _on_screener_progress(self, stage, payload):
+        if not self.screener_window.winfo_exists():
+            return
+        done, total = payload
+        text = "กำลังดึงข้อมูลที่ไม่มีในแคช" if stage == "fetch" else "กำลังสแกน"
+        self.screener_status.config(text=f"{text} {done}/{total}...")
+
+    def _on_screener_done(self, results):
+        self.screener_results = results
+        if self.screener_window.winfo_exists():
+            self._apply_screener_filter()
+
+    def _on_screener_error(self, error):
+        if self.screener_window.winfo_exists():
+            self.screener_status.config(text="")
+        messagebox.showerror("ข้อผิดพลาด", f"สแกนหุ้นไม่สำเร็จ\n{error}", parent=self.screener_window)
+
+    def _apply_screener_filter(self):
+        """
+        กรองผลสแกนด้วยเงื่อนไขในช่องเงื่อนไข (รูปแบบ DataFrame.query) โดยไม่ต้องสแกนใหม่
+        """
+        from screener import filter_results
+
+        if self.screener_results is None:
+            return
+        column, ascending = self.screener_sort
+        try:
+            view = filter_results(self.screener_results, self.screener_query_var.get().strip(), column, ascending)
+        except Exception as e:
+            messagebox.showerror("ข้อผิดพลาด", f"เงื่อนไขไม่ถูกต้อง\n{e}", parent=self.screener_window)
+            return
+        self.screener_view = view
+        self._fill_screener_table()
+        failed = int(self.screener_results["error"].notna().sum())
+        self.screener_status.config(text=f"ผ่านเงื่อนไข {len(view)} จาก {len(self.screener_results) - failed} ตัว"
+                                         + (f" (ไม่มีข้อมูลในแคช {failed} ตัว)" if failed else ""))
+
+    def _fill_screener_table(self):
+        self.screener_table.delete(*self.screener_table.get_children())
+        for row in self.screener_view.itertuples(index=False):
+            values = []
+            for column, _ in SCREENER_COLUMNS:
+                value = getattr(row, column)
+                if isinstance(value, float):
+                    value = "-" if value != value else f"{value:.2f}" # value != value คือ NaN
+                elif isinstance(value, bool):
+                    value = "✓" if value else ""
+                values.append(value)
+            self.screener_table.insert("", "end", values=values)
+
+    def _sort_screener(self, column):
+        if self.screener_view is None:
+            return
+        previous, ascending = self.screener_sort
+        ascending = not ascending if previous == column else True
+        self.screener_sort = (column, ascending)
+        self.screener_view = self.screener_view.sort_values(column, ascending=ascending, na_position="last")
+        self._fill_screener_table()
+
+    def _save_screener_csv(self):
+        if self.screener_view is None:
+            messagebox.showwarning("คำเตือน", "กรุณาสแกนหุ้นก่อน", parent=self.screener_window)
+            return
+        file_path = filedialog.asksaveasfilename(parent=self.screener_window, defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            initialfile="screener.csv"
+        )
+        if file_path:
+            self.screener_view.to_csv(file_path, index=False)
+
+    def _on_screener_open_symbol(self, event):
+        """
+        ดับเบิลคลิกแถวในผลสแกน: โหลดหุ้นตัวนั้นในหน้าหลัก
+        """
+        selection = self.screener_table.selection()
+        if not selection:
+            return
+        self.symbol_var.set(self.screener_table.item(selection[0], "values")[0])
+        self.calculate_support()
+
+    def open_comparison(self):
+        """
+        เปิดหน้าต่างเปรียบเทียบหลายหุ้น (เส้นราคาเริ่มที่ 100, ความแข็งแกร่งเทียบหุ้นอ้างอิง และ correlation)
+        """
+        if self.comparison_window is not None and self.comparison_window.winfo_exists():
+            self.comparison_window.lift()
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from chart_view import ComparisonChart
+
+        window = tk.Toplevel(self.root)
+        window.title("เปรียบเทียบหุ้น")
+        window.geometry("1400x800")
+        window.configure(bg="#ffffff")
+        self.comparison_window = window
+
+        controls = ttk.Frame(window, padding=10)
+        controls.pack(fill="x")
+        # ค่าเริ่มต้น: หุ้นที่เปิดดูอยู่ (เป็นหุ้นอ้างอิง) ตามด้วยหุ้นใน watchlist
+        default_symbols = list(dict.fromkeys(([self.current_symbol] if self.current_symbol else []) + self.watchlist))
+        self.comparison_symbols_var = tk.StringVar(value=", ".join(default_symbols[:COMPARISON_DEFAULT_COUNT]))
+        self.comparison_period_var = tk.StringVar(value="1y")
+        ttk.Label(controls, text="หุ้น (ตัวแรกเป็นหุ้นอ้างอิง):").pack(side="left")
+        symbols_entry = ttk.Entry(controls, textvariable=self.comparison_symbols_var, width=60)
+        symbols_entry.pack(side="left", padx=5)
+        symbols_entry.bind("<Return>", lambda e: self._run_comparison())
+        ttk.Label(controls, text="ช่วงเวลา:").pack(side="left", padx=(15, 5))
+        ttk.Combobox(controls, textvariable=self.comparison_period_var, values=PERIODS, width=7,
+                     state="readonly").pack(side="left")
+        ttk.Button(controls, text="เปรียบเทียบ", command=self._run_comparison).pack(side="left", padx=15)
+        self.comparison_status = ttk.Label(controls, text="", foreground="#888888", font=("Tahoma", 11))
+        self.comparison_status.pack(side="left")
+
+        self.comparison_chart = ComparisonChart()
+        canvas = FigureCanvasTkAgg(self.comparison_chart.figure, master=window)
+        toolbar = NavigationToolbar2Tk(canvas, window, pack_toolbar=False)
+        toolbar.pack(fill="x")
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        if default_symbols:
+            self._run_comparison()
+
+    def _run_comparison(self):
+        """
+        ตรวจรหัสหุ้นแล้วส่งงานดึงข้อมูลพร้อมกันและจัดวันที่ไปทำเบื้องหลัง
+        """
+        symbols = list(dict.fromkeys(self.comparison_symbols_var.get().upper().replace(",", " ").split()))
+        invalid = [symbol for symbol in symbols if validate_symbol(symbol, wait=False)]
+        if invalid:
+            messagebox.showwarning("คำเตือน", f"รหัสหุ้นไม่ถูกต้อง: {', '.join(invalid)}", parent=self.comparison_window)
+            return
+        if len(symbols) < 2:
+            messagebox.showwarning("คำเตือน", "กรุณากรอกหุ้นอย่างน้อย 2 ตัว", parent=self.comparison_window)
+            return
+        self.comparison_status.config(text=f"กำลังโหลดข้อมูล {len(symbols)} หุ้น...")
+        self.runner.submit("comparison", self._comparison_job, symbols, self.comparison_period_var.get(),
+                           on_progress=self._on_comparison_progress,
+                           on_success=self._on_comparison_done,
+                           on_error=self._on_comparison_error)
+
+    def _comparison_job(self, task, symbols, period):
+        from comparison import compare
+
+        with span("comparison.total", symbols=len(symbols), period=period):
+            data = compare(symbols, period, benchmark=symbols[0],
+                           progress=lambda done, total, symbol: task.progress("fetch", (done, total)))
+        task.check_cancelled()
+        return data
+
+    def _on_comparison_progress(self, stage, payload):
+        if self.comparison_window.winfo_exists():
+            done, total = payload
+            self.comparison_status.config(text=f"กำลังโหลดข้อมูล {done}/{total}...")
+
+    def _on_comparison_done(self, data):
+        if not self.comparison_window.winfo_exists():
+            return
+        status = f"{len(data['symbols'])} หุ้น {len(data['days'])} วัน"
+        if data["errors"]:
+            status += f" (โหลดไม่ได้: {', '.join(data['errors'])})"
+        self.comparison_status.config(text=status)
+        if len(data["symbols"]):
+            self.comparison_chart.set_data(data)
+            self.comparison_chart.figure.canvas.draw_idle()
+
+    def _on_comparison_error(self, error):
+        if self.comparison_window.winfo_exists():
+            self.comparison_status.config(text="")
+        messagebox.showerror("ข้อผิดพลาด", f"เปรียบเทียบหุ้นไม่สำเร็จ\n{error}", parent=self.comparison_window)
+
     def _on_closing(self):
         """
-        จัดการการบันทึก watchlist ก่อนปิดโปรแกรม
+        หยุดงานเบื้องหลังก่อนปิดโปรแกรม (watchlist และผลต่างๆ ถูกบันทึกลงฐานข้อมูลทันทีที่เปลี่ยนแล้ว)
         """
-        self._save_watchlist()
+        self.connectivity.stop()
+        if self.watchlist_monitor:
+            self.watchlist_monitor.stop()
+        self.runner.shutdown()
         self.root.destroy()
 
-    def _create_graph_figure(self, hist, supports, resistances, info):
+    def _create_graph_figure(self, hist, supports, resistances, info, symbol=None):
         """
-        สร้าง Figure Matplotlib สำหรับแสดงกราฟราคา, RSI และ Volume
+        สร้าง Figure Matplotlib ใหม่สำหรับแสดงกราฟราคา, RSI และ Volume (ใช้สำหรับบันทึกไฟล์)
         """
-        # สร้าง subplot 3 แถว โดยแถวบนสุด (ราคา) มีขนาดใหญ่กว่า
-        figure = plt.Figure(figsize=(10, 7), dpi=100, facecolor="white")
-        gs = figure.add_gridspec(3, 1, height_ratios=[3, 1, 1], hspace=0) # hspace=0 เพื่อให้กราฟติดกัน
-        ax_price = figure.add_subplot(gs[0, 0])
-        ax_rsi = figure.add_subplot(gs[1, 0], sharex=ax_price) # แชร์แกน X กับ ax_price
-        ax_volume = figure.add_subplot(gs[2, 0], sharex=ax_price) # แชร์แกน X กับ ax_price
-
-        # พล็อตกราฟราคาปิด
-        ax_price.plot(hist.index, hist['Close'], label="ราคาปิด", color="#0077cc")
-        
-        # พล็อตกราฟ Moving Average 50 วัน
-        hist['MA50'] = hist['Close'].rolling(window=50).mean()
-        ax_price.plot(hist.index, hist['MA50'], label="MA 50", color="orange")
-        # พล็อตกราฟ Moving Average 200 วัน (ถ้ามีข้อมูลพอ)
-        if len(hist) >= 200:
-            hist['MA200'] = hist['Close'].rolling(window=200).mean()
-            ax_price.plot(hist.index, hist['MA200'], label="MA 200", color="green")
-        
-        # พล็อตเส้นแนวรับ
-        for i, level in enumerate(supports):
-            label_text = f"แนวรับต่ำสุด ({level:.2f})" if i == 0 else \
-                         f"แนวรับรอง ({level:.2f})" if i == 1 else \
-                         f"แนวรับสูงสุด ({level:.2f})"
-            ax_price.axhline(level, color="red", linestyle="--", linewidth=1, label=label_text)
-        
-        # พล็อตเส้นแนวต้าน
-        for i, level in enumerate(resistances):
-            label_text = f"แนวต้านต่ำสุด ({level:.2f})" if i == 0 else \
-                         f"แนวต้านรอง ({level:.2f})" if i == 1 else \
-                         f"แนวต้านสูงสุด ({level:.2f})"
-            ax_price.axhline(level, color="purple", linestyle="--", linewidth=1, label=label_text)
-
-        ax_price.set_title(f"กราฟราคา {info.get('longName', info.get('symbol', 'N/A'))} และตัวชี้วัด", loc='left')
-        ax_price.set_ylabel("ราคา (USD)")
-        ax_price.legend(loc="upper left", fontsize=8)
-        ax_price.grid(True)
-        plt.setp(ax_price.get_xticklabels(), visible=False) # ซ่อน label แกน X เพื่อความเรียบร้อย
-
-        # พล็อตกราฟ RSI
-        hist['RSI'] = self.calculate_rsi(hist['Close'])
-        ax_rsi.plot(hist.index, hist['RSI'], label="RSI (14)", color="blue")
-        ax_rsi.axhline(70, color='red', linestyle=':', linewidth=0.8, label='Overbought (70)')
-        ax_rsi.axhline(30, color='green', linestyle=':', linewidth=0.8, label='Oversold (30)')
-        ax_rsi.set_ylabel("RSI")
-        ax_rsi.set_ylim(0, 100) # กำหนดช่วง RSI
-        ax_rsi.legend(loc="upper left", fontsize=8)
-        ax_rsi.grid(True)
-        plt.setp(ax_rsi.get_xticklabels(), visible=False) # ซ่อน label แกน X เพื่อความเรียบร้อย
-
-        # พล็อตกราฟ Volume
-        ax_volume.bar(hist.index, hist['Volume'], color='gray', alpha=0.7, label="ปริมาณการซื้อขาย")
-        ax_volume.set_ylabel("Volume")
-        ax_volume.set_xlabel("วันที่")
-        ax_volume.ticklabel_format(style='plain', axis='y') # แสดงเลขแบบปกติ
-        ax_volume.legend(loc="upper left", fontsize=8)
-        ax_volume.grid(True)
-
-        figure.tight_layout(rect=[0, 0, 1, 0.96]) # ปรับ layout ให้สวยงาม
-        return figure
+        from chart_view import PriceChart
+        chart = PriceChart()
+        chart.set_data(hist, supports, resistances, info, symbol)
+        return chart.figure
 
     def show_graph_frame(self):
         """
@@ -580,30 +861,91 @@ class StockSupportCalculator:
             messagebox.showwarning("คำเตือน", "กรุณาคำนวณข้อมูลหุ้นก่อนดูกราฟ")
             return
 
-        # ล้าง widgets เก่าใน graph_display_frame ที่เกี่ยวข้องกับกราฟและ toolbar
-        for widget in self.graph_display_frame.winfo_children():
-            if widget != self.back_button: # ไม่ต้องทำลาย back_button
-                widget.destroy()
-        
-        # สร้าง Figure ใหม่และ Canvas ใหม่ทุกครั้ง
-        self.figure = self._create_graph_figure(self.current_hist_data, self.current_support_levels, self.current_resistance_levels, self.current_symbol_info)
-        self.canvas = FigureCanvasTkAgg(self.figure, master=self.graph_display_frame)
-        self.canvas_widget = self.canvas.get_tk_widget()
-        # วาง canvas ในแถวที่ 1, คอลัมน์ 0 และให้ขยายเต็มพื้นที่ที่เหลือ
-        self.canvas_widget.grid(row=1, column=0, sticky="nsew", columnspan=2) 
-
-        # สร้าง toolbar ใหม่
-        self.toolbar_frame = ttk.Frame(self.graph_display_frame)
-        self.toolbar_frame.grid(row=0, column=1, sticky="ew") # วางในแถวเดียวกับปุ่ม แต่คอลัมน์ขวา
-        self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
-        self.toolbar.update()
-        
-        self.canvas.draw() # วาดกราฟ
+        if self.price_chart is None:
+            # สร้าง Figure, Canvas และ toolbar เพียงครั้งเดียว ครั้งต่อไปเปลี่ยนเฉพาะข้อมูล
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+            from chart_view import PriceChart
+            self.price_chart = PriceChart(blit=True)
+            self.figure = self.price_chart.figure
+            self.canvas = FigureCanvasTkAgg(self.figure, master=self.graph_display_frame)
+            self.canvas_widget = self.canvas.get_tk_widget()
+            # วาง canvas ในแถวที่ 1, คอลัมน์ 0 และให้ขยายเต็มพื้นที่ที่เหลือ
+            self.canvas_widget.grid(row=1, column=0, sticky="nsew", columnspan=2)
+
+            self.toolbar_frame = ttk.Frame(self.graph_display_frame)
+            self.toolbar_frame.grid(row=0, column=1, sticky="ew") # วางในแถวเดียวกับปุ่ม แต่คอลัมน์ขวา
+            self.toolbar = NavigationToolbar2Tk(self.canvas, self.toolbar_frame)
+
+        if self.chart_key != self.current_chart_key:
+            with span("graph.set_data", bars=len(self.current_hist_data)):
+                self.price_chart.set_data(self.current_hist_data, self.current_support_levels, self.current_resistance_levels, self.current_symbol_info, self.current_symbol)
+            self.chart_key = self.current_chart_key
+            self.toolbar.update() # ล้างประวัติการซูมของข้อมูลชุดก่อน
+
+            self.canvas.draw_idle() # วาดกราฟ
         self.show_frame("graph") # สลับไปแสดงหน้าจอกราฟ
 
-    def calculate_support(self):
+    def _show_company_info(self, symbol, info):
         """
-        ดึงข้อมูลหุ้น คำนวณแนวรับ แนวต้าน และอัปเดต UI
+        อัปเดตกรอบข้อมูลบริษัทใน UI
+        """
+        self.company_label.config(text=info.get("longName", symbol))
+        # Access the labels directly after they have been assigned in _create_main_frame
+        self.sector_label.config(text=info.get("sector", "N/A"))
+        self.industry_label.config(text=info.get("industry", "N/A"))
+
+        market_cap = info.get("marketCap")
+        self.marketcap_label.config(text=f"{market_cap:,.0f} USD" if market_cap else "N/A")
+
+        trailing_pe = info.get("trailingPE")
+        self.pe_label.config(text=f"{trailing_pe:.2f}" if trailing_pe else "N/A")
+
+        dividend_yield = info.get("dividendYield")
+        self.dividend_label.config(text=f"{dividend_yield*100:.2f}%" if dividend_yield else "N/A")
+
+    def _on_info_refreshed(self, symbol, info):
+        """
+        เรียกจาก thread เบื้องหลังเมื่อรีเฟรชข้อมูลบริษัทเสร็จ ส่งกลับไปอัปเดต UI บน main thread
+        """
+        def apply():
+            if self.symbol_var.get().strip().upper() == symbol:
+                self._show_company_info(symbol, info)
+        self.runner.call_in_main(apply)
+
+    def _on_symbol_typed(self, event):
+        """
+        อัปเดตรายการแนะนำของช่องรหัสหุ้นตามข้อความที่พิมพ์ (ค้นจากรหัสหุ้นและคำในชื่อบริษัท)
+        ช่องว่างหรือยังโหลดรายชื่อหุ้นไม่เสร็จ จะแสดงประวัติการค้นหาแทน
+        """
+        if event.keysym in ("Return", "Up", "Down", "Escape", "Tab"):
+            return
+        text = self.symbol_var.get().strip()
+        master = peek_symbol_master()
+        if not text or master is None:
+            self.symbol_entry['values'] = self.search_history
+            self.symbol_hint_label.config(text=SYMBOL_HINT)
+            return
+        suggestions = master.suggest(text)
+        self.symbol_entry['values'] = [f"{entry['ticker']}  {entry['name']}" for entry in suggestions]
+        if suggestions:
+            best = suggestions[0]
+            self.symbol_hint_label.config(text=f"{best['ticker']} — {best['name']} ({best['exchange']})"[:60])
+        else:
+            self.symbol_hint_label.config(text="ไม่พบในรายชื่อหุ้น")
+
+    def _on_symbol_suggestion_selected(self, event):
+        """
+        เลือกรายการแนะนำ: ใส่เฉพาะรหัสหุ้นลงในช่อง
+        """
+        value = self.symbol_var.get().split()
+        if value:
+            self.symbol_var.set(value[0])
+        self.symbol_entry.icursor("end")
+
+    def calculate_support(self, record_search=True):
+        """
+        ตรวจสอบข้อมูลที่กรอก แล้วส่งงานดึงข้อมูลและคำนวณไปทำเบื้องหลัง
+        การกดซ้ำระหว่างที่งานเดิมยังไม่เสร็จจะยกเลิกงานเดิมแทนการต่อคิว
         """
         symbol = self.symbol_var.get().strip().upper()
         period = self.period_var.get()
@@ -612,95 +954,261 @@ class StockSupportCalculator:
             messagebox.showwarning("คำเตือน", "กรุณากรอกรหัสหุ้น")
             return
 
-        if not self.has_internet():
-            messagebox.showerror("ข้อผิดพลาด", "ไม่มีการเชื่อมต่ออินเทอร์เน็ต")
-            return
-
-        if not symbol.isalnum():
-            messagebox.showerror("ข้อผิดพลาด", "รหัสหุ้นไม่ถูกต้อง: ควรเป็นตัวอักษรหรือตัวเลขเท่านั้น")
+        # ตรวจรูปแบบและรายชื่อหุ้นบนเครื่องก่อน ไม่ต้องรอเครือข่ายเพื่อรู้ว่าพิมพ์ผิด
+        error = validate_symbol(symbol, wait=False) # ไม่หยุดรอโหลดรายชื่อหุ้นบน main thread
+        if error:
+            messagebox.showerror("ข้อผิดพลาด", error)
             return
         
-        # เพิ่มรหัสหุ้นลงในประวัติการค้นหา
-        if symbol and symbol not in self.search_history:
-            self.search_history.insert(0, symbol)
-            self.search_history = self.search_history[:10] # เก็บ 10 รายการล่าสุด
+        # เพิ่มรหัสหุ้นลงในประวัติการค้นหา (เก็บทั้งหมดในฐานข้อมูล แสดงเฉพาะล่าสุด)
+        if record_search:
+            self.local_store.add_search(symbol, period)
+            self.search_history = self.local_store.recent_searches()
             self.symbol_entry['values'] = self.search_history
 
-        # อัปเดตสถานะ UI และปิดการใช้งานปุ่มชั่วคราว
-        self.status_label.config(text="กำลังโหลดข้อมูล...")
-        self.calc_button.config(state="disabled")
+        # อัปเดตสถานะ UI และปิดการใช้งานปุ่มที่ต้องใช้ข้อมูลชุดใหม่
+        self.status_label.config(text=f"กำลังโหลดข้อมูล {symbol}...")
         self.view_graph_button.config(state="disabled")
         self.save_pdf_button.config(state="disabled")
-        self.root.update_idletasks() # บังคับให้อัปเดต UI ทันที
 
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info # ดึงข้อมูลบริษัท
-
-            if not info or "regularMarketPrice" not in info or info["regularMarketPrice"] is None:
-                messagebox.showerror("ข้อผิดพลาด", f"ไม่พบข้อมูลหุ้นที่ถูกต้องสำหรับ: {symbol} หรือไม่มีราคาปัจจุบัน")
-                self.status_label.config(text="")
-                return
-
-            hist = ticker.history(period=period) # ดึงข้อมูลประวัติราคา
-            if hist.empty:
-                messagebox.showerror("ข้อผิดพลาด", f"ไม่มีข้อมูลประวัติหุ้นสำหรับ {symbol} ในช่วงเวลาที่เลือก")
-                self.status_label.config(text="")
-                return
-
-            # คำนวณแนวรับและแนวต้าน
-            supports = self.find_support_levels(hist)
-            resistances = self.find_resistance_levels(hist)
-            
-            # อัปเดตข้อมูลบริษัทใน UI
-            self.company_label.config(text=info.get("longName", symbol))
-            # Access the labels directly after they have been assigned in _create_main_frame
-            self.sector_label.config(text=info.get("sector", "N/A"))
-            self.industry_label.config(text=info.get("industry", "N/A"))
-            
-            market_cap = info.get("marketCap")
-            self.marketcap_label.config(text=f"{market_cap:,.0f} USD" if market_cap else "N/A")
+        self.runner.submit("lookup", self._lookup_job, symbol, period, self.method_var.get(),
+                           on_progress=self._on_lookup_progress,
+                           on_success=self._on_lookup_done,
+                           on_error=self._on_lookup_error)
 
-            trailing_pe = info.get("trailingPE")
-            self.pe_label.config(text=f"{trailing_pe:.2f}" if trailing_pe else "N/A")
+    def _lookup_job(self, task, symbol, period, method):
+        """
+        ทำงานบน worker thread: ดึงข้อมูลบริษัท, ประวัติราคาช่วง "max" ครั้งเดียว
+        และคำนวณแนวรับแนวต้าน/RSI ของทุกช่วงเวลาในครั้งเดียว
+        """
+        from analysis_engine import analyze_periods, fetch_history, fetch_info
+        from history_store import get_history_store
+        from indicator_service import get_indicator_service
+
+        profile = nullcontext()
+        if self.profile_next_lookup:
+            self.profile_next_lookup = False
+            profile = instrumentation.capture_profile(f"lookup_{symbol}_{datetime.now():%Y%m%d_%H%M%S}")
+
+        with profile, span("lookup.total", symbol=symbol, period=period):
+            task.progress("info", symbol)
+            with span("lookup.info", symbol=symbol):
+                info = fetch_info(symbol, self._on_info_refreshed)
+            task.progress("history", (symbol, info))
+            with span("lookup.history", symbol=symbol, period="max"):
+                hist = fetch_history(symbol, "max")
+            # แท่งล่าสุดอาจถูกแทนที่ด้วยราคาใหม่โดยเวลาไม่เปลี่ยน ผลตัวชี้วัดเดิมของหุ้นนี้จึงใช้ไม่ได้
+            get_indicator_service().invalidate(symbol)
+            task.progress("levels", (symbol, len(hist)))
+
+            # คำนวณแนวรับและแนวต้านของทุกช่วงเวลาจากข้อมูล float64 ให้ตรงกับ batch/screener/API
+            with span("lookup.levels", bars=len(hist), method=method):
+                periods = analyze_periods(hist, PERIODS, method)
+            self.local_store.save_levels(symbol, method, periods)
+            # เก็บเฉพาะแบบ float32 ใน HistoryStore (DataFrame float64 ถูกปล่อยเมื่องานนี้จบ)
+            history = get_history_store().put(symbol, hist)
+        task.check_cancelled()
+        return symbol, info, history, periods
+
+    def _on_lookup_progress(self, stage, payload):
+        """
+        แสดงความคืบหน้าแต่ละขั้นตอนใน status_label
+        """
+        if stage == "info":
+            self.status_label.config(text=f"[1/3] กำลังโหลดข้อมูลบริษัท {payload}...")
+        elif stage == "history":
+            symbol, info = payload
+            self._show_company_info(symbol, info) # แสดงข้อมูลบริษัทก่อน ไม่ต้องรอประวัติราคา
+            self.status_label.config(text=f"[2/3] กำลังโหลดประวัติราคา {symbol} (ทุกช่วงเวลา)...")
+        elif stage == "levels":
+            symbol, bars = payload
+            self.status_label.config(text=f"[3/3] กำลังคำนวณแนวรับ/แนวต้านจาก {bars} วัน...")
+
+    def _on_lookup_done(self, result):
+        """
+        อัปเดต UI เมื่อดึงข้อมูลและคำนวณเสร็จ (เรียกบน main thread)
+        """
+        symbol, info, history, periods = result
 
-            dividend_yield = info.get("dividendYield")
-            self.dividend_label.config(text=f"{dividend_yield*100:.2f}%" if dividend_yield else "N/A")
-            
-            # อัปเดตราคาล่าสุดและแนวรับ แนวต้าน
-            last_close = hist['Close'].iloc[-1]
-            self.price_label.config(text=f"ราคาปิดล่าสุด: {last_close:.2f} USD")
-            
-            for i, level in enumerate(supports):
-                self.support_labels[i].config(text=f"{level:.2f} USD")
-            for i, level in enumerate(resistances):
-                self.resistance_labels[i].config(text=f"{level:.2f} USD")
+        # อัปเดตข้อมูลบริษัทใน UI
+        self._show_company_info(symbol, info)
 
-            self.status_label.config(text=f"แสดงข้อมูล {len(hist)} วันย้อนหลัง")
+        self.current_symbol = symbol
+        self.current_history = history
+        self.current_periods = periods
+        self.current_symbol_info = info
 
-            # เก็บข้อมูลที่คำนวณได้ เพื่อใช้ในการแสดงกราฟหรือ PDF
-            self.current_hist_data = hist
-            self.current_support_levels = supports
-            self.current_resistance_levels = resistances
-            self.current_symbol_info = info
+        self._fill_period_table(periods)
+        self._show_period(self.period_var.get())
 
-            # เปิดใช้งานปุ่มดูกราฟและบันทึก PDF
-            self.view_graph_button.config(state="normal")
-            self.save_pdf_button.config(state="normal")
+        # เปิดใช้งานปุ่มดูกราฟและบันทึก PDF
+        self.view_graph_button.config(state="normal")
+        self.save_pdf_button.config(state="normal")
 
-        except Exception as e:
-            messagebox.showerror("ข้อผิดพลาด", f"เกิดข้อผิดพลาดในการดึงข้อมูลหรือคำนวณ\n{e}")
-            self.status_label.config(text="เกิดข้อผิดพลาดในการโหลดข้อมูล")
-            # รีเซ็ตข้อมูลที่เก็บไว้
-            self.current_hist_data = None
-            self.current_symbol_info = None
-            self.view_graph_button.config(state="disabled")
-            self.save_pdf_button.config(state="disabled")
-        finally:
-            self.calc_button.config(state="normal")
-            # อัปเดตสถานะสุดท้าย
-            if "ข้อผิดพลาด" not in self.status_label.cget("text"):
-                self.status_label.config(text=f"ข้อมูลพร้อมสำหรับ {symbol}")
+    def _fill_period_table(self, periods):
+        """
+        แสดงแนวรับ/แนวต้าน/RSI ของทุกช่วงเวลาในตาราง
+        """
+        self.period_table.delete(*self.period_table.get_children())
+        for period in [period for period in PERIODS if period in periods]:
+            levels = periods[period]
+            supports = [f"{level:.2f}" for level in levels["supports"]] + ["-"] * (3 - len(levels["supports"]))
+            resistances = [f"{level:.2f}" for level in levels["resistances"]] + ["-"] * (3 - len(levels["resistances"]))
+            self.period_table.insert("", "end", iid=period,
+                                     values=(period, levels["bars"], *supports, *resistances, f"{levels['rsi']:.1f}"))
+
+    def _on_method_selected(self, event):
+        """
+        เปลี่ยนวิธีคำนวณแนวรับ/แนวต้าน: คำนวณใหม่เบื้องหลังจากประวัติราคาบนเครื่อง ไม่ต้องดึงข้อมูลจากเครือข่าย
+        """
+        if self.current_history is None:
+            return
+        self.runner.submit("levels", self._levels_job, self.current_symbol, self.method_var.get(),
+                           on_success=self._on_levels_done, on_error=self._on_lookup_error)
+
+    def _levels_job(self, task, symbol, method):
+        """
+        คำนวณจากข้อมูล float64 ในแคชบนดิสก์ (หรือไฟล์ของ --data-dir) แล้วเก็บลง HistoryStore ใหม่ให้กราฟตรงกับผลคำนวณ
+        หากไม่มีบนดิสก์ ใช้ข้อมูล float32 ใน HistoryStore แทน
+        """
+        import numpy as np
+        from analysis_engine import SymbolDataError, analyze_periods, load_local_history
+        from history_store import get_history_store
+        from indicator_service import get_indicator_service
+
+        store = get_history_store()
+        hist = load_local_history(symbol, "max")
+        if hist is not None:
+            history = store.put(symbol, hist)
+            get_indicator_service().invalidate(symbol)
+        else:
+            history = store.get(symbol, disk=False)
+            if history is None:
+                raise SymbolDataError(f"ไม่มีประวัติราคาของ {symbol} บนเครื่อง กรุณาคำนวณใหม่")
+            hist = history.to_frame().astype(np.float64)
+        with span("lookup.levels", bars=len(hist), method=method):
+            periods = analyze_periods(hist, PERIODS, method)
+        self.local_store.save_levels(symbol, method, periods)
+        task.check_cancelled()
+        return symbol, history, periods
+
+    def _on_levels_done(self, result):
+        symbol, history, periods = result
+        if symbol != self.current_symbol:
+            return # โหลดหุ้นตัวอื่นไปแล้วระหว่างคำนวณ
+        self.current_history = history
+        self.current_periods = periods
+        self._fill_period_table(periods)
+        self._show_period(self.period_var.get())
+
+    def _show_period(self, period):
+        """
+        แสดงราคาและแนวรับแนวต้านของช่วงเวลาที่เลือกจากผลที่คำนวณไว้แล้ว (ไม่ดึงข้อมูลหรือคำนวณใหม่)
+        """
+        levels = self.current_periods[period]
+        history = self.current_history.slice(levels["start"])
+        hist = history.to_frame() # view ของข้อมูลเดิม ไม่คัดลอก
+        supports = levels["supports"]
+        resistances = levels["resistances"]
+
+        # อัปเดตราคาล่าสุดและแนวรับ แนวต้าน (ราคาจากผลคำนวณ float64 ไม่ใช่ข้อมูลกราฟ)
+        last_close = levels["last_close"]
+        self.price_label.config(text=f"ราคาปิดล่าสุด: {last_close:.2f} USD",
+                                foreground="#cc7700" if hist.attrs.get("offline") else "#228833")
+        
+        self._set_level_labels(supports, resistances)
+
+        if self.period_table.selection() != (period,):
+            self.period_table.selection_set(period)
+
+        status = f"ข้อมูลพร้อมสำหรับ {self.current_symbol} (แสดงข้อมูล {len(hist)} วันย้อนหลัง)"
+        if hist.attrs.get("offline"):
+            # ข้อมูลมาจากแคช อาจไม่เป็นปัจจุบัน
+            checked_at = datetime.fromtimestamp(hist.attrs["checked_at"]).strftime("%d/%m/%Y %H:%M")
+            status += f" ⚠ ข้อมูลออฟไลน์ อัปเดตล่าสุด {checked_at}"
+        if instrumentation.is_enabled():
+            status += f"  ⏱ {instrumentation.get_recorder().last_summary('lookup.')}"
+        self.status_label.config(text=status)
+
+        # เก็บข้อมูลที่คำนวณได้ เพื่อใช้ในการแสดงกราฟหรือ PDF
+        self.current_hist_data = hist
+        self.current_support_levels = supports
+        self.current_resistance_levels = resistances
+        self.current_chart_key = (self.current_symbol, len(history), int(history.days[-1]) if len(history) else None)
+        if self.price_chart is not None and self.chart_key == self.current_chart_key:
+            # กราฟมีข้อมูลชุดนี้อยู่แล้ว (เช่น เปลี่ยนวิธีคำนวณ) วาดใหม่เฉพาะเส้นแนวรับ/แนวต้าน
+            self.price_chart.set_levels(supports, resistances)
+
+    def _set_level_labels(self, supports, resistances):
+        for i, label in enumerate(self.support_labels):
+            label.config(text=f"{supports[i]:.2f} USD" if i < len(supports) else "-")
+        for i, label in enumerate(self.resistance_labels):
+            label.config(text=f"{resistances[i]:.2f} USD" if i < len(resistances) else "-")
+
+    def _restore_last_lookup(self):
+        """
+        ตอนเปิดโปรแกรม: แสดงแนวรับ/แนวต้าน/RSI ที่บันทึกไว้ของหุ้นที่ค้นหาล่าสุดทันที
+        แล้วโหลดข้อมูลใหม่เบื้องหลัง (ผลใหม่จะแทนที่เมื่อโหลดเสร็จ)
+        """
+        last = self.local_store.last_search()
+        if last is None:
+            return
+        symbol, period = last
+        periods = self.local_store.load_levels(symbol, self.method_var.get())
+        if not periods:
+            return
+        self.symbol_var.set(symbol)
+        if period in periods:
+            self.period_var.set(period)
+        period = self.period_var.get()
+        self._fill_period_table(periods)
+        levels = periods.get(period)
+        if levels:
+            self.price_label.config(text=f"ราคาปิดล่าสุด: {levels['last_close']:.2f} USD", foreground="#cc7700")
+            self._set_level_labels(levels["supports"], levels["resistances"])
+            self.period_table.selection_set(period)
+
+        self.calculate_support(record_search=False)
+        computed_at = datetime.fromtimestamp(max(levels["computed_at"] for levels in periods.values()))
+        self.status_label.config(text=f"แสดงค่าที่บันทึกไว้ของ {symbol} เมื่อ {computed_at:%d/%m/%Y %H:%M} "
+                                      f"กำลังโหลดข้อมูลใหม่...")
+
+    def _on_period_selected(self, event):
+        """
+        เปลี่ยนช่วงเวลาใน Combobox: หากโหลดหุ้นตัวนี้ไว้แล้ว สลับผลทันทีโดยไม่ต้องกดคำนวณ
+        """
+        if self.current_periods is not None and self.symbol_var.get().strip().upper() == self.current_symbol:
+            self._show_period(self.period_var.get())
+
+    def _on_period_row_selected(self, event):
+        """
+        คลิกแถวในตารางช่วงเวลา: สลับไปแสดงช่วงเวลานั้น
+        """
+        selection = self.period_table.selection()
+        if not selection or self.current_periods is None or selection[0] == self.period_var.get():
+            return
+        self.period_var.set(selection[0])
+        self._show_period(selection[0])
+
+    def _on_lookup_error(self, error):
+        """
+        แสดงข้อผิดพลาดจากงานเบื้องหลัง (เรียกบน main thread)
+        """
+        from analysis_engine import SymbolDataError
+        if isinstance(error, SymbolDataError):
+            messagebox.showerror("ข้อผิดพลาด", str(error))
+            self.status_label.config(text="")
+            return
+
+        messagebox.showerror("ข้อผิดพลาด", f"เกิดข้อผิดพลาดในการดึงข้อมูลหรือคำนวณ\n{error}")
+        self.status_label.config(text="เกิดข้อผิดพลาดในการโหลดข้อมูล")
+        # รีเซ็ตข้อมูลที่เก็บไว้
+        self.current_hist_data = None
+        self.current_symbol_info = None
+        self.current_history = None
+        self.current_periods = None
+        self.view_graph_button.config(state="disabled")
+        self.save_pdf_button.config(state="disabled")
 
 if __name__ == "__main__":
     root = tk.Tk()
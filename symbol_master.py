@@ -0,0 +1,148 @@
+import csv
+import re
+import threading
+from bisect import bisect_left
+
+SYMBOL_MASTER_FILE = "symbols.csv" # ไฟล์รายชื่อหุ้น: คอลัมน์ ticker, name, exchange (มีแถวหัวตาราง)
+SUGGESTION_LIMIT = 10
+# รูปแบบรหัสของ Yahoo Finance เช่น AAPL, BRK-B, PTT.BK, ^GSPC, EURUSD=X
+SYMBOL_PATTERN = re.compile(r"^\^?[A-Z0-9]+(?:[.\-=][A-Z0-9]+)*$")
+MAX_SYMBOL_LENGTH = 20
+FORMAT_ERROR = "รหัสหุ้นไม่ถูกต้อง: ใช้ได้เฉพาะตัวอักษร ตัวเลข และ . - = ^ (เช่น AAPL, BRK-B, PTT.BK)"
+_TOKEN_SPLIT = re.compile(r"[^0-9A-Z]+")
+_PREFIX_END = "\uffff" # มากกว่าทุกตัวอักษร ใช้หาขอบขวาของช่วง prefix
+
+
+def is_valid_format(symbol):
+    """
+    True หากรหัสหุ้นอยู่ในรูปแบบที่ Yahoo Finance ใช้ (ยังไม่ได้ตรวจว่ามีหุ้นนี้จริง)
+    """
+    return len(symbol) <= MAX_SYMBOL_LENGTH and SYMBOL_PATTERN.match(symbol) is not None
+
+
+def _prefix_range(keys, prefix):
+    """
+    ช่วง [first, last) ของ keys (เรียงแล้ว) ที่ขึ้นต้นด้วย prefix
+    """
+    return bisect_left(keys, prefix), bisect_left(keys, prefix + _PREFIX_END)
+
+
+class SymbolMaster:
+    """
+    รายชื่อหุ้นบนเครื่องพร้อมดัชนีสำหรับค้นหาขณะพิมพ์
+    - รหัสหุ้นเรียงเป็น list เดียว ค้นหา prefix ด้วย bisect (O(log n) ต่อการพิมพ์ 1 ครั้ง)
+    - คำในชื่อบริษัท (token) เรียงเป็น list คู่กับตำแหน่งของหุ้น ค้นหา prefix ของคำได้แบบเดียวกัน
+    """
+
+    def __init__(self, rows):
+        rows = sorted({row[0].strip().upper(): row for row in rows if row and row[0].strip()}.items())
+        self.tickers = [ticker for ticker, _ in rows]
+        self.names = [row[1].strip() if len(row) > 1 else "" for _, row in rows]
+        self.exchanges = [row[2].strip() if len(row) > 2 else "" for _, row in rows]
+        tokens = sorted((token, i) for i, name in enumerate(self.names)
+                        for token in set(_TOKEN_SPLIT.split(name.upper())) if token)
+        self.tokens = [token for token, _ in tokens]
+        self.token_rows = [i for _, i in tokens]
+
+    @classmethod
+    def load(cls, path=SYMBOL_MASTER_FILE):
+        """
+        โหลดจากไฟล์ CSV (ticker, name, exchange) คืนค่า None หากไม่มีไฟล์
+        """
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                rows = list(reader)
+        except FileNotFoundError:
+            return None
+        if header and header[0].strip().lower() not in ("ticker", "symbol"):
+            rows.insert(0, header) # ไฟล์ไม่มีแถวหัวตาราง
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, symbol):
+        i = bisect_left(self.tickers, symbol)
+        return i < len(self.tickers) and self.tickers[i] == symbol
+
+    def entry(self, i):
+        return {"ticker": self.tickers[i], "name": self.names[i], "exchange": self.exchanges[i]}
+
+    def lookup(self, symbol):
+        """
+        คืนข้อมูลของหุ้น (dict) หรือ None หากไม่มีในรายชื่อ
+        """
+        i = bisect_left(self.tickers, symbol)
+        return self.entry(i) if i < len(self.tickers) and self.tickers[i] == symbol else None
+
+    def suggest(self, text, limit=SUGGESTION_LIMIT):
+        """
+        หุ้นที่รหัสขึ้นต้นด้วย text ก่อน ตามด้วยหุ้นที่มีคำในชื่อขึ้นต้นด้วย text (ไม่ซ้ำ สูงสุด limit รายการ)
+        """
+        text = text.strip().upper()
+        if not text:
+            return []
+        first, last = _prefix_range(self.tickers, text)
+        rows = list(range(first, min(last, first + limit)))
+        if len(rows) < limit:
+            seen = set(rows)
+            first, last = _prefix_range(self.tokens, text)
+            for position in range(first, last):
+                i = self.token_rows[position]
+                if i not in seen:
+                    seen.add(i)
+                    rows.append(i)
+                    if len(rows) == limit:
+                        break
+        return [self.entry(i) for i in rows]
+
+    def validate(self, symbol):
+        """
+        ตรวจรหัสหุ้นก่อนดึงข้อมูล คืนข้อความข้อผิดพลาด (None หากใช้ได้)
+        """
+        if not is_valid_format(symbol):
+            return FORMAT_ERROR
+        if symbol not in self:
+            suggestions = [entry["ticker"] for entry in self.suggest(symbol, 3)]
+            hint = f" หมายถึง {', '.join(suggestions)} หรือไม่?" if suggestions else ""
+            return f"ไม่พบรหัสหุ้น {symbol} ในรายชื่อหุ้น ({SYMBOL_MASTER_FILE}){hint}"
+        return None
+
+
+_symbol_master = None
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def get_symbol_master():
+    """
+    คืนค่ารายชื่อหุ้นที่ใช้ร่วมกันทั้งโปรเซส (โหลดครั้งแรกที่เรียก) หรือ None หากไม่มีไฟล์
+    """
+    global _symbol_master, _loaded
+    with _load_lock:
+        if not _loaded:
+            _symbol_master = SymbolMaster.load()
+            _loaded = True
+    return _symbol_master
+
+
+def peek_symbol_master():
+    """
+    คืนค่ารายชื่อหุ้นเฉพาะเมื่อโหลดเสร็จแล้ว (ไม่รอการโหลด ใช้บน main thread)
+    """
+    return _symbol_master if _loaded else None
+
+
+def validate_symbol(symbol, wait=True):
+    """
+    ตรวจรูปแบบรหัสหุ้น และตรวจว่ามีในรายชื่อหุ้นหากมีไฟล์รายชื่อ คืนข้อความข้อผิดพลาด (None หากใช้ได้)
+    wait=False ไม่รอโหลดรายชื่อหุ้น (ตรวจเฉพาะรูปแบบหากยังโหลดไม่เสร็จ)
+    """
+    master = get_symbol_master() if wait else peek_symbol_master()
+    if master is None:
+        if not is_valid_format(symbol):
+            return FORMAT_ERROR
+        return None
+    return master.validate(symbol)
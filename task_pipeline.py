@@ -0,0 +1,138 @@
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 50
+
+
+class TaskCancelled(Exception):
+    """
+    งานถูกยกเลิกเพราะมีงานใหม่มาแทนที่
+    """
+
+
+class Task:
+    """
+    งานเบื้องหลัง 1 งาน ใช้รายงานความคืบหน้าและตรวจสอบการยกเลิกระหว่างขั้นตอน
+    """
+
+    def __init__(self, runner, channel, callbacks):
+        self.runner = runner
+        self.channel = channel
+        self.callbacks = callbacks
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel() # ยกเลิกได้ทันทีถ้ายังไม่เริ่มทำงาน
+
+    def check_cancelled(self):
+        """
+        เรียกระหว่างขั้นตอนเพื่อหยุดงานที่ถูกแทนที่แล้ว
+        """
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def progress(self, stage, payload=None):
+        """
+        ส่งความคืบหน้าของขั้นตอน stage กลับไปยัง main thread
+        """
+        self.check_cancelled()
+        self.runner._post(self, "progress", (stage, payload))
+
+
+class BackgroundRunner:
+    """
+    รันงานใน thread pool แล้วส่งผลกลับมายัง Tk main thread ผ่าน root.after
+    งานใหม่ใน channel เดียวกันจะยกเลิกงานก่อนหน้าที่ยังไม่เสร็จ
+    """
+
+    def __init__(self, root, max_workers=4):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stock-worker")
+        self._events = queue.Queue()
+        self._current = {}
+        self._closed = False
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def submit(self, channel, func, *args, on_progress=None, on_success=None, on_error=None):
+        """
+        รัน func(task, *args) เบื้องหลัง callback ทั้งหมดจะถูกเรียกบน main thread
+        และจะไม่ถูกเรียกเลยหากงานถูกแทนที่ไปแล้ว
+        """
+        previous = self._current.get(channel)
+        if previous is not None:
+            previous.cancel()
+
+        task = Task(self, channel, {"progress": on_progress, "success": on_success, "error": on_error})
+        self._current[channel] = task
+        task.future = self.executor.submit(self._run, task, func, args)
+        return task
+
+    def _run(self, task, func, args):
+        try:
+            result = func(task, *args)
+        except TaskCancelled:
+            return
+        except Exception as e:
+            self._post(task, "error", e)
+        else:
+            self._post(task, "success", result)
+
+    def _post(self, task, kind, value):
+        self._events.put((task, kind, value))
+
+    def call_in_main(self, func, *args):
+        """
+        เรียก func(*args) บน main thread (ใช้ได้จากทุก thread)
+        """
+        self._events.put((None, "call", (func, args)))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    event = self._events.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._dispatch(*event)
+                except Exception:
+                    self.root.report_callback_exception(*sys.exc_info()) # callback ที่ผิดพลาดต้องไม่ทำให้หยุด poll
+        finally:
+            if not self._closed:
+                self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _dispatch(self, task, kind, value):
+        if task is None:
+            func, args = value
+            func(*args)
+            return
+        # ทิ้งผลลัพธ์ของงานที่ถูกยกเลิกหรือถูกแทนที่แล้ว
+        if task.cancelled or self._current.get(task.channel) is not task:
+            return
+        if kind != "progress":
+            del self._current[task.channel]
+        callback = task.callbacks.get(kind)
+        if callback is None:
+            return
+        if kind == "progress":
+            callback(*value)
+        else:
+            callback(value)
+
+    def shutdown(self):
+        """
+        ยกเลิกงานทั้งหมดและปิด thread pool
+        """
+        self._closed = True
+        for task in self._current.values():
+            task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,325 @@
+import threading
+import time
+import traceback
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import find_levels_matrix, get_history_cache, get_provider, is_offline
+from indicators import IndicatorSet
+
+REFRESH_INTERVAL = 60 # วินาที ระหว่างการรีเฟรชตามรอบ
+MONITOR_PERIOD = "1y" # ช่วงข้อมูลที่ใช้คำนวณแนวรับ/แนวต้านของหุ้นที่ติดตาม
+REQUEST_BUDGET = 600 # จำนวนหุ้นที่ขอข้อมูลได้สูงสุดต่อ BUDGET_WINDOW
+BUDGET_WINDOW = 60 * 60 # วินาที
+RSI_OVERBOUGHT = 70
+RSI_OVERSOLD = 30
+
+
+class RequestBudget:
+    """
+    จำกัดจำนวนคำขอในช่วงเวลาที่เลื่อนไปเรื่อยๆ (sliding window)
+    """
+
+    def __init__(self, limit=REQUEST_BUDGET, window=BUDGET_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._used = deque()
+
+    def available(self):
+        cutoff = time.monotonic() - self.window
+        while self._used and self._used[0] < cutoff:
+            self._used.popleft()
+        return max(self.limit - len(self._used), 0)
+
+    def take(self, count):
+        """
+        ขอใช้ count คำขอ คืนค่าจำนวนที่ได้จริง (ไม่เกินที่เหลือ)
+        """
+        granted = min(count, self.available())
+        now = time.monotonic()
+        self._used.extend([now] * granted)
+        return granted
+
+
+class SymbolState:
+    """
+    สถานะของหุ้นที่ติดตาม: ราคาปิดในช่วงที่ใช้คำนวณแนวรับ/แนวต้าน และตัวชี้วัดแบบ incremental
+    indicator_state คือ snapshot ที่บันทึกไว้คู่กับแคช (ถ้ามี) ใช้แทนการ seed ตัวชี้วัดจากประวัติราคาใหม่
+    """
+
+    def __init__(self, symbol, hist, indicator_state=None):
+        self.symbol = symbol
+        self.closes = deque(hist["Close"].to_numpy(dtype=np.float64), maxlen=len(hist))
+        self.last_date = hist.index[-1]
+        if indicator_state is not None:
+            self.indicators = IndicatorSet.from_snapshot(indicator_state)
+        else:
+            self.indicators = IndicatorSet()
+            self.indicators.seed(self.closes)
+        self.supports = []
+        self.resistances = []
+        self.refreshed_at = time.monotonic()
+
+    @property
+    def last_close(self):
+        return float(self.closes[-1])
+
+    @property
+    def rsi(self):
+        return self.indicators.values["RSI"]
+
+    def apply_bars(self, bars):
+        """
+        ใส่แท่งราคาใหม่ (แท่งวันเดียวกับแท่งล่าสุดจะแทนที่ค่าเดิม) คืนค่า True หากราคาเปลี่ยน
+        """
+        changed = False
+        for date, close in zip(bars.index, bars["Close"].to_numpy(dtype=np.float64)):
+            if np.isnan(close) or date < self.last_date:
+                continue
+            if date == self.last_date:
+                if close == self.closes[-1]:
+                    continue
+                self.closes[-1] = close
+                self.indicators.update_last(close)
+            else:
+                self.closes.append(close)
+                self.indicators.update(close)
+                self.last_date = date
+            changed = True
+        self.refreshed_at = time.monotonic()
+        return changed
+
+    def summary(self):
+        return {
+            "symbol": self.symbol,
+            "last_close": self.last_close,
+            "rsi": self.rsi,
+            "supports": list(self.supports),
+            "resistances": list(self.resistances),
+        }
+
+
+def detect_alerts(symbol, previous_close, close, previous_rsi, rsi, supports, resistances):
+    """
+    ตรวจหาการตัดผ่านแนวรับ/แนวต้าน (ทั้งขึ้นและลง) และ RSI ผ่านระดับ 30/70 คืนค่ารายการแจ้งเตือน
+    """
+    alerts = []
+    for kind, levels in (("support", supports), ("resistance", resistances)):
+        name = "แนวรับ" if kind == "support" else "แนวต้าน"
+        for level in levels:
+            if previous_close >= level > close:
+                alerts.append({"symbol": symbol, "kind": f"{kind}_cross_down", "level": level, "price": close,
+                               "message": f"{symbol} ราคาหลุด{name} {level:.2f} (ล่าสุด {close:.2f})"})
+            elif previous_close <= level < close:
+                alerts.append({"symbol": symbol, "kind": f"{kind}_cross_up", "level": level, "price": close,
+                               "message": f"{symbol} ราคาขึ้นผ่าน{name} {level:.2f} (ล่าสุด {close:.2f})"})
+    if previous_rsi < RSI_OVERBOUGHT <= rsi:
+        alerts.append({"symbol": symbol, "kind": "rsi_overbought", "level": RSI_OVERBOUGHT, "price": close,
+                       "message": f"{symbol} RSI ขึ้นเหนือ {RSI_OVERBOUGHT} ({rsi:.1f}) ซื้อมากเกินไป"})
+    elif previous_rsi > RSI_OVERSOLD >= rsi:
+        alerts.append({"symbol": symbol, "kind": "rsi_oversold", "level": RSI_OVERSOLD, "price": close,
+                       "message": f"{symbol} RSI ลงต่ำกว่า {RSI_OVERSOLD} ({rsi:.1f}) ขายมากเกินไป"})
+    return alerts
+
+
+class WatchlistMonitor:
+    """
+    รีเฟรชหุ้นใน watchlist ตามรอบใน thread เบื้องหลัง โดยดึงข้อมูลหุ้นทุกตัวในคำขอเดียว (history_many)
+    อัปเดต RSI/MA แบบ incremental และคำนวณแนวรับ/แนวต้านของหุ้นที่ราคาเปลี่ยนพร้อมกันด้วย find_levels_matrix
+    การขอรีเฟรชซ้อนกันจะถูกรวมเป็นรอบเดียว และจำนวนหุ้นที่ดึงต่อรอบถูกจำกัดด้วย RequestBudget
+    (หุ้นที่ไม่ได้รีเฟรชนานที่สุดได้ก่อน)
+    on_update(summaries), on_alert(alerts) และ on_error(error) ถูกเรียกจาก thread เบื้องหลัง
+    """
+
+    def __init__(self, on_update=None, on_alert=None, interval=REFRESH_INTERVAL, period=MONITOR_PERIOD, budget=None,
+                 on_error=None):
+        self.on_update = on_update
+        self.on_alert = on_alert
+        self.on_error = on_error
+        self.interval = interval
+        self.period = period
+        self.budget = budget or RequestBudget()
+        self.states = {}
+        self._symbols = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_symbols(self, symbols):
+        with self._lock:
+            self._symbols = list(dict.fromkeys(symbols))
+            for symbol in list(self.states):
+                if symbol not in self._symbols:
+                    del self.states[symbol]
+        self.refresh_now()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = threading.Event() # แยกต่อรอบการทำงาน เพื่อไม่ให้ thread เดิมที่ยังไม่จบกลับมาทำงานต่อ
+        self._wake.set() # รีเฟรชรอบแรกทันที
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="watchlist-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def refresh_now(self):
+        """
+        ขอรีเฟรชทันที (เรียกซ้ำระหว่างที่กำลังรีเฟรชอยู่จะรวมเป็นรอบถัดไปรอบเดียว)
+        """
+        self._wake.set()
+
+    def _run(self, stop):
+        while not stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if stop.is_set():
+                break
+            try:
+                self.refresh()
+            except get_provider().policy.retry_on:
+                pass # เครือข่ายล้มเหลว (provider บันทึกสถานะการเชื่อมต่อแล้ว) ลองใหม่รอบถัดไป
+            except Exception as e:
+                # ข้อผิดพลาดอื่นเป็นปัญหาของโปรแกรม/ข้อมูล แจ้งออกไปแต่ยังติดตามต่อในรอบถัดไป
+                if self.on_error:
+                    self.on_error(e)
+                else:
+                    traceback.print_exc()
+
+    def refresh(self):
+        """
+        รีเฟรช 1 รอบ: โหลดหุ้นที่ยังไม่มีสถานะ แล้วดึงแท่งราคาใหม่ของหุ้นที่เหลือในคำขอเดียว
+        """
+        with self._lock:
+            symbols = list(self._symbols)
+        if not symbols:
+            return
+        offline = is_offline()
+
+        new_symbols = [symbol for symbol in symbols if symbol not in self.states]
+        seeded = self._seed(new_symbols, offline) if new_symbols else []
+
+        seeded_symbols = {state.symbol for state in seeded}
+        with self._lock:
+            known = sorted((self.states[symbol] for symbol in symbols
+                            if symbol in self.states and symbol not in seeded_symbols),
+                           key=lambda state: state.refreshed_at)
+        changed = []
+        alerts = []
+        new_bars = {}
+        if not offline and known:
+            known = known[:self.budget.take(len(known))]
+        if not offline and known:
+            start = min(state.last_date for state in known).date()
+            histories = get_provider().history_many([state.symbol for state in known], start=start)
+            for state in known:
+                previous_close, previous_rsi, previous_date = state.last_close, state.rsi, state.last_date
+                bars = histories.get(state.symbol)
+                if bars is None or bars.empty:
+                    continue
+                bars = self._align_tz(bars, state.last_date)
+                if not state.apply_bars(bars):
+                    continue
+                changed.append(state)
+                new_bars[state.symbol] = bars[(bars.index >= previous_date) & bars["Close"].notna()]
+                alerts.extend(detect_alerts(state.symbol, previous_close, state.last_close, previous_rsi, state.rsi,
+                                            state.supports, state.resistances))
+            self._update_levels(changed)
+            self._save_states(changed, new_bars)
+        if alerts and self.on_alert:
+            self.on_alert(alerts)
+        self._publish(seeded + changed)
+
+    def _seed(self, symbols, offline):
+        cache = get_history_cache()
+        provider = get_provider()
+        histories = {}
+        if provider.cacheable:
+            for symbol in symbols:
+                hist = cache.load_period(symbol, self.period)
+                if hist is not None and not hist.empty:
+                    histories[symbol] = hist
+        missing = [symbol for symbol in symbols if symbol not in histories]
+        if missing and not offline:
+            missing = missing[:self.budget.take(len(missing))]
+            fetched = provider.history_many(missing, self.period) if missing else {}
+            for symbol, hist in fetched.items():
+                if hist.empty:
+                    continue
+                if provider.cacheable:
+                    cache.store(symbol, hist, self.period)
+                histories[symbol] = hist
+
+        saved = {}
+        if provider.cacheable:
+            for symbol, hist in histories.items():
+                state = cache.load_indicator_state(symbol, int(hist.index[-1].value))
+                if state is not None and state.get("period") == self.period:
+                    saved[symbol] = state["indicators"]
+
+        seeded = []
+        with self._lock:
+            for symbol, hist in histories.items():
+                if symbol in self._symbols:
+                    self.states[symbol] = SymbolState(symbol, hist, saved.get(symbol))
+                    seeded.append(self.states[symbol])
+        self._update_levels(seeded)
+        self._save_states([state for state in seeded if state.symbol not in saved])
+        return seeded
+
+    def _save_states(self, states, new_bars=None):
+        """
+        บันทึกแท่งราคาใหม่ (ถ้ามี) ต่อท้ายแคช แล้วบันทึก snapshot ของตัวชี้วัดคู่กับแท่งล่าสุดในแคช
+        เปิดโปรแกรมครั้งถัดไปจะใช้ snapshot แทนการ seed ใหม่ หากแท่งล่าสุดในแคชยังตรงกัน
+        """
+        if not states or not get_provider().cacheable:
+            return
+        cache = get_history_cache()
+        for state in states:
+            bars = new_bars.get(state.symbol) if new_bars else None
+            if bars is not None and not cache.append(state.symbol, bars):
+                continue
+            cache.save_indicator_state(state.symbol, {"period": self.period, "indicators": state.indicators.snapshot()},
+                                       int(state.last_date.value))
+
+    def _update_levels(self, states):
+        """
+        คำนวณแนวรับ/แนวต้านของหุ้นหลายตัวพร้อมกัน (เติม NaN ด้านหน้าให้ทุกแถวยาวเท่ากัน)
+        """
+        if not states:
+            return
+        width = max(len(state.closes) for state in states)
+        prices = np.full((len(states), width), np.nan)
+        for row, state in enumerate(states):
+            prices[row, width - len(state.closes):] = state.closes
+        supports, resistances = find_levels_matrix(prices)
+        for row, state in enumerate(states):
+            state.supports = [level for level in supports[row] if not np.isnan(level)]
+            state.resistances = [level for level in resistances[row] if not np.isnan(level)]
+
+    @staticmethod
+    def _align_tz(bars, reference):
+        if reference.tz is None:
+            return bars
+        index = pd.DatetimeIndex(bars.index)
+        bars = bars.copy()
+        bars.index = index.tz_convert(reference.tz) if index.tz is not None else index.tz_localize(reference.tz)
+        return bars
+
+    def _publish(self, changed):
+        if self.on_update:
+            self.on_update([state.summary() for state in changed])
+
+    def summaries(self):
+        with self._lock:
+            return {symbol: state.summary() for symbol, state in self.states.items()}